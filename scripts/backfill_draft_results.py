@@ -4,37 +4,19 @@ import time
 from pathlib import Path
 
 from db import connect_db, init_db, insert_raw_response, upsert_many
-from parse_yahoo_xml import parse_draft_results
-from raw_store import save_raw_xml
-from yahoo_client import api_get_response, parse_xml
+from parse_yahoo_xml import DRAFT_RESULT_COLUMNS, stream_draft_results
+from rate_limit import get_limiter, get_with_retry
+from raw_store import save_blob
 
 BASE_DIR = Path(__file__).resolve().parents[1]
-STORE_RAW_BODY_IN_DB = True
+STORE_RAW_BODY_IN_DB = False
 
 
-class Counter:
-    def __init__(self):
-        self.value = 1
-
-    def next(self):
-        current = self.value
-        self.value += 1
-        return current
-
-
-def fetch_xml(conn, counter, endpoint, season=None, league_key=None, allow_statuses=None):
-    response = api_get_response(endpoint)
+def fetch_xml(conn, endpoint, season=None, league_key=None, allow_statuses=None):
+    response = get_with_retry(get_limiter(), endpoint)
     body = response.content
 
-    file_path = save_raw_xml(
-        BASE_DIR,
-        season or "unknown",
-        league_key or "unknown",
-        endpoint,
-        None,
-        body,
-        counter.next(),
-    )
+    body_hash = save_blob(BASE_DIR, body)
 
     record = (
         time.strftime("%Y-%m-%d %H:%M:%S"),
@@ -43,8 +25,9 @@ def fetch_xml(conn, counter, endpoint, season=None, league_key=None, allow_statu
         endpoint,
         None,
         response.status_code,
-        file_path,
+        None,
         body.decode("utf-8", errors="replace") if STORE_RAW_BODY_IN_DB else None,
+        body_hash,
     )
     insert_raw_response(conn, record)
 
@@ -92,7 +75,6 @@ def main():
         print("No leagues available in the database to backfill.")
         return
 
-    counter = Counter()
     for league_key, season in leagues:
         if args.skip_existing and draft_has_data(conn, league_key):
             print(f"Skipping {league_key} (season {season}) - draft results already present")
@@ -101,7 +83,6 @@ def main():
         print(f"Fetching draft results for {league_key} (season {season})")
         draft_xml = fetch_xml(
             conn,
-            counter,
             f"/league/{league_key}/draftresults",
             season=season,
             league_key=league_key,
@@ -109,28 +90,7 @@ def main():
         )
         if draft_xml is None:
             continue
-        draft_root = parse_xml(draft_xml)
-        draft_results = parse_draft_results(draft_root)
-        for row in draft_results:
-            row["league_key"] = league_key
-        upsert_many(
-            conn,
-            "draft_results",
-            ("league_key", "team_key", "player_key", "round", "pick", "cost", "is_keeper", "is_autopick"),
-            [
-                (
-                    row.get("league_key"),
-                    row.get("team_key"),
-                    row.get("player_key"),
-                    row.get("round"),
-                    row.get("pick"),
-                    row.get("cost"),
-                    row.get("is_keeper"),
-                    row.get("is_autopick"),
-                )
-                for row in draft_results
-            ],
-        )
+        upsert_many(conn, "draft_results", DRAFT_RESULT_COLUMNS, stream_draft_results(draft_xml, league_key))
 
     print("Draft backfill complete.")
 
@@ -0,0 +1,192 @@
+import argparse
+import gc
+import hashlib
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from response_formats import PARSERS, RESPONSE_FORMATS
+from yahoo_payloads import GAME_KEY, LEAGUE_KEY, WEEK, build_payloads, to_yahoo_json
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+BASELINE_PATH = BASE_DIR / "data" / "processed" / "parser_benchmark.json"
+DEFAULT_REPEAT = 5
+
+CASES = (
+    ("parse_games", "games", lambda parsers, body: parsers.parse_games(parsers.parse_document(body))),
+    ("parse_leagues", "leagues", lambda parsers, body: parsers.parse_leagues(parsers.parse_document(body))),
+    ("parse_league_meta", "league", lambda parsers, body: parsers.parse_league_meta(parsers.parse_document(body))),
+    ("parse_settings", "settings", lambda parsers, body: parsers.parse_settings(parsers.parse_document(body))),
+    ("stream_teams", "teams", lambda parsers, body: parsers.stream_teams(body, LEAGUE_KEY)),
+    ("stream_standings", "standings", lambda parsers, body: parsers.stream_standings(body, LEAGUE_KEY)),
+    ("stream_draft_results", "draftresults", lambda parsers, body: parsers.stream_draft_results(body, LEAGUE_KEY)),
+    ("stream_matchups", "scoreboard", lambda parsers, body: parsers.stream_matchups(body, LEAGUE_KEY, WEEK)),
+    ("stream_roster", "roster", lambda parsers, body: parsers.stream_roster(body, LEAGUE_KEY, WEEK)),
+    (
+        "stream_roster_stats",
+        "roster_stats",
+        lambda parsers, body: parsers.stream_roster_stats(body, LEAGUE_KEY, GAME_KEY, WEEK),
+    ),
+    ("stream_team_stats", "team_stats", lambda parsers, body: parsers.stream_team_stats(body, LEAGUE_KEY, WEEK)),
+    ("stream_player_stats", "player_stats", lambda parsers, body: parsers.stream_player_stats(body, LEAGUE_KEY, WEEK)),
+    ("stream_transactions", "transactions", lambda parsers, body: parsers.stream_transactions(body, LEAGUE_KEY)),
+)
+
+
+def count_rows(output):
+    if isinstance(output, dict):
+        return 1 if output else 0
+    if isinstance(output, tuple) and output and isinstance(output[0], list):
+        return sum(len(part) for part in output)
+    return len(output)
+
+
+def output_digest(output):
+    return hashlib.sha256(repr(output).encode("utf-8")).hexdigest()[:16]
+
+
+def best_time(fn, body, parsers, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(parsers, body)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def peak_memory(fn, body, parsers):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn(parsers, body)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmarks(payloads, formats, repeat, only=None):
+    results = {}
+    for response_format in formats:
+        parsers = PARSERS[response_format]
+        bodies = payloads if response_format == "xml" else {kind: to_yahoo_json(body) for kind, body in payloads.items()}
+        for name, kind, fn in CASES:
+            if only and name not in only:
+                continue
+            if not hasattr(parsers, name):
+                continue
+            body = bodies[kind]
+            output = fn(parsers, body)
+            seconds = best_time(fn, body, parsers, repeat)
+            rows = count_rows(output)
+            results[f"{response_format}:{name}"] = {
+                "payload": kind,
+                "bytes": len(body),
+                "seconds": seconds,
+                "mb_per_s": len(body) / seconds / 1_000_000 if seconds else 0.0,
+                "rows": rows,
+                "rows_per_s": rows / seconds if seconds else 0.0,
+                "peak_kb": peak_memory(fn, body, parsers) / 1024,
+                "digest": output_digest(output),
+            }
+    return results
+
+
+def load_baseline(path):
+    path = Path(path)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_baseline(path, config, results):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"config": config, "results": results}, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def print_results(results, baseline=None):
+    base_results = (baseline or {}).get("results", {})
+    header = f"{'parser':<28} {'payload':<13} {'KB':>7} {'ms':>8} {'MB/s':>7} {'rows/s':>10} {'peak KB':>8}"
+    if baseline:
+        header += f" {'vs base':>8}  output"
+    print(header)
+    changed = []
+    for key, result in results.items():
+        line = (
+            f"{key:<28} {result['payload']:<13} {result['bytes'] / 1024:>7.1f} {result['seconds'] * 1000:>8.2f} "
+            f"{result['mb_per_s']:>7.1f} {result['rows_per_s']:>10.0f} {result['peak_kb']:>8.0f}"
+        )
+        base = base_results.get(key)
+        if baseline and base:
+            speedup = base["seconds"] / result["seconds"] if result["seconds"] else 0.0
+            same = base["digest"] == result["digest"]
+            line += f" {speedup:>7.2f}x  {'same' if same else 'CHANGED'}"
+            if not same:
+                changed.append(key)
+        elif baseline:
+            line += f" {'-':>8}  new"
+        print(line)
+    return changed
+
+
+def format_mismatches(results):
+    mismatches = []
+    for key, result in results.items():
+        response_format, name = key.split(":", 1)
+        reference = results.get(f"xml:{name}")
+        if response_format != "xml" and reference and reference["digest"] != result["digest"]:
+            mismatches.append(key)
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time every Yahoo parser on synthetic payloads and compare against a saved baseline."
+    )
+    parser.add_argument("--format", dest="formats", action="append", choices=RESPONSE_FORMATS, help="Parser format (repeatable, defaults to all).")
+    parser.add_argument("--parser", dest="only", action="append", help="Benchmark only this parser function (repeatable).")
+    parser.add_argument("--teams", type=int, default=12, help="Teams per league payload.")
+    parser.add_argument("--roster-size", type=int, default=16, help="Players per team roster.")
+    parser.add_argument("--stats", type=int, default=30, help="Stats per team/player.")
+    parser.add_argument("--players", type=int, default=25, help="Players per player stats batch.")
+    parser.add_argument("--transactions", type=int, default=25, help="Transactions per page.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs per parser (best is reported).")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="Baseline file to compare against.")
+    parser.add_argument("--save-baseline", action="store_true", help="Write these results as the new baseline.")
+    args = parser.parse_args()
+
+    config = {
+        "teams": args.teams,
+        "roster_size": args.roster_size,
+        "stats": args.stats,
+        "players": args.players,
+        "transactions": args.transactions,
+        "seed": args.seed,
+    }
+    payloads = build_payloads(**config)
+    results = run_benchmarks(payloads, args.formats or RESPONSE_FORMATS, max(1, args.repeat), only=args.only)
+
+    baseline = None if args.save_baseline else load_baseline(args.baseline)
+    if baseline and baseline.get("config") != config:
+        print(f"Baseline {args.baseline} was recorded with {baseline.get('config')}; not comparing.")
+        baseline = None
+    changed = print_results(results, baseline)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, config, results)
+        print(f"Saved baseline to {args.baseline}")
+    mismatches = format_mismatches(results)
+    if mismatches:
+        print(f"{len(mismatches)} parsers disagree with their XML counterpart: {', '.join(mismatches)}")
+    if changed:
+        print(f"{len(changed)} parsers produce different output than the baseline: {', '.join(changed)}")
+    if changed or mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import db
+import sync_all
+from rate_limit import DEFAULT_RATE, MAX_RATE, AdaptiveRateLimiter
+from replay_server import start_server
+from yahoo_client import YahooClient, set_client
+
+
+def load_leagues(db_path, league_key=None, season=None):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        "SELECT league_key, season, game_key FROM leagues ORDER BY season"
+    ).fetchall()
+    conn.close()
+    leagues = [{"league_key": row[0], "season": row[1], "game_key": row[2]} for row in rows]
+    if league_key:
+        leagues = [l for l in leagues if l["league_key"] == league_key]
+    if season:
+        leagues = [l for l in leagues if str(l["season"]) == str(season)]
+    return leagues
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark sync_league end to end against the offline replay server."
+    )
+    parser.add_argument("--db", default=str(db.DB_PATH), help="Database whose raw_responses are replayed.")
+    parser.add_argument("--league", dest="league_key", help="Benchmark a single league_key.")
+    parser.add_argument("--season", help="Benchmark the leagues of a single season.")
+    parser.add_argument("--workers", type=int, default=sync_all.MAX_WORKERS)
+    parser.add_argument("--per-team", action="store_true", help="Use per-team roster/stats requests.")
+    parser.add_argument("--incremental", action="store_true", help="Run the incremental sync mode.")
+    parser.add_argument("--roster-stats", action="store_true", help="Fetch player stats together with rosters.")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Starting requests/sec for the limiter.")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-status", type=int, default=429, choices=(429, 999))
+    parser.add_argument("--retry-after", type=int)
+    parser.add_argument("--max-rps", type=float, help="Replay server throttles above this rate.")
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"Missing database: {args.db}")
+        return
+
+    leagues = load_leagues(args.db, league_key=args.league_key, season=args.season)
+    if not leagues:
+        print("No leagues found to benchmark.")
+        return
+
+    server = start_server(
+        db_path=args.db,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        throttle_rate=args.throttle_rate,
+        throttle_status=args.throttle_status,
+        retry_after=args.retry_after,
+        max_rps=args.max_rps,
+    )
+    set_client(YahooClient(base_url=server.base_url, tokens={"access_token": "replay"}))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = Path(tmp_dir)
+        conn = db.connect_db(tmp_path / "benchmark.sqlite")
+        db.init_db(conn)
+
+        limiter = AdaptiveRateLimiter(
+            rate=args.rate,
+            state_path=tmp_path / "rate_limit.json",
+            max_rate=max(args.rate, MAX_RATE),
+        )
+        ctx = sync_all.SyncContext(
+            workers=args.workers,
+            use_collections=not args.per_team,
+            incremental=args.incremental,
+            roster_stats=args.roster_stats,
+            limiter=limiter,
+        )
+        ctx.raw_base_dir = tmp_path
+
+        write_seconds = db.WRITE_STATS.seconds
+        write_rows = db.WRITE_STATS.rows
+        write_commits = db.WRITE_STATS.commits
+        started = time.perf_counter()
+        for league in leagues:
+            sync_all.sync_league(conn, ctx, league)
+        wall_seconds = time.perf_counter() - started
+        write_seconds = db.WRITE_STATS.seconds - write_seconds
+        write_rows = db.WRITE_STATS.rows - write_rows
+        write_commits = db.WRITE_STATS.commits - write_commits
+        conn.close()
+
+    server.shutdown()
+    server.server_close()
+
+    requests_total = server.served + server.throttled + server.missing
+    print("")
+    print(f"Leagues:        {len(leagues)}")
+    print(f"Requests:       {requests_total} ({server.served} served, {server.throttled} throttled, {server.missing} missing)")
+    print(f"Wall time:      {wall_seconds:.2f}s")
+    print(f"Requests/sec:   {requests_total / wall_seconds if wall_seconds else 0:.2f}")
+    print(f"DB write time:  {write_seconds:.2f}s ({write_rows} rows, {write_commits} commits)")
+    print(f"Final rate:     {ctx.limiter.rate:.2f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from db import DB_PATH, connect_db, init_db, insert_raw_response
+from endpoints import classify_endpoint
+from rate_limit import get_limiter, get_with_retry
+from raw_store import BASE_DIR, load_raw_body, save_blob
+from reprocess import HANDLERS
+from response_formats import get_parsers
+from yahoo_client import with_format
+
+JSON_FORMAT = "json"
+DOCUMENT_PARSERS = {"games": "parse_games", "leagues": "parse_leagues"}
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures" / "responses"
+FIXTURE_MANIFEST = "responses.json"
+
+
+def _base_params(params):
+    if not params:
+        return None
+    parsed = json.loads(params)
+    parsed.pop("format", None)
+    return parsed or None
+
+
+def latest_responses(conn, response_format, kinds=None):
+    rows = conn.execute(
+        """
+        SELECT id, fetched_at, season, league_key, endpoint, params, endpoint_kind, week,
+               response_format, body_hash, file_path, body
+        FROM raw_responses
+        WHERE http_status = 200
+          AND endpoint_kind IS NOT NULL
+          AND response_format = ?
+        ORDER BY id
+        """,
+        (response_format,),
+    ).fetchall()
+    latest = {}
+    for row in rows:
+        if kinds and row["endpoint_kind"] not in kinds:
+            continue
+        latest[(row["endpoint"], json.dumps(_base_params(row["params"]), sort_keys=True))] = row
+    return latest
+
+
+def load_body(row, base_dir):
+    return load_raw_body(
+        row["body_hash"],
+        row["file_path"],
+        row["body"],
+        base_dir=base_dir,
+        response_format=row["response_format"],
+    )
+
+
+def derive(meta, data):
+    if data is None:
+        return None
+    parsers = get_parsers(meta["response_format"])
+    kind = meta["endpoint_kind"]
+    if kind in DOCUMENT_PARSERS:
+        return getattr(parsers, DOCUMENT_PARSERS[kind])(parsers.parse_document(data))
+    return HANDLERS[kind](meta, data)
+
+
+def archived_pairs(xml_rows, json_rows, base_dir):
+    for key, xml_row in xml_rows.items():
+        json_row = json_rows.get(key)
+        if json_row is None:
+            continue
+        yield xml_row["endpoint"], xml_row, load_body(xml_row, base_dir), json_row, load_body(json_row, base_dir)
+
+
+def load_manifest(fixtures_dir):
+    path = Path(fixtures_dir) / FIXTURE_MANIFEST
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def fixture_pairs(fixtures_dir, kinds):
+    for name, entry in sorted(load_manifest(fixtures_dir).items()):
+        kind, week = classify_endpoint(entry["endpoint"])
+        if kind not in kinds:
+            continue
+        metas = [
+            {**entry, "endpoint_kind": kind, "week": week, "response_format": response_format}
+            for response_format in ("xml", JSON_FORMAT)
+        ]
+        yield (
+            entry["endpoint"],
+            metas[0],
+            (Path(fixtures_dir) / f"{name}.xml").read_bytes(),
+            metas[1],
+            (Path(fixtures_dir) / f"{name}.json").read_bytes(),
+        )
+
+
+def record_fixtures(xml_rows, json_rows, limit, base_dir, fixtures_dir):
+    fixtures_dir = Path(fixtures_dir)
+    fixtures_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(fixtures_dir)
+    recorded = 0
+    for endpoint, xml_row, xml_data, json_row, json_data in archived_pairs(xml_rows, json_rows, base_dir):
+        if recorded >= limit:
+            break
+        name = f"{xml_row['endpoint_kind']}_{xml_row['id']}"
+        if name in manifest or xml_data is None or json_data is None:
+            continue
+        (fixtures_dir / f"{name}.xml").write_bytes(xml_data)
+        (fixtures_dir / f"{name}.json").write_bytes(json_data)
+        manifest[name] = {"endpoint": endpoint, "league_key": xml_row["league_key"], "season": xml_row["season"]}
+        recorded += 1
+    (fixtures_dir / FIXTURE_MANIFEST).write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    return recorded
+
+
+def first_difference(expected, actual):
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for table in sorted(set(expected) | set(actual)):
+            rows_a = expected.get(table, [])
+            rows_b = actual.get(table, [])
+            if rows_a != rows_b:
+                return f"{table}: {_row_difference(rows_a, rows_b)}"
+        return ""
+    return _row_difference(expected, actual)
+
+
+def _row_difference(rows_a, rows_b):
+    for row_a, row_b in zip(rows_a, rows_b):
+        if row_a != row_b:
+            return f"xml {row_a!r} != json {row_b!r}"
+    return f"{len(rows_a)} xml rows != {len(rows_b)} json rows"
+
+
+def fetch_json_counterparts(conn, missing, limit, base_dir):
+    limiter = get_limiter()
+    fetched = 0
+    for row in missing[:limit]:
+        params = with_format(_base_params(row["params"]), JSON_FORMAT)
+        response = get_with_retry(limiter, row["endpoint"], params=params)
+        body_hash = save_blob(base_dir, response.content, JSON_FORMAT)
+        record = (
+            time.strftime("%Y-%m-%d %H:%M:%S"),
+            row["season"],
+            row["league_key"],
+            row["endpoint"],
+            json.dumps(params, ensure_ascii=True),
+            response.status_code,
+            None,
+            None,
+            body_hash,
+        )
+        insert_raw_response(conn, record, JSON_FORMAT)
+        fetched += 1
+    conn.commit()
+    return fetched
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check that the JSON parsers produce the same rows as the XML parsers on archived pairs."
+    )
+    parser.add_argument("--db", default=str(DB_PATH))
+    parser.add_argument("--base-dir", default=str(BASE_DIR), help="Project root holding data/raw.")
+    parser.add_argument("--kind", dest="kinds", action="append", help="Endpoint kind to check (repeatable).")
+    parser.add_argument(
+        "--fetch",
+        type=int,
+        default=0,
+        metavar="N",
+        help="First fetch JSON copies of up to N archived XML responses that have none.",
+    )
+    parser.add_argument(
+        "--fixtures",
+        action="store_true",
+        help="Check the recorded pairs checked in under scripts/fixtures/responses instead of the database.",
+    )
+    parser.add_argument(
+        "--record",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Copy up to N archived XML/JSON pairs into the fixtures directory.",
+    )
+    parser.add_argument("--fixtures-dir", default=str(FIXTURES_DIR), help="Directory holding recorded fixture pairs.")
+    args = parser.parse_args()
+
+    kinds = set(args.kinds or []) or set(HANDLERS) | set(DOCUMENT_PARSERS)
+    if args.fixtures:
+        pairs = fixture_pairs(args.fixtures_dir, kinds)
+    else:
+        conn = connect_db(args.db)
+        init_db(conn)
+        xml_rows = latest_responses(conn, "xml", kinds)
+        json_rows = latest_responses(conn, JSON_FORMAT, kinds)
+        if args.fetch:
+            missing = [row for key, row in xml_rows.items() if key not in json_rows]
+            fetched = fetch_json_counterparts(conn, missing, args.fetch, args.base_dir)
+            print(f"Fetched JSON copies: {fetched}")
+            json_rows = latest_responses(conn, JSON_FORMAT, kinds)
+        conn.close()
+        if args.record:
+            recorded = record_fixtures(xml_rows, json_rows, args.record, args.base_dir, args.fixtures_dir)
+            print(f"Recorded fixture pairs: {recorded}")
+        pairs = archived_pairs(xml_rows, json_rows, args.base_dir)
+
+    matched = Counter()
+    failures = 0
+    for endpoint, xml_meta, xml_data, json_meta, json_data in pairs:
+        kind = xml_meta["endpoint_kind"]
+        try:
+            expected = derive(xml_meta, xml_data)
+            actual = derive(json_meta, json_data)
+        except (*get_parsers("xml").PARSE_ERRORS, *get_parsers(JSON_FORMAT).PARSE_ERRORS) as exc:
+            failures += 1
+            print(f"FAIL {kind} {endpoint}: {exc}")
+            continue
+        if expected == actual:
+            matched[kind] += 1
+            continue
+        failures += 1
+        print(f"FAIL {kind} {endpoint}: {first_difference(expected, actual)}")
+
+    if not matched and not failures:
+        print("No archived responses have both XML and JSON copies (use --fetch N or --fixtures).")
+        return
+    for kind, count in sorted(matched.items()):
+        print(f"ok   {kind}: {count} pairs")
+    if failures:
+        print(f"{failures} pairs differ between the XML and JSON parsers.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import argparse
+import re
+import sys
+
+from db import connect_db, init_db
+
+HOT_QUERIES = (
+    (
+        "teams by league",
+        "SELECT team_key, name, manager_names FROM teams WHERE league_key = ?",
+        ("L",),
+    ),
+    (
+        "matchups by league",
+        """
+        SELECT m.week, m.matchup_id, mt.team_key, mt.points
+        FROM matchups m
+        JOIN matchup_teams mt
+          ON m.league_key = mt.league_key
+         AND m.week = mt.week
+         AND m.matchup_id = mt.matchup_id
+        WHERE m.league_key = ?
+        """,
+        ("L",),
+    ),
+    (
+        "rosters with players",
+        """
+        SELECT r.team_key, r.week, r.player_key, p.name_full
+        FROM rosters r
+        JOIN players p ON p.player_key = r.player_key
+        WHERE r.league_key = ?
+        """,
+        ("L",),
+    ),
+    (
+        "roster player keys by week",
+        "SELECT DISTINCT player_key FROM rosters WHERE league_key = ? AND week = ?",
+        ("L", 1),
+    ),
+    (
+        "roster weeks by player",
+        "SELECT DISTINCT league_key, week FROM rosters WHERE player_key IN (?, ?)",
+        ("P1", "P2"),
+    ),
+    (
+        "transactions by league",
+        """
+        SELECT tp.transaction_key, tp.player_key, tp.transaction_type, t.type
+        FROM transaction_players tp
+        JOIN transactions t ON t.transaction_key = tp.transaction_key
+        WHERE t.league_key = ?
+        """,
+        ("L",),
+    ),
+    (
+        "player points by stat",
+        """
+        SELECT v.league_key, p.player_key, v.week, v.value
+        FROM stat_definitions d
+        JOIN player_stat_values v ON v.league_key = ? AND v.stat_id = d.stat_id
+        JOIN player_refs p ON p.player_ref = v.player_ref
+        WHERE d.stat_key = 'player_points' AND v.value IS NOT NULL
+        """,
+        ("L",),
+    ),
+    (
+        "fantasy points for league rosters",
+        """
+        SELECT roster_weeks.player_key, v.week, SUM(v.value * m.modifier)
+        FROM (
+            SELECT DISTINCT r.week, r.player_key, p.player_ref
+            FROM rosters r
+            JOIN player_refs p ON p.player_key = r.player_key
+            WHERE r.league_key = ?
+        ) roster_weeks
+        JOIN player_week_stat_values v
+          ON v.game_key = ?
+         AND v.player_ref = roster_weeks.player_ref
+         AND v.week = roster_weeks.week
+        JOIN league_stat_modifiers m ON m.league_key = ? AND m.stat_id = v.stat_id
+        WHERE v.value IS NOT NULL
+        GROUP BY roster_weeks.player_key, v.week
+        """,
+        ("L", "G", "L"),
+    ),
+    (
+        "player week points by league",
+        "SELECT player_key, week, points FROM player_week_points WHERE league_key = ?",
+        ("L",),
+    ),
+    (
+        "player week ranks by league",
+        """
+        SELECT player_key, week, RANK() OVER (PARTITION BY week ORDER BY points DESC)
+        FROM player_week_points
+        WHERE league_key = ?
+        """,
+        ("L",),
+    ),
+    (
+        "player season totals by league",
+        """
+        SELECT player_key, SUM(points), ROW_NUMBER() OVER (ORDER BY SUM(points) DESC, player_key)
+        FROM player_week_points
+        WHERE league_key = ?
+        GROUP BY player_key
+        """,
+        ("L",),
+    ),
+    (
+        "dirty inputs by league",
+        "SELECT table_name, week, changes FROM dirty WHERE league_key = ? ORDER BY table_name, week",
+        ("L",),
+    ),
+    (
+        "stored player weeks",
+        """
+        SELECT DISTINCT p.player_key
+        FROM player_week_stat_values v
+        JOIN player_refs p ON p.player_ref = v.player_ref
+        WHERE v.game_key = ? AND v.week = ?
+        """,
+        ("G", 1),
+    ),
+    (
+        "raw responses by kind",
+        "SELECT id, league_key, week, file_path FROM raw_responses WHERE endpoint_kind = ? AND http_status = 200",
+        ("roster",),
+    ),
+    (
+        "latest settings per league",
+        """
+        SELECT r.id, r.league_key
+        FROM raw_responses r
+        JOIN (
+            SELECT league_key, MAX(id) AS max_id
+            FROM raw_responses
+            WHERE endpoint_kind = 'settings'
+              AND league_key IS NOT NULL
+              AND http_status = 200
+            GROUP BY league_key
+        ) latest
+          ON latest.max_id = r.id
+        """,
+        (),
+    ),
+    (
+        "parse cache lookup",
+        """
+        SELECT rows FROM parse_cache
+        WHERE body_hash = ? AND parser = ? AND league_key = ? AND week = ? AND parser_version = ?
+        """,
+        ("h", "stream_roster", "L", 1, 1),
+    ),
+    (
+        "sync state by league",
+        "SELECT week FROM sync_state WHERE league_key = ? AND endpoint_kind = ? AND status = 'complete'",
+        ("L", "rosters"),
+    ),
+    (
+        "roster players missing weekly stats",
+        """
+        SELECT r.week, r.team_key, r.player_key
+        FROM rosters r
+        LEFT JOIN player_refs p ON p.player_key = r.player_key
+        WHERE r.league_key = ?
+          AND NOT EXISTS (
+              SELECT 1 FROM player_week_stat_values s
+              WHERE s.game_key = ? AND s.player_ref = p.player_ref AND s.week = r.week
+          )
+        """,
+        ("L", "G"),
+    ),
+    (
+        "team stats through the compatibility view",
+        "SELECT team_key, week, stat_id, value FROM team_stats WHERE league_key = ?",
+        ("L",),
+    ),
+    (
+        "stored team weeks",
+        "SELECT DISTINCT week, team_key FROM team_stats WHERE league_key = ?",
+        ("L",),
+    ),
+)
+
+ALLOWED_SCANS = {"latest", "roster_weeks"}
+SCAN_PATTERN = re.compile(r"^SCAN (\w+)")
+
+
+def query_plan(conn, sql, params):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def find_scans(plan):
+    scans = []
+    for detail in plan:
+        match = SCAN_PATTERN.match(detail)
+        if match and match.group(1) not in ALLOWED_SCANS:
+            scans.append(detail)
+    return scans
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fail if a hot query falls back to a full table scan."
+    )
+    parser.add_argument("--db", default=":memory:", help="Database to check (defaults to a fresh schema).")
+    parser.add_argument("--verbose", action="store_true", help="Print every query plan.")
+    args = parser.parse_args()
+
+    conn = connect_db(args.db)
+    init_db(conn)
+
+    failures = 0
+    for name, sql, params in HOT_QUERIES:
+        plan = query_plan(conn, sql, params)
+        scans = find_scans(plan)
+        if scans:
+            failures += 1
+            print(f"FAIL {name}: {'; '.join(scans)}")
+        else:
+            print(f"ok   {name}")
+        if args.verbose or scans:
+            for detail in plan:
+                print(f"       {detail}")
+    conn.close()
+
+    if failures:
+        print(f"{failures} hot queries scan a table.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,138 @@
 import json
 import sqlite3
+import time
+from contextlib import contextmanager
+from itertools import chain
 from pathlib import Path
 
+from endpoints import classify_endpoint
+from player_points import mark_stale, parse_stat_modifiers, refresh_player_week_points
+
 BASE_DIR = Path(__file__).resolve().parents[1]
 DB_PATH = BASE_DIR / "data" / "processed" / "fantasy_insights.sqlite"
 
+BATCH_MAX_ROWS = 20000
+BATCH_MAX_SECONDS = 10.0
+KEY_LOOKUP_CHUNK = 500
+
+KEY_TABLES = {
+    "player_key": ("player_refs", "player_ref", "player_key"),
+    "team_key": ("team_refs", "team_ref", "team_key"),
+    "stat_id": ("stat_definitions", "stat_id", "stat_key"),
+}
+STAT_TABLES = {
+    "team_stats": ("team_stat_values", ("league_key", "team_ref", "week", "stat_id", "value")),
+    "player_stats": ("player_stat_values", ("league_key", "player_ref", "week", "stat_id", "value")),
+    "player_week_stats": ("player_week_stat_values", ("game_key", "player_ref", "week", "stat_id", "value")),
+}
+DIRTY_TABLES = {
+    "leagues": ("leagues", "league_key", None),
+    "league_settings": ("league_settings", "league_key", None),
+    "teams": ("teams", "league_key", None),
+    "standings": ("standings", "league_key", None),
+    "matchups": ("matchups", "league_key", "week"),
+    "matchup_teams": ("matchup_teams", "league_key", "week"),
+    "rosters": ("rosters", "league_key", "week"),
+    "draft_results": ("draft_results", "league_key", None),
+    "transactions": ("transactions", "league_key", None),
+    "transaction_players": ("transaction_players", "transaction_key", None),
+    "team_stat_values": ("team_stats", "league_key", "week"),
+    "player_stat_values": ("player_stats", "league_key", "week"),
+    "player_week_stat_values": ("player_week_stats", "game_key", "week"),
+    "players": ("players", "player_key", None),
+}
+POINTS_INPUT_TABLES = {"rosters", "player_stats", "player_week_stats", "league_settings", "league_stat_modifiers"}
+
+
+class WriteStats:
+    def __init__(self):
+        self.seconds = 0.0
+        self.rows = 0
+        self.commits = 0
+
+
+WRITE_STATS = WriteStats()
+
+
+class Connection(sqlite3.Connection):
+    write_batch = None
+    key_refs = None
+    upsert_sql = None
+
+
+class WriteBatch:
+    def __init__(self, conn, max_rows=BATCH_MAX_ROWS, max_seconds=BATCH_MAX_SECONDS):
+        self.conn = conn
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.pending = {}
+        self.row_count = 0
+        self.started_at = time.monotonic()
+        self.points_stale = False
+
+    def add(self, table, columns, rows):
+        self.pending.setdefault((table, tuple(columns)), []).append(rows)
+        self.row_count += len(rows)
+        if self.row_count >= self.max_rows or time.monotonic() - self.started_at >= self.max_seconds:
+            self.flush()
 
-def connect_db():
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+    def flush(self):
+        if self.pending:
+            started = time.perf_counter()
+            for (table, columns), chunks in self.pending.items():
+                if _execute_upsert(self.conn, table, columns, chain.from_iterable(chunks)):
+                    self.points_stale = True
+            self.conn.commit()
+            WRITE_STATS.seconds += time.perf_counter() - started
+            WRITE_STATS.rows += self.row_count
+            WRITE_STATS.commits += 1
+        self.pending = {}
+        self.row_count = 0
+        self.started_at = time.monotonic()
+
+
+def connect_db(path=None, check_same_thread=True):
+    path = Path(path or DB_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, factory=Connection, check_same_thread=check_same_thread)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
     return conn
 
 
+@contextmanager
+def write_batch(conn, max_rows=BATCH_MAX_ROWS, max_seconds=BATCH_MAX_SECONDS):
+    batch = getattr(conn, "write_batch", None)
+    if batch is not None:
+        yield batch
+        batch.flush()
+        return
+
+    batch = WriteBatch(conn, max_rows=max_rows, max_seconds=max_seconds)
+    conn.write_batch = batch
+    try:
+        yield batch
+    except sqlite3.Error:
+        batch.pending = {}
+        batch.row_count = 0
+        conn.rollback()
+        _reset_caches(conn)
+        raise
+    finally:
+        conn.write_batch = None
+        batch.flush()
+    if batch.points_stale:
+        refresh_player_week_points(conn, on_change=_points_changed)
+
+
+def checkpoint(conn):
+    batch = getattr(conn, "write_batch", None)
+    if batch is not None:
+        batch.flush()
+
+
 def _ensure_column(conn, table, column, definition):
     existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
     if column in existing:
@@ -21,8 +140,9 @@ def _ensure_column(conn, table, column, definition):
     conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
 
 
-def init_db(conn):
-    conn.executescript(
+def _migrate_base_schema(conn):
+    _execute_script(
+        conn,
         """
         CREATE TABLE IF NOT EXISTS raw_responses (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -167,26 +287,663 @@ def init_db(conn):
             destination_team_key TEXT,
             PRIMARY KEY (transaction_key, player_key, transaction_type, source_team_key, destination_team_key)
         );
+
+        CREATE TABLE IF NOT EXISTS sync_state (
+            league_key TEXT,
+            week INTEGER,
+            endpoint_kind TEXT,
+            status TEXT,
+            updated_at TEXT,
+            PRIMARY KEY (league_key, week, endpoint_kind)
+        );
         """
     )
     _ensure_column(conn, "league_settings", "stat_modifiers", "TEXT")
     _ensure_column(conn, "rosters", "status", "TEXT")
     _ensure_column(conn, "rosters", "injury_status", "TEXT")
     _ensure_column(conn, "rosters", "injury_note", "TEXT")
-    conn.commit()
+
+
+def _migrate_raw_response_kinds(conn):
+    _ensure_column(conn, "raw_responses", "endpoint_kind", "TEXT")
+    _ensure_column(conn, "raw_responses", "week", "INTEGER")
+    rows = conn.execute("SELECT id, endpoint FROM raw_responses").fetchall()
+    updates = [(*classify_endpoint(row[1]), row[0]) for row in rows]
+    conn.executemany("UPDATE raw_responses SET endpoint_kind = ?, week = ? WHERE id = ?", updates)
+
+
+def _migrate_hot_path_indexes(conn):
+    _execute_script(
+        conn,
+        """
+        CREATE INDEX IF NOT EXISTS idx_raw_responses_kind
+            ON raw_responses (endpoint_kind, http_status, league_key, week);
+        CREATE INDEX IF NOT EXISTS idx_teams_league
+            ON teams (league_key);
+        CREATE INDEX IF NOT EXISTS idx_transactions_league
+            ON transactions (league_key, transaction_key, type);
+        CREATE INDEX IF NOT EXISTS idx_rosters_league_week
+            ON rosters (league_key, week, player_key);
+        CREATE INDEX IF NOT EXISTS idx_player_stats_league_stat
+            ON player_stats (league_key, stat_id, player_key, week, value);
+        """
+    )
+
+
+def _migrate_raw_body_hash(conn):
+    _ensure_column(conn, "raw_responses", "body_hash", "TEXT")
+    _execute_script(
+        conn,
+        """
+        CREATE INDEX IF NOT EXISTS idx_raw_responses_body_hash
+            ON raw_responses (body_hash);
+        CREATE INDEX IF NOT EXISTS idx_raw_responses_endpoint
+            ON raw_responses (endpoint, params, id);
+        """
+    )
+
+
+def _migrate_parse_cache(conn):
+    _execute_script(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS parse_cache (
+            body_hash TEXT NOT NULL,
+            parser TEXT NOT NULL,
+            league_key TEXT NOT NULL,
+            week INTEGER NOT NULL DEFAULT 0,
+            parser_version INTEGER NOT NULL,
+            rows BLOB NOT NULL,
+            PRIMARY KEY (body_hash, parser, league_key, week)
+        );
+        """
+    )
+
+
+def _migrate_response_format(conn):
+    _ensure_column(conn, "raw_responses", "response_format", "TEXT NOT NULL DEFAULT 'xml'")
+
+
+def _migrate_player_week_stats(conn):
+    _execute_script(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS player_week_stats (
+            game_key TEXT NOT NULL,
+            player_key TEXT NOT NULL,
+            week INTEGER NOT NULL,
+            stat_id TEXT NOT NULL,
+            value TEXT,
+            PRIMARY KEY (game_key, player_key, week, stat_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_player_week_stats_week
+            ON player_week_stats (game_key, week, player_key);
+
+        INSERT OR IGNORE INTO player_week_stats (game_key, player_key, week, stat_id, value)
+        SELECT substr(league_key, 1, instr(league_key, '.l.') - 1), player_key, week, stat_id, value
+        FROM player_stats
+        WHERE stat_id != 'player_points'
+          AND instr(league_key, '.l.') > 0;
+
+        DELETE FROM player_stats
+        WHERE stat_id != 'player_points'
+          AND instr(league_key, '.l.') > 0;
+        """
+    )
+
+
+def _migrate_sync_units(conn):
+    _execute_script(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS sync_runs (
+            run_id INTEGER PRIMARY KEY,
+            mode TEXT,
+            started_at TEXT,
+            finished_at TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS sync_units (
+            run_id INTEGER NOT NULL,
+            league_key TEXT NOT NULL,
+            phase TEXT NOT NULL,
+            week INTEGER NOT NULL DEFAULT 0,
+            unit TEXT NOT NULL DEFAULT '',
+            completed_at TEXT,
+            PRIMARY KEY (run_id, league_key, phase, week, unit)
+        );
+        """
+    )
+
+
+LEGACY_STAT_COPIES = {
+    "team_stats": """
+        INSERT OR REPLACE INTO team_stat_values (league_key, team_ref, week, stat_id, value)
+        SELECT s.league_key, t.team_ref, s.week, d.stat_id, to_real(s.value)
+        FROM team_stats s
+        JOIN team_refs t ON t.team_key = s.team_key
+        JOIN stat_definitions d ON d.stat_key = s.stat_id
+        WHERE s.league_key IS NOT NULL AND s.week IS NOT NULL
+    """,
+    "player_stats": """
+        INSERT OR REPLACE INTO player_stat_values (league_key, player_ref, week, stat_id, value)
+        SELECT s.league_key, p.player_ref, s.week, d.stat_id, to_real(s.value)
+        FROM player_stats s
+        JOIN player_refs p ON p.player_key = s.player_key
+        JOIN stat_definitions d ON d.stat_key = s.stat_id
+        WHERE s.league_key IS NOT NULL AND s.week IS NOT NULL
+    """,
+    "player_week_stats": """
+        INSERT OR REPLACE INTO player_week_stat_values (game_key, player_ref, week, stat_id, value)
+        SELECT s.game_key, p.player_ref, s.week, d.stat_id, to_real(s.value)
+        FROM player_week_stats s
+        JOIN player_refs p ON p.player_key = s.player_key
+        JOIN stat_definitions d ON d.stat_key = s.stat_id
+    """,
+}
+
+
+def _migrate_typed_stats(conn):
+    conn.create_function("to_real", 1, to_real, deterministic=True)
+    _execute_script(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS stat_definitions (
+            stat_id INTEGER PRIMARY KEY,
+            stat_key TEXT NOT NULL UNIQUE,
+            name TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS player_refs (
+            player_ref INTEGER PRIMARY KEY,
+            player_key TEXT NOT NULL UNIQUE
+        );
+
+        CREATE TABLE IF NOT EXISTS team_refs (
+            team_ref INTEGER PRIMARY KEY,
+            team_key TEXT NOT NULL UNIQUE
+        );
+
+        CREATE TABLE IF NOT EXISTS team_stat_values (
+            league_key TEXT NOT NULL,
+            team_ref INTEGER NOT NULL,
+            week INTEGER NOT NULL,
+            stat_id INTEGER NOT NULL,
+            value REAL,
+            PRIMARY KEY (league_key, team_ref, week, stat_id)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS player_stat_values (
+            league_key TEXT NOT NULL,
+            player_ref INTEGER NOT NULL,
+            week INTEGER NOT NULL,
+            stat_id INTEGER NOT NULL,
+            value REAL,
+            PRIMARY KEY (league_key, player_ref, week, stat_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_player_stat_values_stat
+            ON player_stat_values (league_key, stat_id, player_ref, week, value);
+
+        CREATE TABLE IF NOT EXISTS player_week_stat_values (
+            game_key TEXT NOT NULL,
+            player_ref INTEGER NOT NULL,
+            week INTEGER NOT NULL,
+            stat_id INTEGER NOT NULL,
+            value REAL,
+            PRIMARY KEY (game_key, player_ref, week, stat_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_player_week_stat_values_week
+            ON player_week_stat_values (game_key, week, player_ref);
+        """,
+    )
+    legacy = [
+        row[0]
+        for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('team_stats', 'player_stats', 'player_week_stats')"
+        )
+    ]
+    entity_keys = {"team_stats": ("team_refs", "team_key"), "player_stats": ("player_refs", "player_key"), "player_week_stats": ("player_refs", "player_key")}
+    for table in legacy:
+        conn.execute(f"INSERT OR IGNORE INTO stat_definitions (stat_key) SELECT DISTINCT stat_id FROM {table} WHERE stat_id IS NOT NULL")
+        ref_table, key_column = entity_keys[table]
+        conn.execute(
+            f"INSERT OR IGNORE INTO {ref_table} ({key_column}) SELECT DISTINCT {key_column} FROM {table} WHERE {key_column} IS NOT NULL"
+        )
+    for table in legacy:
+        conn.execute(LEGACY_STAT_COPIES[table])
+    for table in legacy:
+        conn.execute(f"DROP TABLE {table}")
+    _execute_script(
+        conn,
+        """
+        CREATE VIEW IF NOT EXISTS team_stats AS
+        SELECT v.league_key, t.team_key, v.week, d.stat_key AS stat_id, v.value
+        FROM team_stat_values v
+        JOIN team_refs t ON t.team_ref = v.team_ref
+        JOIN stat_definitions d ON d.stat_id = v.stat_id;
+
+        CREATE VIEW IF NOT EXISTS player_stats AS
+        SELECT v.league_key, p.player_key, v.week, d.stat_key AS stat_id, v.value
+        FROM player_stat_values v
+        JOIN player_refs p ON p.player_ref = v.player_ref
+        JOIN stat_definitions d ON d.stat_id = v.stat_id;
+
+        CREATE VIEW IF NOT EXISTS player_week_stats AS
+        SELECT v.game_key, p.player_key, v.week, d.stat_key AS stat_id, v.value
+        FROM player_week_stat_values v
+        JOIN player_refs p ON p.player_ref = v.player_ref
+        JOIN stat_definitions d ON d.stat_id = v.stat_id;
+
+        CREATE TRIGGER IF NOT EXISTS team_stats_delete INSTEAD OF DELETE ON team_stats
+        BEGIN
+            DELETE FROM team_stat_values
+            WHERE league_key = OLD.league_key
+              AND team_ref = (SELECT team_ref FROM team_refs WHERE team_key = OLD.team_key)
+              AND week = OLD.week
+              AND stat_id = (SELECT stat_id FROM stat_definitions WHERE stat_key = OLD.stat_id);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS player_stats_delete INSTEAD OF DELETE ON player_stats
+        BEGIN
+            DELETE FROM player_stat_values
+            WHERE league_key = OLD.league_key
+              AND player_ref = (SELECT player_ref FROM player_refs WHERE player_key = OLD.player_key)
+              AND week = OLD.week
+              AND stat_id = (SELECT stat_id FROM stat_definitions WHERE stat_key = OLD.stat_id);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS player_week_stats_delete INSTEAD OF DELETE ON player_week_stats
+        BEGIN
+            DELETE FROM player_week_stat_values
+            WHERE game_key = OLD.game_key
+              AND player_ref = (SELECT player_ref FROM player_refs WHERE player_key = OLD.player_key)
+              AND week = OLD.week
+              AND stat_id = (SELECT stat_id FROM stat_definitions WHERE stat_key = OLD.stat_id);
+        END;
+        """,
+    )
+    for row in conn.execute("SELECT stat_categories FROM league_settings").fetchall():
+        record_stat_names(conn, row[0])
+
+
+def _migrate_player_week_points(conn):
+    _execute_script(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS player_week_points (
+            league_key TEXT NOT NULL,
+            player_key TEXT NOT NULL,
+            week INTEGER NOT NULL,
+            points REAL,
+            source TEXT,
+            PRIMARY KEY (league_key, player_key, week)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS player_week_points_stale (
+            league_key TEXT PRIMARY KEY
+        ) WITHOUT ROWID;
+
+        INSERT OR IGNORE INTO player_week_points_stale (league_key)
+        SELECT league_key FROM leagues
+        UNION SELECT league_key FROM league_settings
+        UNION SELECT DISTINCT league_key FROM rosters;
+        """
+    )
+
+
+def _migrate_league_stat_modifiers(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS league_stat_modifiers (
+            league_key TEXT NOT NULL,
+            stat_id INTEGER NOT NULL,
+            modifier REAL NOT NULL,
+            PRIMARY KEY (league_key, stat_id)
+        ) WITHOUT ROWID
+        """
+    )
+    for row in conn.execute("SELECT league_key, stat_modifiers FROM league_settings").fetchall():
+        record_stat_modifiers(conn, row[0], row[1], track=False)
+    conn.execute("INSERT OR IGNORE INTO player_week_points_stale (league_key) SELECT league_key FROM league_settings")
+
+
+def _migrate_dirty(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS dirty (
+            league_key TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            week INTEGER NOT NULL,
+            changes INTEGER NOT NULL,
+            changed_at TEXT,
+            PRIMARY KEY (league_key, table_name, week)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def _migrate_abandoned_runs(conn):
+    _ensure_column(conn, "sync_runs", "abandoned_at", "TEXT")
+    conn.execute(
+        """
+        UPDATE sync_runs SET abandoned_at = ?
+        WHERE finished_at IS NULL
+          AND run_id < (SELECT MAX(run_id) FROM sync_runs)
+        """,
+        (time.strftime("%Y-%m-%d %H:%M:%S"),),
+    )
+    conn.execute(
+        "DELETE FROM sync_units WHERE run_id IN (SELECT run_id FROM sync_runs WHERE finished_at IS NOT NULL OR abandoned_at IS NOT NULL)"
+    )
+
+
+def _migrate_seed_sync_state(conn):
+    now = time.strftime("%Y-%m-%d %H:%M:%S")
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO sync_state (league_key, week, endpoint_kind, status, updated_at)
+        SELECT league_key, week, 'scoreboard', 'complete', ?
+        FROM matchups
+        GROUP BY league_key, week
+        HAVING MIN(status = 'postevent') = 1
+        """,
+        (now,),
+    )
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO sync_state (league_key, week, endpoint_kind, status, updated_at)
+        SELECT s.league_key, s.week, 'rosters', 'complete', ?
+        FROM sync_state s
+        WHERE s.endpoint_kind = 'scoreboard'
+          AND s.status = 'complete'
+          AND EXISTS (SELECT 1 FROM rosters r WHERE r.league_key = s.league_key AND r.week = s.week)
+        """,
+        (now,),
+    )
+
+
+def _migrate_player_points_only(conn):
+    _execute_script(
+        conn,
+        """
+        INSERT OR IGNORE INTO player_week_stat_values (game_key, player_ref, week, stat_id, value)
+        SELECT substr(v.league_key, 1, instr(v.league_key, '.l.') - 1), v.player_ref, v.week, v.stat_id, v.value
+        FROM player_stat_values v
+        JOIN stat_definitions d ON d.stat_id = v.stat_id
+        WHERE d.stat_key != 'player_points'
+          AND instr(v.league_key, '.l.') > 0;
+
+        DELETE FROM player_stat_values
+        WHERE stat_id IN (SELECT stat_id FROM stat_definitions WHERE stat_key != 'player_points');
+        """,
+    )
+
+
+def _migrate_rosters_by_player(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_rosters_player ON rosters (player_key, league_key, week)")
+
+
+MIGRATIONS = (
+    (1, _migrate_base_schema),
+    (2, _migrate_raw_response_kinds),
+    (3, _migrate_hot_path_indexes),
+    (4, _migrate_raw_body_hash),
+    (5, _migrate_parse_cache),
+    (6, _migrate_response_format),
+    (7, _migrate_player_week_stats),
+    (8, _migrate_sync_units),
+    (9, _migrate_typed_stats),
+    (10, _migrate_player_week_points),
+    (11, _migrate_league_stat_modifiers),
+    (12, _migrate_dirty),
+    (13, _migrate_abandoned_runs),
+    (14, _migrate_seed_sync_state),
+    (15, _migrate_player_points_only),
+    (16, _migrate_rosters_by_player),
+)
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def _execute_script(conn, script):
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ""
+    if statement.strip():
+        conn.execute(statement)
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    version = schema_version(conn)
+    for target, migration in MIGRATIONS:
+        if target <= version:
+            continue
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN")
+        try:
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            _reset_caches(conn)
+            raise
+        version = target
+    return version
+
+
+def init_db(conn):
+    migrate(conn)
+    refresh_player_week_points(conn, on_change=_points_changed)
+
+
+def _connection_cache(conn, name):
+    cache = getattr(conn, name, None)
+    if cache is None:
+        cache = {}
+        if isinstance(conn, Connection):
+            setattr(conn, name, cache)
+    return cache
+
+
+def _reset_caches(conn):
+    if isinstance(conn, Connection):
+        conn.key_refs = None
+        conn.upsert_sql = None
+
+
+def primary_key(conn, table):
+    rows = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    return [row[1] for row in sorted(rows, key=lambda row: row[5]) if row[5]]
+
+
+def upsert_sql(conn, table, columns):
+    cache = _connection_cache(conn, "upsert_sql")
+    sql = cache.get((table, columns))
+    if sql is not None:
+        return sql
+    sql = f"INSERT INTO {table} ({','.join(columns)}) VALUES ({','.join('?' for _ in columns)})"
+    key = primary_key(conn, table)
+    if key and set(key) <= set(columns):
+        values = [column for column in columns if column not in key]
+        if values:
+            assignments = ", ".join(f"{column} = excluded.{column}" for column in values)
+            changed = " OR ".join(f"{table}.{column} IS NOT excluded.{column}" for column in values)
+            sql += f" ON CONFLICT ({','.join(key)}) DO UPDATE SET {assignments} WHERE {changed}"
+        else:
+            sql += f" ON CONFLICT ({','.join(key)}) DO NOTHING"
+    cache[(table, columns)] = sql
+    return sql
+
+
+def game_leagues(conn, game_key):
+    rows = conn.execute(
+        """
+        SELECT league_key FROM leagues WHERE game_key = ? OR league_key LIKE ? || '.l.%'
+        UNION
+        SELECT league_key FROM league_settings WHERE league_key LIKE ? || '.l.%'
+        """,
+        (game_key, game_key, game_key),
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def roster_weeks(conn, player_keys):
+    weeks = []
+    for idx in range(0, len(player_keys), KEY_LOOKUP_CHUNK):
+        chunk = player_keys[idx : idx + KEY_LOOKUP_CHUNK]
+        placeholders = ",".join("?" for _ in chunk)
+        rows = conn.execute(f"SELECT DISTINCT league_key, week FROM rosters WHERE player_key IN ({placeholders})", chunk)
+        weeks.extend((row[0], row[1]) for row in rows)
+    return weeks
+
+
+def _points_changed(conn, league_key):
+    record_dirty(conn, "player_week_points", [(league_key, 0)])
+
+
+def record_dirty(conn, table, changed):
+    if table == "player_week_stats":
+        changed = [(league_key, week) for game_key, week in changed for league_key in game_leagues(conn, game_key)]
+    elif table == "transaction_players":
+        changed = [(transaction_key.split(".tr.")[0], week) for transaction_key, week in changed]
+    elif table == "players":
+        changed = roster_weeks(conn, [player_key for player_key, _week in changed])
+    if not changed:
+        return False
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    conn.executemany(
+        """
+        INSERT INTO dirty (league_key, table_name, week, changes, changed_at) VALUES (?, ?, ?, 1, ?)
+        ON CONFLICT (league_key, table_name, week) DO UPDATE SET changes = changes + 1, changed_at = excluded.changed_at
+        """,
+        [(league_key, table, week, stamp) for league_key, week in dict.fromkeys(changed)],
+    )
+    if table in POINTS_INPUT_TABLES:
+        mark_stale(conn, {league_key for league_key, _week in changed})
+        return True
+    return False
+
+
+def _execute_upsert(conn, table, columns, rows):
+    columns = tuple(columns)
+    sql = upsert_sql(conn, table, columns)
+    tracked = DIRTY_TABLES.get(table)
+    if tracked is None or tracked[1] not in columns:
+        conn.executemany(sql, rows)
+        return False
+    name, key_column, week_column = tracked
+    key_index = columns.index(key_column)
+    week_index = columns.index(week_column) if week_column in columns else None
+    groups = {}
+    for row in rows:
+        groups.setdefault((row[key_index], row[week_index] if week_index is not None else 0), []).append(row)
+    changed = []
+    for group, group_rows in groups.items():
+        before = conn.total_changes
+        conn.executemany(sql, group_rows)
+        if conn.total_changes != before:
+            changed.append(group)
+    return record_dirty(conn, name, changed)
+
+
+def to_real(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def key_refs(conn, column, keys, create=True):
+    table, ref_column, key_column = KEY_TABLES[column]
+    cache = _connection_cache(conn, "key_refs").setdefault(column, {})
+    missing = sorted({key for key in keys if key is not None and key not in cache})
+    if missing and create:
+        conn.executemany(f"INSERT OR IGNORE INTO {table} ({key_column}) VALUES (?)", [(key,) for key in missing])
+    for idx in range(0, len(missing), KEY_LOOKUP_CHUNK):
+        chunk = missing[idx : idx + KEY_LOOKUP_CHUNK]
+        placeholders = ",".join("?" for _ in chunk)
+        rows = conn.execute(f"SELECT {key_column}, {ref_column} FROM {table} WHERE {key_column} IN ({placeholders})", chunk)
+        cache.update((row[0], row[1]) for row in rows)
+    return cache
+
+
+def record_stat_names(conn, stat_categories):
+    try:
+        categories = json.loads(stat_categories or "[]")
+    except json.JSONDecodeError:
+        return
+    names = {item.get("stat_id"): item.get("name") for item in categories if item.get("stat_id") and item.get("name")}
+    if not names:
+        return
+    key_refs(conn, "stat_id", names)
+    conn.executemany(
+        "UPDATE stat_definitions SET name = ? WHERE stat_key = ? AND name IS NOT ?",
+        [(name, stat_key, name) for stat_key, name in names.items()],
+    )
+
+
+def record_stat_modifiers(conn, league_key, stat_modifiers, track=True):
+    modifiers = parse_stat_modifiers(stat_modifiers)
+    stat_refs = key_refs(conn, "stat_id", modifiers)
+    rows = [(league_key, stat_refs[stat_key], modifier) for stat_key, modifier in modifiers.items()]
+    stored = {row[0] for row in conn.execute("SELECT stat_id FROM league_stat_modifiers WHERE league_key = ?", (league_key,))}
+    before = conn.total_changes
+    conn.executemany(
+        "DELETE FROM league_stat_modifiers WHERE league_key = ? AND stat_id = ?",
+        [(league_key, stat_id) for stat_id in stored - {row[1] for row in rows}],
+    )
+    conn.executemany(upsert_sql(conn, "league_stat_modifiers", ("league_key", "stat_id", "modifier")), rows)
+    if track and conn.total_changes != before:
+        record_dirty(conn, "league_stat_modifiers", [(league_key, 0)])
+
+
+def compact_stat_rows(conn, table, rows):
+    physical_table, columns = STAT_TABLES[table]
+    entity_refs = key_refs(conn, "team_key" if table == "team_stats" else "player_key", {row[1] for row in rows})
+    stat_refs = key_refs(conn, "stat_id", {row[3] for row in rows})
+    compact = [
+        (row[0], entity_refs[row[1]], row[2], stat_refs[row[3]], to_real(row[4]))
+        for row in rows
+        if row[1] in entity_refs and row[3] in stat_refs
+    ]
+    return physical_table, columns, compact
 
 
 def upsert_many(conn, table, columns, rows):
     if not rows:
         return
-    placeholders = ",".join("?" for _ in columns)
-    cols = ",".join(columns)
-    sql = f"INSERT OR REPLACE INTO {table} ({cols}) VALUES ({placeholders})"
-    conn.executemany(sql, rows)
+    if table in STAT_TABLES:
+        table, columns, rows = compact_stat_rows(conn, table, rows)
+    elif table == "league_settings":
+        columns = list(columns)
+        for row in rows:
+            if "stat_categories" in columns:
+                record_stat_names(conn, row[columns.index("stat_categories")])
+            if "stat_modifiers" in columns:
+                record_stat_modifiers(conn, row[columns.index("league_key")], row[columns.index("stat_modifiers")])
+    batch = getattr(conn, "write_batch", None)
+    if batch is not None:
+        batch.add(table, columns, rows)
+        return
+    started = time.perf_counter()
+    stale = _execute_upsert(conn, table, columns, rows)
     conn.commit()
+    WRITE_STATS.seconds += time.perf_counter() - started
+    WRITE_STATS.rows += len(rows)
+    WRITE_STATS.commits += 1
+    if stale:
+        refresh_player_week_points(conn, on_change=_points_changed)
 
 
-def insert_raw_response(conn, record):
+def insert_raw_response(conn, record, response_format="xml"):
     columns = (
         "fetched_at",
         "season",
@@ -196,8 +953,12 @@ def insert_raw_response(conn, record):
         "http_status",
         "file_path",
         "body",
+        "body_hash",
+        "endpoint_kind",
+        "week",
+        "response_format",
     )
-    upsert_many(conn, "raw_responses", columns, [record])
+    upsert_many(conn, "raw_responses", columns, [(*record, *classify_endpoint(record[3]), response_format)])
 
 
 def to_json(value):
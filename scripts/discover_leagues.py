@@ -1,13 +1,20 @@
 import json
 from pathlib import Path
 
-from yahoo_client import api_get, load_config, parse_xml
+from yahoo_client import load_config, parse_xml
 from parse_yahoo_xml import parse_games, parse_leagues
+from rate_limit import get_limiter, get_with_retry
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 OUTPUT_DIR = BASE_DIR / "data" / "processed"
 
 
+def api_get(path):
+    response = get_with_retry(get_limiter(), path)
+    response.raise_for_status()
+    return response.content
+
+
 def main():
     config = load_config()
     game_code = str(config.get("game_key", "nfl"))
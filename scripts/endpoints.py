@@ -0,0 +1,30 @@
+import re
+
+ENDPOINT_PATTERNS = (
+    ("games", re.compile(r"^/users;use_login=1/games$")),
+    ("leagues", re.compile(r"^/users;use_login=1/games;game_keys=[^/]+/leagues$")),
+    ("league", re.compile(r"^/league/[^/]+$")),
+    ("settings", re.compile(r"^/league/[^/]+/settings$")),
+    ("teams", re.compile(r"^/league/[^/]+/teams$")),
+    ("standings", re.compile(r"^/league/[^/]+/standings$")),
+    ("draftresults", re.compile(r"^/league/[^/]+/draftresults$")),
+    ("scoreboard", re.compile(r"^/league/[^/]+/scoreboard;week=(?P<week>\d+)$")),
+    (
+        "roster_stats",
+        re.compile(r"^/(?:team/[^/]+|league/[^/]+/teams)/roster;week=(?P<week>\d+)/players/stats;type=week;week=\d+$"),
+    ),
+    ("roster", re.compile(r"^/(?:team/[^/]+|league/[^/]+/teams)/roster;week=(?P<week>\d+)$")),
+    ("team_stats", re.compile(r"^/(?:team/[^/]+|league/[^/]+/teams)/stats;type=week;week=(?P<week>\d+)$")),
+    ("player_week_stats", re.compile(r"^/players;player_keys=[^/]+/stats;type=week;week=(?P<week>\d+)$")),
+    ("player_stats", re.compile(r"/players;player_keys=[^/]+/stats;type=week;week=(?P<week>\d+)$")),
+    ("transactions", re.compile(r"^/league/[^/]+/transactions(?:;|$)")),
+)
+
+
+def classify_endpoint(endpoint):
+    for kind, pattern in ENDPOINT_PATTERNS:
+        match = pattern.search(endpoint or "")
+        if match:
+            week = match.groupdict().get("week")
+            return kind, int(week) if week else None
+    return None, None
@@ -0,0 +1,152 @@
+import argparse
+import time
+from pathlib import Path
+
+from db import DB_PATH, connect_db, init_db
+from parse_cache import prune_parse_cache
+from raw_store import BASE_DIR, iter_blobs, load_raw_body, save_blob
+
+DEFAULT_KEEP = 3
+BLOB_GRACE_SECONDS = 3600
+PACK_CHUNK_SIZE = 200
+
+
+def pack_legacy_rows(conn, base_dir, dry_run=False, chunk_size=PACK_CHUNK_SIZE):
+    legacy = """
+        FROM raw_responses
+        WHERE body_hash IS NULL
+          AND (file_path IS NOT NULL OR body IS NOT NULL)
+    """
+    if dry_run:
+        return conn.execute(f"SELECT COUNT(*) {legacy}").fetchone()[0], []
+
+    packed = 0
+    legacy_files = []
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            f"SELECT id, file_path, body, response_format {legacy} AND id > ? ORDER BY id LIMIT ?",
+            (last_id, chunk_size),
+        ).fetchall()
+        if not rows:
+            break
+        for row in rows:
+            data = load_raw_body(None, row["file_path"], row["body"])
+            if data is None:
+                continue
+            body_hash = save_blob(base_dir, data, row["response_format"])
+            conn.execute(
+                "UPDATE raw_responses SET body_hash = ?, file_path = NULL, body = NULL WHERE id = ?",
+                (body_hash, row["id"]),
+            )
+            if row["file_path"]:
+                legacy_files.append(row["file_path"])
+            packed += 1
+        conn.commit()
+        last_id = rows[-1]["id"]
+    return packed, legacy_files
+
+
+def prune_old_fetches(conn, keep, dry_run=False):
+    rows = conn.execute(
+        """
+        SELECT id, file_path
+        FROM (
+            SELECT id, file_path,
+                   ROW_NUMBER() OVER (PARTITION BY endpoint, params ORDER BY id DESC) AS fetch_rank
+            FROM raw_responses
+        )
+        WHERE fetch_rank > ?
+        """,
+        (keep,),
+    ).fetchall()
+    if dry_run or not rows:
+        return len(rows), []
+
+    conn.executemany("DELETE FROM raw_responses WHERE id = ?", [(row["id"],) for row in rows])
+    conn.commit()
+    return len(rows), [row["file_path"] for row in rows if row["file_path"]]
+
+
+def remove_legacy_files(conn, base_dir, file_paths):
+    raw_dir = (Path(base_dir) / "data" / "raw").resolve()
+    removed = 0
+    for file_path in file_paths:
+        path = Path(file_path)
+        if raw_dir not in path.resolve().parents or not path.exists():
+            continue
+        still_referenced = conn.execute(
+            "SELECT 1 FROM raw_responses WHERE file_path = ? LIMIT 1",
+            (file_path,),
+        ).fetchone()
+        if still_referenced:
+            continue
+        path.unlink()
+        removed += 1
+    return removed
+
+
+def sweep_blobs(conn, base_dir, dry_run=False):
+    referenced = {
+        row[0]
+        for row in conn.execute("SELECT DISTINCT body_hash FROM raw_responses WHERE body_hash IS NOT NULL")
+    }
+    cutoff = time.time() - BLOB_GRACE_SECONDS
+    removed = 0
+    freed = 0
+    for body_hash, path in iter_blobs(base_dir):
+        if body_hash in referenced:
+            continue
+        stat = path.stat()
+        if stat.st_mtime > cutoff:
+            continue
+        removed += 1
+        freed += stat.st_size
+        if not dry_run:
+            path.unlink()
+    return removed, freed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Keep the latest N fetches per endpoint and delete unreferenced raw blobs."
+    )
+    parser.add_argument("--db", default=str(DB_PATH))
+    parser.add_argument("--base-dir", default=str(BASE_DIR), help="Project root holding data/raw.")
+    parser.add_argument("--keep", type=int, default=DEFAULT_KEEP, help="Fetches to keep per endpoint and params.")
+    parser.add_argument("--pack", action="store_true", help="Move legacy file/body rows into the blob store.")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM the database afterwards.")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be removed.")
+    args = parser.parse_args()
+
+    if args.keep < 1:
+        parser.error("--keep must be at least 1")
+
+    conn = connect_db(args.db)
+    init_db(conn)
+
+    legacy_files = []
+    if args.pack:
+        packed, legacy_files = pack_legacy_rows(conn, args.base_dir, dry_run=args.dry_run)
+        print(f"Packed legacy responses: {packed}")
+
+    pruned, pruned_files = prune_old_fetches(conn, args.keep, dry_run=args.dry_run)
+    print(f"Pruned fetches beyond the latest {args.keep}: {pruned}")
+
+    if not args.dry_run:
+        removed_files = remove_legacy_files(conn, args.base_dir, legacy_files + pruned_files)
+        print(f"Removed legacy XML files: {removed_files}")
+
+    stale = prune_parse_cache(conn, dry_run=args.dry_run)
+    print(f"Stale parse cache entries removed: {stale}")
+
+    removed, freed = sweep_blobs(conn, args.base_dir, dry_run=args.dry_run)
+    print(f"Unreferenced blobs removed: {removed} ({freed / 1024 / 1024:.1f} MB)")
+
+    if args.vacuum and not args.dry_run:
+        conn.execute("VACUUM")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
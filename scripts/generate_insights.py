@@ -1,4 +1,5 @@
 import argparse
+import hashlib
 import json
 import sqlite3
 import statistics
@@ -6,9 +7,14 @@ import time
 from collections import defaultdict
 from pathlib import Path
 
+from db import connect_db, init_db
+from player_points import load_player_season_totals, load_player_week_points
+
 BASE_DIR = Path(__file__).resolve().parents[1]
 DB_PATH = BASE_DIR / "data" / "processed" / "fantasy_insights.sqlite"
 OUTPUT_DIR = BASE_DIR / "site" / "data"
+FINGERPRINTS_NAME = "insights_fingerprints.json"
+GENERATOR_VERSION = 1
 
 BENCH_POSITIONS = {"BN"}
 
@@ -20,6 +26,39 @@ def to_float(value):
         return None
 
 
+def league_fingerprint(conn, league_key, version):
+    rows = conn.execute(
+        "SELECT table_name, week, changes FROM dirty WHERE league_key = ? ORDER BY table_name, week",
+        (league_key,),
+    ).fetchall()
+    payload = json.dumps([version, league_key, [list(row) for row in rows]])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_fingerprints(output_dir):
+    path = output_dir / FINGERPRINTS_NAME
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return {}
+
+
+def save_fingerprints(output_dir, fingerprints):
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / FINGERPRINTS_NAME
+    path.write_text(json.dumps(fingerprints, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def is_unchanged(fingerprints, output_path, fingerprint):
+    return output_path.exists() and fingerprints.get(output_path.name, {}).get("fingerprint") == fingerprint
+
+
+def record_fingerprint(fingerprints, output_path, league_key, fingerprint, version):
+    fingerprints[output_path.name] = {"league_key": league_key, "fingerprint": fingerprint, "version": version}
+
+
 def load_leagues(conn):
     rows = conn.execute(
         "SELECT league_key, season FROM leagues ORDER BY season"
@@ -135,25 +174,6 @@ def get_points_stat_id(settings_json):
     return None
 
 
-def parse_stat_modifiers(settings_json):
-    if not settings_json:
-        return {}
-    try:
-        modifiers = json.loads(settings_json)
-    except json.JSONDecodeError:
-        return {}
-    parsed = {}
-    for item in modifiers:
-        stat_id = item.get("stat_id")
-        if stat_id is None:
-            continue
-        value = to_float(item.get("value"))
-        if value is None:
-            continue
-        parsed[str(stat_id)] = value
-    return parsed
-
-
 def load_matchups(conn, league_key):
     rows = conn.execute(
         """
@@ -289,48 +309,6 @@ def compute_transactions(conn, league_key):
     return waiver_counts, trade_counts
 
 
-def load_player_points(conn, league_key, stat_id):
-    if not stat_id:
-        return {}
-    rows = conn.execute(
-        "SELECT player_key, week, value FROM player_stats WHERE league_key = ? AND stat_id = ?",
-        (league_key, stat_id),
-    ).fetchall()
-    points = {}
-    for row in rows:
-        value = to_float(row[2])
-        if value is None:
-            continue
-        points[(row[0], row[1])] = value
-    return points
-
-
-def load_player_fantasy_points(conn, league_key, stat_modifiers):
-    if not stat_modifiers:
-        return {}
-    stat_ids = list(stat_modifiers.keys())
-    placeholders = ",".join("?" for _ in stat_ids)
-    rows = conn.execute(
-        f"""
-        SELECT player_key, week, stat_id, value
-        FROM player_stats
-        WHERE league_key = ?
-          AND stat_id IN ({placeholders})
-        """,
-        (league_key, *stat_ids),
-    ).fetchall()
-    points = defaultdict(float)
-    for row in rows:
-        value = to_float(row[3])
-        if value is None:
-            continue
-        modifier = stat_modifiers.get(row[2])
-        if modifier is None:
-            continue
-        points[(row[0], row[1])] += value * modifier
-    return dict(points)
-
-
 def load_rosters(conn, league_key):
     try:
         rows = conn.execute(
@@ -424,7 +402,6 @@ def compute_insights_for_league(conn, league_key, season):
     team_map = load_team_map(conn, league_key)
     standings = load_standings(conn, league_key)
     settings = load_league_settings(conn, league_key)
-    stat_modifiers = parse_stat_modifiers(settings.get("stat_modifiers"))
 
     matchups = load_matchups(conn, league_key)
     weekly_points, weekly_projected = build_weekly_points(matchups)
@@ -432,17 +409,7 @@ def compute_insights_for_league(conn, league_key, season):
     roster_changes = compute_roster_changes(conn, league_key)
     waiver_counts, trade_counts = compute_transactions(conn, league_key)
     rosters = load_rosters(conn, league_key)
-    player_points = load_player_fantasy_points(conn, league_key, stat_modifiers)
-    if player_points:
-        max_points = max(player_points.values())
-        if max_points == 0:
-            fallback = load_player_points(conn, league_key, "player_points")
-            if fallback:
-                player_points = fallback
-    else:
-        fallback = load_player_points(conn, league_key, "player_points")
-        if fallback:
-            player_points = fallback
+    player_points = load_player_week_points(conn, league_key)
     draft_results = load_draft_results(conn, league_key)
     player_map = load_player_map(conn)
     playoff_start = settings.get("playoff_start_week")
@@ -926,16 +893,7 @@ def compute_insights_for_league(conn, league_key, season):
         add_missing(missing, "reached_and_regretted", "Player scoring modifiers missing.")
         add_missing(missing, "late_round_wizardry", "Player scoring modifiers missing.")
     else:
-        player_totals = defaultdict(float)
-        for (player_key, _week), points in player_points.items():
-            player_totals[player_key] += points
-
-        season_rank = {
-            player_key: idx + 1
-            for idx, (player_key, _total) in enumerate(
-                sorted(player_totals.items(), key=lambda item: item[1], reverse=True)
-            )
-        }
+        player_totals, season_rank = load_player_season_totals(conn, league_key)
 
         deltas = []
         for player_key, draft_rank in draft_rank_by_player.items():
@@ -1756,14 +1714,15 @@ def main():
     parser.add_argument("--season", dest="season", help="Generate for a single season.")
     parser.add_argument("--season-start", dest="season_start", help="Generate for seasons >= this year.")
     parser.add_argument("--season-end", dest="season_end", help="Generate for seasons <= this year.")
+    parser.add_argument("--force", action="store_true", help="Regenerate leagues whose inputs did not change.")
     args = parser.parse_args()
 
     if not DB_PATH.exists():
         print(f"Missing database: {DB_PATH}")
         return
 
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    conn = connect_db(DB_PATH)
+    init_db(conn)
 
     leagues = load_leagues(conn)
     if args.season:
@@ -1775,19 +1734,30 @@ def main():
     if args.season_end:
         leagues = [l for l in leagues if l[1] is not None and int(l[1]) <= int(args.season_end)]
 
-    outputs = []
+    fingerprints = load_fingerprints(OUTPUT_DIR)
+    seasons = []
+    written = 0
     for league_key, season in leagues:
+        seasons.append(season)
+        output_path = OUTPUT_DIR / f"insights_{season}.json"
+        fingerprint = league_fingerprint(conn, league_key, GENERATOR_VERSION)
+        if not args.force and is_unchanged(fingerprints, output_path, fingerprint):
+            print(f"Unchanged {output_path}")
+            continue
         insights = compute_insights_for_league(conn, league_key, season)
-        outputs.append(insights)
         OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-        output_path = OUTPUT_DIR / f"insights_{season}.json"
         output_path.write_text(json.dumps(insights, indent=2), encoding="utf-8")
+        record_fingerprint(fingerprints, output_path, league_key, fingerprint, GENERATOR_VERSION)
+        save_fingerprints(OUTPUT_DIR, fingerprints)
+        written += 1
         print(f"Wrote {output_path}")
 
     index_path = OUTPUT_DIR / "insights_index.json"
+    if not written and index_path.exists() and json.loads(index_path.read_text(encoding="utf-8")).get("seasons") == seasons:
+        return
     index_payload = {
         "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-        "seasons": [out["season"] for out in outputs],
+        "seasons": seasons,
     }
     index_path.write_text(json.dumps(index_payload, indent=2), encoding="utf-8")
     print(f"Wrote {index_path}")
@@ -1,33 +1,26 @@
 ﻿import argparse
 import json
-import sqlite3
 import statistics
 import time
 from collections import defaultdict
 
 import generate_insights as gi
+from db import connect_db, init_db
+from player_points import load_player_season_totals, load_player_week_points
+
+GENERATOR_VERSION = 1
+FINGERPRINT_VERSION = (gi.GENERATOR_VERSION, GENERATOR_VERSION)
 
 
 def compute_team_insights_for_league(conn, league_key, season):
     team_map = gi.load_team_map(conn, league_key)
     standings = gi.load_standings(conn, league_key)
     settings = gi.load_league_settings(conn, league_key)
-    stat_modifiers = gi.parse_stat_modifiers(settings.get("stat_modifiers"))
 
     matchups = gi.load_matchups(conn, league_key)
     weekly_points, weekly_projected = gi.build_weekly_points(matchups)
     rosters = gi.load_rosters(conn, league_key)
-    player_points = gi.load_player_fantasy_points(conn, league_key, stat_modifiers)
-    if player_points:
-        max_points = max(player_points.values())
-        if max_points == 0:
-            fallback = gi.load_player_points(conn, league_key, "player_points")
-            if fallback:
-                player_points = fallback
-    else:
-        fallback = gi.load_player_points(conn, league_key, "player_points")
-        if fallback:
-            player_points = fallback
+    player_points = load_player_week_points(conn, league_key)
     draft_results = gi.load_draft_results(conn, league_key)
     player_map = gi.load_player_map(conn)
     playoff_start = settings.get("playoff_start_week")
@@ -61,17 +54,7 @@ def compute_team_insights_for_league(conn, league_key, season):
         for team_key, games in team_games_map.items()
     }
 
-    player_totals = defaultdict(float)
-    if player_points:
-        for (player_key, _week), points in player_points.items():
-            player_totals[player_key] += points
-
-    season_rank = {
-        player_key: idx + 1
-        for idx, (player_key, _total) in enumerate(
-            sorted(player_totals.items(), key=lambda item: item[1], reverse=True)
-        )
-    }
+    player_totals, season_rank = load_player_season_totals(conn, league_key)
 
     draft_picks = [
         row
@@ -1013,14 +996,15 @@ def main():
     parser.add_argument("--season", dest="season", help="Generate for a single season.")
     parser.add_argument("--season-start", dest="season_start", help="Generate for seasons >= this year.")
     parser.add_argument("--season-end", dest="season_end", help="Generate for seasons <= this year.")
+    parser.add_argument("--force", action="store_true", help="Regenerate leagues whose inputs did not change.")
     args = parser.parse_args()
 
     if not gi.DB_PATH.exists():
         print(f"Missing database: {gi.DB_PATH}")
         return
 
-    conn = sqlite3.connect(gi.DB_PATH)
-    conn.row_factory = sqlite3.Row
+    conn = connect_db(gi.DB_PATH)
+    init_db(conn)
 
     leagues = gi.load_leagues(conn)
     if args.season:
@@ -1032,11 +1016,18 @@ def main():
     if args.season_end:
         leagues = [l for l in leagues if l[1] is not None and int(l[1]) <= int(args.season_end)]
 
+    fingerprints = gi.load_fingerprints(gi.OUTPUT_DIR)
     for league_key, season in leagues:
+        output_path = gi.OUTPUT_DIR / f"insights_{season}_teams.json"
+        fingerprint = gi.league_fingerprint(conn, league_key, FINGERPRINT_VERSION)
+        if not args.force and gi.is_unchanged(fingerprints, output_path, fingerprint):
+            print(f"Unchanged {output_path}")
+            continue
         payload = compute_team_insights_for_league(conn, league_key, season)
         gi.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-        output_path = gi.OUTPUT_DIR / f"insights_{season}_teams.json"
         output_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        gi.record_fingerprint(fingerprints, output_path, league_key, fingerprint, FINGERPRINT_VERSION)
+        gi.save_fingerprints(gi.OUTPUT_DIR, fingerprints)
         print(f"Wrote {output_path}")
 
 
@@ -0,0 +1,79 @@
+import pickle
+import zlib
+
+from db import upsert_many
+from response_formats import PARSERS
+from yahoo_client import DEFAULT_FORMAT
+
+COMPRESS_LEVEL = 1
+PARSE_CACHE_COLUMNS = ("body_hash", "parser", "league_key", "week", "parser_version", "rows")
+
+
+def parser_name(response_format, name):
+    if response_format == DEFAULT_FORMAT:
+        return name
+    return f"{response_format}.{name}"
+
+
+PARSER_VERSIONS = {
+    parser_name(response_format, name): version
+    for response_format, module in PARSERS.items()
+    for name, version in module.PARSER_VERSIONS.items()
+}
+
+
+def encode_rows(derived):
+    return zlib.compress(pickle.dumps(derived, protocol=pickle.HIGHEST_PROTOCOL), COMPRESS_LEVEL)
+
+
+def decode_rows(data):
+    return pickle.loads(zlib.decompress(data))
+
+
+def load_parsed(conn, body_hash, parser, league_key, week):
+    version = PARSER_VERSIONS.get(parser)
+    if version is None:
+        return None
+    row = conn.execute(
+        """
+        SELECT rows
+        FROM parse_cache
+        WHERE body_hash = ?
+          AND parser = ?
+          AND league_key = ?
+          AND week = ?
+          AND parser_version = ?
+        """,
+        (body_hash, parser, league_key, week or 0, version),
+    ).fetchone()
+    if row is None:
+        return None
+    return decode_rows(row[0])
+
+
+def save_parsed(conn, body_hash, parser, league_key, week, derived):
+    version = PARSER_VERSIONS.get(parser)
+    if version is None:
+        return
+    row = (body_hash, parser, league_key, week or 0, version, encode_rows(derived))
+    upsert_many(conn, "parse_cache", PARSE_CACHE_COLUMNS, [row])
+
+
+def prune_parse_cache(conn, dry_run=False):
+    conditions = """
+        FROM parse_cache
+        WHERE body_hash NOT IN (SELECT body_hash FROM raw_responses WHERE body_hash IS NOT NULL)
+           OR parser NOT IN ({parsers})
+           OR parser_version != CASE parser {cases} END
+    """.format(
+        parsers=",".join("?" for _ in PARSER_VERSIONS),
+        cases=" ".join("WHEN ? THEN ?" for _ in PARSER_VERSIONS),
+    )
+    params = [*PARSER_VERSIONS]
+    for parser, version in PARSER_VERSIONS.items():
+        params.extend((parser, version))
+    if dry_run:
+        return conn.execute(f"SELECT COUNT(*) {conditions}", params).fetchone()[0]
+    removed = conn.execute(f"DELETE {conditions}", params).rowcount
+    conn.commit()
+    return removed
@@ -0,0 +1,491 @@
+import json
+
+from parse_yahoo_xml import _dedupe, _to_float, _to_int
+
+PARSE_ERRORS = (ValueError,)
+PARSER_VERSIONS = {
+    "parse_league_meta": 1,
+    "parse_settings": 1,
+    "stream_teams": 1,
+    "stream_standings": 1,
+    "stream_draft_results": 1,
+    "stream_matchups": 1,
+    "stream_roster": 1,
+    "stream_roster_stats": 2,
+    "stream_team_stats": 2,
+    "stream_player_stats": 3,
+    "stream_player_week_stats": 2,
+    "stream_transactions": 1,
+}
+
+
+def parse_document(json_bytes):
+    data = json.loads(json_bytes)
+    if isinstance(data, dict):
+        data = data.get("fantasy_content", data)
+    return normalize(data)
+
+
+def normalize(value):
+    # Yahoo's JSON wraps entities in lists of single-key dicts and collections in
+    # {"0": ..., "1": ..., "count": n}; flatten one level into name -> [values] like
+    # XML children. Nested containers are normalized when a parser reaches them.
+    node = {}
+    _collect(value, node)
+    return node
+
+
+def _collect(value, node):
+    if isinstance(value, list):
+        for item in value:
+            if isinstance(item, (dict, list)):
+                _collect(item, node)
+        return
+    if not isinstance(value, dict):
+        return
+    is_collection = "0" in value
+    for key, item in value.items():
+        if key.isdigit():
+            _collect(item, node)
+        elif not (is_collection and key == "count"):
+            items = node.get(key)
+            if items is None:
+                node[key] = [item]
+            else:
+                items.append(item)
+
+
+def _scalar(value):
+    if isinstance(value, str):
+        return value.strip()
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return str(value).strip()
+
+
+def iter_nodes(node, name):
+    for key, items in node.items():
+        for item in items:
+            if not isinstance(item, (dict, list)):
+                continue
+            if key == name:
+                yield normalize(item)
+            else:
+                yield from iter_nodes(normalize(item), name)
+
+
+def _find(node, name):
+    if not isinstance(node, dict):
+        return None
+    items = node.get(name)
+    if items:
+        item = items[0]
+        return normalize(item) if isinstance(item, (dict, list)) else _scalar(item)
+    for items in node.values():
+        for item in items:
+            if isinstance(item, (dict, list)):
+                found = _find(normalize(item), name)
+                if found is not None:
+                    return found
+    return None
+
+
+def _find_text(node, name):
+    value = _find(node, name)
+    return value if isinstance(value, str) else ""
+
+
+def _text(node, name):
+    items = node.get(name) if isinstance(node, dict) else None
+    if not items or isinstance(items[0], (dict, list)):
+        return ""
+    return _scalar(items[0])
+
+
+def parse_games(root):
+    games = []
+    for elem in iter_nodes(root, "game"):
+        game_key = _text(elem, "game_key")
+        if game_key:
+            games.append({"game_key": game_key, "code": _text(elem, "code"), "season": _text(elem, "season")})
+    return _dedupe(games, "game_key")
+
+
+def parse_leagues(root):
+    leagues = []
+    for elem in iter_nodes(root, "league"):
+        league_key = _text(elem, "league_key")
+        if league_key:
+            leagues.append(
+                {
+                    "league_key": league_key,
+                    "league_id": _text(elem, "league_id"),
+                    "name": _text(elem, "name"),
+                    "season": _text(elem, "season"),
+                }
+            )
+    return _dedupe(leagues, "league_key")
+
+
+def parse_league_meta(root):
+    league = next(iter_nodes(root, "league"), None)
+    if league is None:
+        return {}
+    return {
+        "league_key": _text(league, "league_key"),
+        "league_id": _text(league, "league_id"),
+        "name": _text(league, "name"),
+        "season": _text(league, "season"),
+        "game_key": _text(league, "game_key"),
+    }
+
+
+def parse_settings(root):
+    settings = {}
+    settings_elem = _find(root, "settings")
+    if not isinstance(settings_elem, dict):
+        return settings
+
+    settings["start_week"] = _to_int(_find_text(settings_elem, "start_week"))
+    settings["end_week"] = _to_int(_find_text(settings_elem, "end_week"))
+    settings["playoff_start_week"] = _to_int(_find_text(settings_elem, "playoff_start_week"))
+    settings["num_teams"] = _to_int(_find_text(settings_elem, "num_teams"))
+    settings["scoring_type"] = _find_text(settings_elem, "scoring_type")
+
+    roster_positions = []
+    roster_positions_elem = _find(settings_elem, "roster_positions")
+    if isinstance(roster_positions_elem, dict):
+        for rp in iter_nodes(roster_positions_elem, "roster_position"):
+            roster_positions.append(
+                {
+                    "position": _find_text(rp, "position"),
+                    "count": _to_int(_find_text(rp, "count")),
+                }
+            )
+
+    stat_categories = []
+    stat_categories_elem = _find(settings_elem, "stat_categories")
+    if isinstance(stat_categories_elem, dict):
+        for stat in iter_nodes(stat_categories_elem, "stat"):
+            stat_categories.append(
+                {
+                    "stat_id": _find_text(stat, "stat_id"),
+                    "name": _find_text(stat, "name"),
+                }
+            )
+
+    stat_modifiers = []
+    stat_modifiers_elem = _find(settings_elem, "stat_modifiers")
+    if isinstance(stat_modifiers_elem, dict):
+        for tag in ("stat", "stat_modifier"):
+            for stat in iter_nodes(stat_modifiers_elem, tag):
+                stat_id = _find_text(stat, "stat_id")
+                if stat_id:
+                    stat_modifiers.append({"stat_id": stat_id, "value": _to_float(_find_text(stat, "value"))})
+            if stat_modifiers:
+                break
+
+    settings["roster_positions"] = json.dumps(roster_positions, ensure_ascii=True)
+    settings["stat_categories"] = json.dumps(stat_categories, ensure_ascii=True)
+    settings["stat_modifiers"] = json.dumps(stat_modifiers, ensure_ascii=True)
+    return settings
+
+
+def stream_teams(json_bytes, league_key):
+    rows = {}
+    for team in iter_nodes(parse_document(json_bytes), "team"):
+        team_key = _text(team, "team_key")
+        if not team_key or team_key in rows:
+            continue
+        managers = []
+        managers_elem = _find(team, "managers")
+        if isinstance(managers_elem, dict):
+            for manager in iter_nodes(managers_elem, "manager"):
+                name = _find_text(manager, "nickname") or _find_text(manager, "guid")
+                if name:
+                    managers.append(name)
+        rows[team_key] = (
+            team_key,
+            league_key,
+            _text(team, "team_id"),
+            _text(team, "name"),
+            _text(team, "url"),
+            ", ".join(managers),
+        )
+    return list(rows.values())
+
+
+def stream_standings(json_bytes, league_key):
+    rows = []
+    for team in iter_nodes(parse_document(json_bytes), "team"):
+        team_key = _text(team, "team_key")
+        if not team_key:
+            continue
+        standings = _find(team, "team_standings")
+        if standings is None:
+            continue
+        outcomes = _find(standings, "outcome_totals")
+        rows.append(
+            (
+                league_key,
+                team_key,
+                _to_int(_find_text(standings, "rank")),
+                _to_int(_find_text(outcomes, "wins")),
+                _to_int(_find_text(outcomes, "losses")),
+                _to_int(_find_text(outcomes, "ties")),
+                _to_float(_find_text(standings, "points_for")),
+                _to_float(_find_text(standings, "points_against")),
+            )
+        )
+    return rows
+
+
+def stream_draft_results(json_bytes, league_key):
+    rows = []
+    for draft_result in iter_nodes(parse_document(json_bytes), "draft_result"):
+        keeper = _text(draft_result, "keeper") or _text(draft_result, "is_keeper")
+        autopick = _text(draft_result, "autopick") or _text(draft_result, "is_autopick")
+        rows.append(
+            (
+                league_key,
+                _text(draft_result, "team_key"),
+                _text(draft_result, "player_key"),
+                _to_int(_text(draft_result, "round")),
+                _to_int(_text(draft_result, "pick")),
+                _to_float(_text(draft_result, "cost")),
+                _to_int(keeper),
+                _to_int(autopick),
+            )
+        )
+    return rows
+
+
+def stream_roster(json_bytes, league_key, week):
+    roster_rows = []
+    players = {}
+    for team_key, player_key, player in _iter_roster_players(json_bytes):
+        roster_rows.append(_roster_row(league_key, team_key, week, player_key, player))
+        if player_key not in players:
+            players[player_key] = _player_row(player, player_key)
+    return roster_rows, list(players.values())
+
+
+def stream_roster_stats(json_bytes, league_key, game_key, week):
+    roster_rows = []
+    stat_rows = []
+    point_rows = []
+    players = {}
+    for team_key, player_key, player in _iter_roster_players(json_bytes):
+        roster_rows.append(_roster_row(league_key, team_key, week, player_key, player))
+        stats_parent = _find(player, "player_stats")
+        if stats_parent is not None:
+            for stat_id, value in _iter_stat_values(stats_parent):
+                stat_rows.append((game_key, player_key, week, stat_id, value))
+        total = _find_text(_find(player, "player_points"), "total")
+        if total:
+            point_rows.append((league_key, player_key, week, "player_points", total))
+        if player_key not in players:
+            players[player_key] = _player_row(player, player_key)
+    return roster_rows, list(players.values()), stat_rows, point_rows
+
+
+def stream_team_stats(json_bytes, league_key, week):
+    rows = []
+    for team in iter_nodes(parse_document(json_bytes), "team"):
+        team_key = _text(team, "team_key")
+        if not team_key:
+            continue
+        stats_parent = _find(team, "team_stats")
+        if stats_parent is None:
+            stats_parent = _find(team, "stats")
+        for stat_id, value in _iter_stat_values(stats_parent):
+            rows.append((league_key, team_key, week, stat_id, value))
+        points = _points(team, "team_points", "points")
+        if points:
+            rows.append((league_key, team_key, week, "points", points))
+        projected_points = _points(team, "team_projected_points", "projected_points")
+        if projected_points:
+            rows.append((league_key, team_key, week, "projected_points", projected_points))
+    return rows
+
+
+def stream_player_stats(json_bytes, league_key, week):
+    rows = []
+    players = {}
+    for player in iter_nodes(parse_document(json_bytes), "player"):
+        player_key = _text(player, "player_key")
+        if not player_key:
+            continue
+        stats_parent = _find(player, "player_stats")
+        if stats_parent is None:
+            stats_parent = _find(player, "stats")
+        if stats_parent is None:
+            continue
+        for stat_id, value in _iter_stat_values(stats_parent):
+            rows.append((league_key, player_key, week, stat_id, value))
+        total = _find_text(_find(player, "player_points"), "total")
+        if total:
+            rows.append((league_key, player_key, week, "player_points", total))
+        if player_key not in players:
+            players[player_key] = _player_row(player, player_key)
+    return rows, list(players.values())
+
+
+def stream_player_week_stats(json_bytes, game_key, week):
+    rows, players = stream_player_stats(json_bytes, game_key, week)
+    return [row for row in rows if row[3] != "player_points"], players
+
+
+def stream_matchups(json_bytes, league_key, week):
+    matchups = []
+    matchup_teams = []
+    for index, matchup in enumerate(iter_nodes(parse_document(json_bytes), "matchup"), start=1):
+        matchup_id = _text(matchup, "matchup_id") or str(index)
+        matchups.append(
+            (
+                league_key,
+                week,
+                matchup_id,
+                _text(matchup, "status"),
+                _to_int(_text(matchup, "is_playoffs")),
+                _to_int(_text(matchup, "is_consolation")),
+                _text(matchup, "winner_team_key"),
+            )
+        )
+        for team in iter_nodes(matchup, "team"):
+            team_key = _text(team, "team_key")
+            if not team_key:
+                continue
+            matchup_teams.append(
+                (
+                    league_key,
+                    week,
+                    matchup_id,
+                    team_key,
+                    _to_float(_points(team, "team_points", "points")),
+                    _to_float(_points(team, "team_projected_points", "projected_points")),
+                    _text(team, "win_status"),
+                )
+            )
+    return matchups, matchup_teams
+
+
+def stream_transactions(json_bytes, league_key):
+    transactions = []
+    transaction_players = []
+    players = {}
+    for txn in iter_nodes(parse_document(json_bytes), "transaction"):
+        transaction_key = _text(txn, "transaction_key")
+        if not transaction_key:
+            continue
+        transactions.append(
+            (
+                transaction_key,
+                league_key,
+                _text(txn, "type"),
+                _text(txn, "status"),
+                _to_int(_text(txn, "timestamp")),
+            )
+        )
+        players_elem = _find(txn, "players")
+        if not isinstance(players_elem, dict):
+            continue
+        for player in iter_nodes(players_elem, "player"):
+            player_key = _text(player, "player_key")
+            if not player_key:
+                continue
+            txn_data = _find(player, "transaction_data")
+            transaction_players.append(
+                (
+                    transaction_key,
+                    player_key,
+                    _find_text(txn_data, "type"),
+                    _find_text(txn_data, "source_type"),
+                    _find_text(txn_data, "source_team_key"),
+                    _find_text(txn_data, "destination_type"),
+                    _find_text(txn_data, "destination_team_key"),
+                )
+            )
+            if player_key not in players:
+                players[player_key] = _player_row(player, player_key)
+    return transactions, transaction_players, list(players.values())
+
+
+def _iter_roster_players(json_bytes):
+    for team in iter_nodes(parse_document(json_bytes), "team"):
+        team_key = _text(team, "team_key")
+        if not team_key:
+            continue
+        players_elem = _find(_find(team, "roster"), "players")
+        if not isinstance(players_elem, dict):
+            continue
+        for player in iter_nodes(players_elem, "player"):
+            player_key = _text(player, "player_key")
+            if player_key:
+                yield team_key, player_key, player
+
+
+def _roster_row(league_key, team_key, week, player_key, player):
+    return (
+        league_key,
+        team_key,
+        week,
+        player_key,
+        _find_text(_find(player, "selected_position"), "position"),
+        _find_text(player, "status"),
+        _find_text(player, "injury_status"),
+        _find_text(player, "injury_note"),
+    )
+
+
+def _iter_stat_values(stats_parent):
+    if not isinstance(stats_parent, dict):
+        return
+    values = _fast_stat_values(stats_parent.get("stats", ()))
+    if values is not None:
+        yield from values
+        return
+    for stat in iter_nodes(stats_parent, "stat"):
+        stat_id = _find_text(stat, "stat_id")
+        if stat_id:
+            yield stat_id, _find_text(stat, "value")
+
+
+def _fast_stat_values(stats_items):
+    values = []
+    for stats in stats_items:
+        if not isinstance(stats, list):
+            return None
+        for wrapper in stats:
+            stat = wrapper.get("stat") if isinstance(wrapper, dict) and len(wrapper) == 1 else None
+            if not isinstance(stat, dict):
+                return None
+            stat_id = stat.get("stat_id")
+            value = stat.get("value")
+            if isinstance(stat_id, (dict, list)) or isinstance(value, (dict, list)):
+                return None
+            stat_id = _scalar(stat_id)
+            if stat_id:
+                values.append((stat_id, _scalar(value)))
+    return values
+
+
+def _player_row(player, player_key):
+    return (
+        player_key,
+        _text(player, "player_id"),
+        _find_text(_find(player, "name"), "full"),
+        _text(player, "display_position"),
+        _text(player, "editorial_team_abbr"),
+    )
+
+
+def _points(team, container, fallback):
+    points = _find(team, container)
+    if isinstance(points, dict):
+        value = _find_text(points, "total") or _find_text(points, "points")
+        if value:
+            return value
+    return _find_text(team, fallback)
@@ -1,6 +1,53 @@
 import json
-
-from yahoo_client import find_child_text, strip_ns
+from io import BytesIO
+from xml.etree import ElementTree
+
+from lxml import etree
+
+from yahoo_client import find_child_text, parse_xml, strip_ns
+
+ROSTER_COLUMNS = ("league_key", "team_key", "week", "player_key", "position", "status", "injury_status", "injury_note")
+PLAYER_COLUMNS = ("player_key", "player_id", "name_full", "position", "editorial_team_abbr")
+TEAM_STATS_COLUMNS = ("league_key", "team_key", "week", "stat_id", "value")
+PLAYER_STATS_COLUMNS = ("league_key", "player_key", "week", "stat_id", "value")
+PLAYER_WEEK_STATS_COLUMNS = ("game_key", "player_key", "week", "stat_id", "value")
+MATCHUP_COLUMNS = ("league_key", "week", "matchup_id", "status", "is_playoffs", "is_consolation", "winner_team_key")
+MATCHUP_TEAM_COLUMNS = ("league_key", "week", "matchup_id", "team_key", "points", "projected_points", "win_status")
+TEAM_COLUMNS = ("team_key", "league_key", "team_id", "name", "url", "manager_names")
+STANDINGS_COLUMNS = ("league_key", "team_key", "rank", "wins", "losses", "ties", "points_for", "points_against")
+DRAFT_RESULT_COLUMNS = ("league_key", "team_key", "player_key", "round", "pick", "cost", "is_keeper", "is_autopick")
+TRANSACTION_COLUMNS = ("transaction_key", "league_key", "type", "status", "timestamp")
+TRANSACTION_PLAYER_COLUMNS = (
+    "transaction_key",
+    "player_key",
+    "transaction_type",
+    "source_type",
+    "source_team_key",
+    "destination_type",
+    "destination_team_key",
+)
+
+PARSE_ERRORS = (etree.XMLSyntaxError, ElementTree.ParseError)
+PARSER_VERSIONS = {
+    "parse_league_meta": 1,
+    "parse_settings": 1,
+    "stream_teams": 1,
+    "stream_standings": 1,
+    "stream_draft_results": 1,
+    "stream_matchups": 1,
+    "stream_roster": 1,
+    "stream_roster_stats": 1,
+    "stream_team_stats": 1,
+    "stream_player_stats": 2,
+    "stream_player_week_stats": 1,
+    "stream_transactions": 1,
+}
+
+_STAT_XPATHS = {}
+
+
+def parse_document(xml_bytes):
+    return parse_xml(xml_bytes)
 
 
 def iter_elements(root, tag_name):
@@ -130,327 +177,351 @@ def parse_settings(root):
     return settings
 
 
-def parse_teams(root):
-    teams = []
-    for team in iter_elements(root, "team"):
-        team_key = find_child_text(team, "team_key")
+def iterparse_elements(xml_bytes, tag_name):
+    context = etree.iterparse(
+        BytesIO(xml_bytes),
+        events=("end",),
+        tag=f"{{*}}{tag_name}",
+        remove_comments=True,
+        remove_pis=True,
+        resolve_entities=False,
+        no_network=True,
+    )
+    for _event, elem in context:
+        yield elem
+        elem.clear(keep_tail=True)
+        parent = elem.getparent()
+        if parent is not None:
+            while elem.getprevious() is not None:
+                del parent[0]
+
+
+def stream_roster(xml_bytes, league_key, week):
+    roster_rows = []
+    players = {}
+    for team_key, player_key, player in _iter_roster_players(xml_bytes):
+        roster_rows.append(_roster_row(league_key, team_key, week, player_key, player))
+        if player_key not in players:
+            players[player_key] = _player_row(player, player_key)
+    return roster_rows, list(players.values())
+
+
+def stream_roster_stats(xml_bytes, league_key, game_key, week):
+    roster_rows = []
+    stat_rows = []
+    point_rows = []
+    players = {}
+    for team_key, player_key, player in _iter_roster_players(xml_bytes):
+        roster_rows.append(_roster_row(league_key, team_key, week, player_key, player))
+        stats_parent = _descendant(player, "player_stats")
+        if stats_parent is not None:
+            for stat_id, value in _iter_stat_values(stats_parent):
+                stat_rows.append((game_key, player_key, week, stat_id, value))
+        total = _descendant_text(_descendant(player, "player_points"), "total")
+        if total:
+            point_rows.append((league_key, player_key, week, "player_points", total))
+        if player_key not in players:
+            players[player_key] = _player_row(player, player_key)
+    return roster_rows, list(players.values()), stat_rows, point_rows
+
+
+def stream_team_stats(xml_bytes, league_key, week):
+    rows = []
+    for team in iterparse_elements(xml_bytes, "team"):
+        team_key = _child_text(team, "team_key")
         if not team_key:
             continue
-        managers = []
-        managers_elem = find_descendant(team, "managers")
-        if managers_elem is not None:
-            for manager in iter_elements(managers_elem, "manager"):
-                name = find_descendant_text(manager, "nickname")
-                if not name:
-                    name = find_descendant_text(manager, "guid")
-                if name:
-                    managers.append(name)
-        teams.append(
-            {
-                "team_key": team_key,
-                "team_id": find_child_text(team, "team_id"),
-                "name": find_child_text(team, "name"),
-                "url": find_child_text(team, "url"),
-                "manager_names": ", ".join(managers),
-            }
-        )
-    return _dedupe(teams, "team_key")
+        stats_parent = _descendant(team, "team_stats")
+        if stats_parent is None:
+            stats_parent = _descendant(team, "stats")
+        if stats_parent is not None:
+            for stat_id, value in _iter_stat_values(stats_parent):
+                rows.append((league_key, team_key, week, stat_id, value))
+        points = _stream_points(team, "team_points", "points")
+        if points:
+            rows.append((league_key, team_key, week, "points", points))
+        projected_points = _stream_points(team, "team_projected_points", "projected_points")
+        if projected_points:
+            rows.append((league_key, team_key, week, "projected_points", projected_points))
+    return rows
 
 
-def parse_standings(root):
+def stream_player_stats(xml_bytes, league_key, week):
     rows = []
-    for team in iter_elements(root, "team"):
-        team_key = find_child_text(team, "team_key")
-        if not team_key:
+    players = {}
+    for player in iterparse_elements(xml_bytes, "player"):
+        player_key = _child_text(player, "player_key")
+        if not player_key:
             continue
-        standings = find_descendant(team, "team_standings")
-        if standings is None:
+        stats_parent = _descendant(player, "player_stats")
+        if stats_parent is None:
+            stats_parent = _descendant(player, "stats")
+        if stats_parent is None:
             continue
-        outcomes = find_descendant(standings, "outcome_totals")
-        rows.append(
-            {
-                "team_key": team_key,
-                "rank": _to_int(find_descendant_text(standings, "rank")),
-                "wins": _to_int(find_descendant_text(outcomes, "wins")),
-                "losses": _to_int(find_descendant_text(outcomes, "losses")),
-                "ties": _to_int(find_descendant_text(outcomes, "ties")),
-                "points_for": _to_float(find_descendant_text(standings, "points_for")),
-                "points_against": _to_float(find_descendant_text(standings, "points_against")),
-            }
-        )
-    return rows
+        for stat_id, value in _iter_stat_values(stats_parent):
+            rows.append((league_key, player_key, week, stat_id, value))
+        total = _descendant_text(_descendant(player, "player_points"), "total")
+        if total:
+            rows.append((league_key, player_key, week, "player_points", total))
+        if player_key not in players:
+            players[player_key] = _player_row(player, player_key)
+    return rows, list(players.values())
 
 
-def parse_matchups(root, week):
-    matchups = []
-    matchup_teams = []
+def stream_player_week_stats(xml_bytes, game_key, week):
+    rows, players = stream_player_stats(xml_bytes, game_key, week)
+    return [row for row in rows if row[3] != "player_points"], players
 
-    for index, matchup in enumerate(iter_elements(root, "matchup"), start=1):
-        matchup_id = find_child_text(matchup, "matchup_id") or str(index)
-        status = find_child_text(matchup, "status")
-        is_playoffs = _to_int(find_child_text(matchup, "is_playoffs"))
-        is_consolation = _to_int(find_child_text(matchup, "is_consolation"))
-        winner_team_key = find_child_text(matchup, "winner_team_key")
 
-        if matchup_id:
-            matchups.append(
-                {
-                    "week": week,
-                    "matchup_id": matchup_id,
-                    "status": status,
-                    "is_playoffs": is_playoffs,
-                    "is_consolation": is_consolation,
-                    "winner_team_key": winner_team_key,
-                }
+def stream_matchups(xml_bytes, league_key, week):
+    matchups = []
+    matchup_teams = []
+    for index, matchup in enumerate(iterparse_elements(xml_bytes, "matchup"), start=1):
+        matchup_id = _child_text(matchup, "matchup_id") or str(index)
+        matchups.append(
+            (
+                league_key,
+                week,
+                matchup_id,
+                _child_text(matchup, "status"),
+                _to_int(_child_text(matchup, "is_playoffs")),
+                _to_int(_child_text(matchup, "is_consolation")),
+                _child_text(matchup, "winner_team_key"),
             )
-
-        for team in iter_elements(matchup, "team"):
-            team_key = find_child_text(team, "team_key")
+        )
+        for team in matchup.iter("{*}team"):
+            team_key = _child_text(team, "team_key")
             if not team_key:
                 continue
-            points = _extract_points(team)
-            projected_points = _extract_projected_points(team)
-            win_status = find_child_text(team, "win_status")
             matchup_teams.append(
-                {
-                    "week": week,
-                    "matchup_id": matchup_id,
-                    "team_key": team_key,
-                    "points": _to_float(points),
-                    "projected_points": _to_float(projected_points),
-                    "win_status": win_status,
-                }
+                (
+                    league_key,
+                    week,
+                    matchup_id,
+                    team_key,
+                    _to_float(_stream_points(team, "team_points", "points")),
+                    _to_float(_stream_points(team, "team_projected_points", "projected_points")),
+                    _child_text(team, "win_status"),
+                )
             )
-
     return matchups, matchup_teams
 
 
-def parse_roster(root, week):
-    roster_rows = []
-    players = []
-
-    for team in iter_elements(root, "team"):
-        team_key = find_child_text(team, "team_key")
-        if not team_key:
-            continue
-        roster = find_descendant(team, "roster")
-        if roster is None:
+def stream_transactions(xml_bytes, league_key):
+    transactions = []
+    transaction_players = []
+    players = {}
+    for txn in iterparse_elements(xml_bytes, "transaction"):
+        transaction_key = _child_text(txn, "transaction_key")
+        if not transaction_key:
             continue
-        players_elem = find_descendant(roster, "players")
+        transactions.append(
+            (
+                transaction_key,
+                league_key,
+                _child_text(txn, "type"),
+                _child_text(txn, "status"),
+                _to_int(_child_text(txn, "timestamp")),
+            )
+        )
+        players_elem = _descendant(txn, "players")
         if players_elem is None:
             continue
-
-        for player in iter_elements(players_elem, "player"):
-            player_key = find_child_text(player, "player_key")
+        for player in players_elem.iter("{*}player"):
+            player_key = _child_text(player, "player_key")
             if not player_key:
                 continue
-            position = ""
-            selected_position = find_descendant(player, "selected_position")
-            if selected_position is not None:
-                position = find_descendant_text(selected_position, "position")
-
-            roster_rows.append(
-                {
-                    "team_key": team_key,
-                    "week": week,
-                    "player_key": player_key,
-                    "position": position,
-                    "status": find_descendant_text(player, "status"),
-                    "injury_status": find_descendant_text(player, "injury_status"),
-                    "injury_note": find_descendant_text(player, "injury_note"),
-                }
+            txn_data = _descendant(player, "transaction_data")
+            transaction_players.append(
+                (
+                    transaction_key,
+                    player_key,
+                    _descendant_text(txn_data, "type"),
+                    _descendant_text(txn_data, "source_type"),
+                    _descendant_text(txn_data, "source_team_key"),
+                    _descendant_text(txn_data, "destination_type"),
+                    _descendant_text(txn_data, "destination_team_key"),
+                )
             )
+            if player_key not in players:
+                players[player_key] = _player_row(player, player_key)
+    return transactions, transaction_players, list(players.values())
 
-            players.append(_parse_player_core(player))
 
-    return roster_rows, _dedupe(players, "player_key")
+def stream_teams(xml_bytes, league_key):
+    rows = {}
+    for team in iterparse_elements(xml_bytes, "team"):
+        team_key = _child_text(team, "team_key")
+        if not team_key or team_key in rows:
+            continue
+        managers = []
+        managers_elem = _descendant(team, "managers")
+        if managers_elem is not None:
+            for manager in managers_elem.iter("{*}manager"):
+                name = _descendant_text(manager, "nickname") or _descendant_text(manager, "guid")
+                if name:
+                    managers.append(name)
+        rows[team_key] = (
+            team_key,
+            league_key,
+            _child_text(team, "team_id"),
+            _child_text(team, "name"),
+            _child_text(team, "url"),
+            ", ".join(managers),
+        )
+    return list(rows.values())
 
 
-def parse_team_stats(root, week):
+def stream_standings(xml_bytes, league_key):
     rows = []
-    for team in iter_elements(root, "team"):
-        team_key = find_child_text(team, "team_key")
+    for team in iterparse_elements(xml_bytes, "team"):
+        team_key = _child_text(team, "team_key")
         if not team_key:
             continue
-        stats_parent = find_descendant(team, "team_stats")
-        if stats_parent is None:
-            stats_parent = find_descendant(team, "stats")
-        if stats_parent is not None:
-            for stat in iter_elements(stats_parent, "stat"):
-                stat_id = find_descendant_text(stat, "stat_id")
-                value = find_descendant_text(stat, "value")
-                if stat_id:
-                    rows.append(
-                        {
-                            "team_key": team_key,
-                            "week": week,
-                            "stat_id": stat_id,
-                            "value": value,
-                        }
-                    )
-        points = _extract_points(team)
-        projected_points = _extract_projected_points(team)
-        if points:
-            rows.append(
-                {
-                    "team_key": team_key,
-                    "week": week,
-                    "stat_id": "points",
-                    "value": points,
-                }
-            )
-        if projected_points:
-            rows.append(
-                {
-                    "team_key": team_key,
-                    "week": week,
-                    "stat_id": "projected_points",
-                    "value": projected_points,
-                }
+        standings = _descendant(team, "team_standings")
+        if standings is None:
+            continue
+        outcomes = _descendant(standings, "outcome_totals")
+        rows.append(
+            (
+                league_key,
+                team_key,
+                _to_int(_descendant_text(standings, "rank")),
+                _to_int(_descendant_text(outcomes, "wins")),
+                _to_int(_descendant_text(outcomes, "losses")),
+                _to_int(_descendant_text(outcomes, "ties")),
+                _to_float(_descendant_text(standings, "points_for")),
+                _to_float(_descendant_text(standings, "points_against")),
             )
+        )
     return rows
 
 
-def parse_player_stats(root, week):
+def stream_draft_results(xml_bytes, league_key):
     rows = []
-    players = []
+    for draft_result in iterparse_elements(xml_bytes, "draft_result"):
+        keeper = _child_text(draft_result, "keeper") or _child_text(draft_result, "is_keeper")
+        autopick = _child_text(draft_result, "autopick") or _child_text(draft_result, "is_autopick")
+        rows.append(
+            (
+                league_key,
+                _child_text(draft_result, "team_key"),
+                _child_text(draft_result, "player_key"),
+                _to_int(_child_text(draft_result, "round")),
+                _to_int(_child_text(draft_result, "pick")),
+                _to_float(_child_text(draft_result, "cost")),
+                _to_int(keeper),
+                _to_int(autopick),
+            )
+        )
+    return rows
 
-    for player in iter_elements(root, "player"):
-        player_key = find_child_text(player, "player_key")
-        if not player_key:
+
+def _iter_roster_players(xml_bytes):
+    for team in iterparse_elements(xml_bytes, "team"):
+        team_key = _child_text(team, "team_key")
+        if not team_key:
             continue
-        stats_parent = find_descendant(player, "player_stats")
-        if stats_parent is None:
-            stats_parent = find_descendant(player, "stats")
-        if stats_parent is None:
+        roster = _descendant(team, "roster")
+        if roster is None:
             continue
-        for stat in iter_elements(stats_parent, "stat"):
-            stat_id = find_descendant_text(stat, "stat_id")
-            value = find_descendant_text(stat, "value")
-            if stat_id:
-                rows.append(
-                    {
-                        "player_key": player_key,
-                        "week": week,
-                        "stat_id": stat_id,
-                        "value": value,
-                    }
-                )
-        player_points = find_descendant(player, "player_points")
-        if player_points is not None:
-            total = find_descendant_text(player_points, "total")
-            if total:
-                rows.append(
-                    {
-                        "player_key": player_key,
-                        "week": week,
-                        "stat_id": "player_points",
-                        "value": total,
-                    }
-                )
-        players.append(_parse_player_core(player))
+        players_elem = _descendant(roster, "players")
+        if players_elem is None:
+            continue
+        for player in players_elem.iter("{*}player"):
+            player_key = _child_text(player, "player_key")
+            if player_key:
+                yield team_key, player_key, player
+
+
+def _roster_row(league_key, team_key, week, player_key, player):
+    return (
+        league_key,
+        team_key,
+        week,
+        player_key,
+        _descendant_text(_descendant(player, "selected_position"), "position"),
+        _descendant_text(player, "status"),
+        _descendant_text(player, "injury_status"),
+        _descendant_text(player, "injury_note"),
+    )
+
+
+def _child_text(elem, name):
+    child = next(elem.iterchildren(f"{{*}}{name}"), None)
+    if child is None:
+        return ""
+    return (child.text or "").strip()
 
-    return rows, _dedupe(players, "player_key")
 
+def _descendant(elem, name):
+    return next(elem.iter(f"{{*}}{name}"), None)
 
-def parse_transactions(root):
-    transactions = []
-    transaction_players = []
-    players = []
 
-    for txn in iter_elements(root, "transaction"):
-        transaction_key = find_child_text(txn, "transaction_key")
-        if not transaction_key:
-            continue
-        transactions.append(
-            {
-                "transaction_key": transaction_key,
-                "type": find_child_text(txn, "type"),
-                "status": find_child_text(txn, "status"),
-                "timestamp": _to_int(find_child_text(txn, "timestamp")),
-            }
-        )
-
-        players_elem = find_descendant(txn, "players")
-        if players_elem is not None:
-            for player in iter_elements(players_elem, "player"):
-                player_key = find_child_text(player, "player_key")
-                if not player_key:
-                    continue
-                txn_data = find_descendant(player, "transaction_data")
-                transaction_players.append(
-                    {
-                        "transaction_key": transaction_key,
-                        "player_key": player_key,
-                        "transaction_type": find_descendant_text(txn_data, "type"),
-                        "source_type": find_descendant_text(txn_data, "source_type"),
-                        "source_team_key": find_descendant_text(txn_data, "source_team_key"),
-                        "destination_type": find_descendant_text(txn_data, "destination_type"),
-                        "destination_team_key": find_descendant_text(txn_data, "destination_team_key"),
-                    }
-                )
-                players.append(_parse_player_core(player))
-
-    return transactions, transaction_players, _dedupe(players, "player_key")
-
-
-def parse_draft_results(root):
-    results = []
-
-    for draft_result in iter_elements(root, "draft_result"):
-        keeper = find_child_text(draft_result, "keeper") or find_child_text(draft_result, "is_keeper")
-        autopick = find_child_text(draft_result, "autopick") or find_child_text(draft_result, "is_autopick")
-        results.append(
-            {
-                "round": _to_int(find_child_text(draft_result, "round")),
-                "pick": _to_int(find_child_text(draft_result, "pick")),
-                "team_key": find_child_text(draft_result, "team_key"),
-                "player_key": find_child_text(draft_result, "player_key"),
-                "cost": _to_float(find_child_text(draft_result, "cost")),
-                "is_keeper": _to_int(keeper),
-                "is_autopick": _to_int(autopick),
-            }
+def _descendant_text(elem, name):
+    if elem is None:
+        return ""
+    child = next(elem.iter(f"{{*}}{name}"), None)
+    if child is None:
+        return ""
+    return (child.text or "").strip()
+
+
+def _stat_xpaths(tag):
+    namespace = tag[1 : tag.index("}")] if tag.startswith("{") else None
+    xpaths = _STAT_XPATHS.get(namespace)
+    if xpaths is None:
+        prefix = "y:" if namespace else ""
+        namespaces = {"y": namespace} if namespace else None
+        xpaths = tuple(
+            etree.XPath(path.format(p=prefix), namespaces=namespaces, smart_strings=False)
+            for path in (
+                "count(.//{p}stat)",
+                ".//{p}stat/{p}stat_id/text()",
+                ".//{p}stat/{p}value/text()",
+            )
         )
+        _STAT_XPATHS[namespace] = xpaths
+    return xpaths
 
-    return results
 
+def _iter_stat_values(stats_parent):
+    count_stats, stat_ids, values = _stat_xpaths(stats_parent.tag)
+    ids = stat_ids(stats_parent)
+    vals = values(stats_parent)
+    if len(ids) == len(vals) == int(count_stats(stats_parent)):
+        for stat_id, value in zip(ids, vals):
+            stat_id = stat_id.strip()
+            if stat_id:
+                yield stat_id, value.strip()
+        return
 
-def _parse_player_core(player):
-    name_full = ""
-    name_elem = find_descendant(player, "name")
-    if name_elem is not None:
-        name_full = find_descendant_text(name_elem, "full")
-    return {
-        "player_key": find_child_text(player, "player_key"),
-        "player_id": find_child_text(player, "player_id"),
-        "name_full": name_full,
-        "position": find_child_text(player, "display_position"),
-        "editorial_team_abbr": find_child_text(player, "editorial_team_abbr"),
-    }
+    for stat in stats_parent.iter("{*}stat"):
+        stat_id = _descendant_text(stat, "stat_id")
+        if stat_id:
+            yield stat_id, _descendant_text(stat, "value")
 
 
-def _extract_points(team):
-    team_points = find_descendant(team, "team_points")
-    if team_points is not None:
-        value = find_descendant_text(team_points, "total")
-        if value:
-            return value
-        value = find_descendant_text(team_points, "points")
-        if value:
-            return value
-    return find_descendant_text(team, "points")
+def _player_row(player, player_key):
+    return (
+        player_key,
+        _child_text(player, "player_id"),
+        _descendant_text(_descendant(player, "name"), "full"),
+        _child_text(player, "display_position"),
+        _child_text(player, "editorial_team_abbr"),
+    )
 
 
-def _extract_projected_points(team):
-    projected = find_descendant(team, "team_projected_points")
-    if projected is not None:
-        value = find_descendant_text(projected, "total")
+def _stream_points(team, container, fallback):
+    points = _descendant(team, container)
+    if points is not None:
+        value = _descendant_text(points, "total")
         if value:
             return value
-        value = find_descendant_text(projected, "points")
+        value = _descendant_text(points, "points")
         if value:
             return value
-    return find_descendant_text(team, "projected_points")
+    return _descendant_text(team, fallback)
 
 
 def _dedupe(items, key_name):
@@ -0,0 +1,164 @@
+import json
+
+TOTAL_POINTS_QUERY = """
+    FROM stat_definitions d
+    JOIN player_stat_values v ON v.league_key = ? AND v.stat_id = d.stat_id
+    JOIN player_refs p ON p.player_ref = v.player_ref
+    WHERE d.stat_key = 'player_points' AND v.value IS NOT NULL
+"""
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_stat_modifiers(settings_json):
+    if not settings_json:
+        return {}
+    try:
+        modifiers = json.loads(settings_json)
+    except json.JSONDecodeError:
+        return {}
+    parsed = {}
+    for item in modifiers:
+        stat_id = item.get("stat_id")
+        if stat_id is None:
+            continue
+        value = _to_float(item.get("value"))
+        if value is None:
+            continue
+        parsed[str(stat_id)] = value
+    return parsed
+
+
+def insert_stat_points(conn, league_key):
+    conn.execute(
+        """
+        INSERT INTO player_week_points (league_key, player_key, week, points, source)
+        SELECT ?, roster_weeks.player_key, v.week, SUM(v.value * m.modifier), 'stats'
+        FROM (
+            SELECT DISTINCT r.week, r.player_key, p.player_ref
+            FROM rosters r
+            JOIN player_refs p ON p.player_key = r.player_key
+            WHERE r.league_key = ?
+        ) roster_weeks
+        JOIN player_week_stat_values v
+          ON v.game_key = ?
+         AND v.player_ref = roster_weeks.player_ref
+         AND v.week = roster_weeks.week
+        JOIN league_stat_modifiers m ON m.league_key = ? AND m.stat_id = v.stat_id
+        WHERE v.value IS NOT NULL
+        GROUP BY roster_weeks.player_key, v.week
+        """,
+        (league_key, league_key, league_key.split(".l.")[0], league_key),
+    )
+
+
+def has_total_points(conn, league_key):
+    return conn.execute(f"SELECT 1 {TOTAL_POINTS_QUERY} LIMIT 1", (league_key,)).fetchone() is not None
+
+
+def insert_total_points(conn, league_key):
+    conn.execute(
+        "INSERT INTO player_week_points (league_key, player_key, week, points, source) "
+        f"SELECT v.league_key, p.player_key, v.week, v.value, 'player_points' {TOTAL_POINTS_QUERY}",
+        (league_key,),
+    )
+
+
+def weeks_without_points(conn, league_key, weeks):
+    if not conn.execute("SELECT 1 FROM league_stat_modifiers WHERE league_key = ? LIMIT 1", (league_key,)).fetchone():
+        return []
+    zero_weeks = {
+        row[0]
+        for row in conn.execute(
+            """
+            SELECT roster_weeks.week
+            FROM (
+                SELECT DISTINCT r.week, p.player_ref
+                FROM rosters r
+                LEFT JOIN player_refs p ON p.player_key = r.player_key
+                WHERE r.league_key = ?
+            ) roster_weeks
+            LEFT JOIN player_week_stat_values v
+              ON v.game_key = ?
+             AND v.player_ref = roster_weeks.player_ref
+             AND v.week = roster_weeks.week
+            LEFT JOIN league_stat_modifiers m ON m.league_key = ? AND m.stat_id = v.stat_id
+            GROUP BY roster_weeks.week
+            HAVING COALESCE(MAX(ABS(v.value * m.modifier)), 0) = 0
+            """,
+            (league_key, league_key.split(".l.")[0], league_key),
+        )
+    }
+    total_weeks = {row[0] for row in conn.execute(f"SELECT DISTINCT v.week {TOTAL_POINTS_QUERY}", (league_key,))}
+    return sorted(week for week in weeks if week in zero_weeks and week not in total_weeks)
+
+
+def mark_stale(conn, league_keys):
+    conn.executemany(
+        "INSERT OR IGNORE INTO player_week_points_stale (league_key) VALUES (?)",
+        [(league_key,) for league_key in league_keys],
+    )
+
+
+def _stored_points(conn, league_key):
+    rows = conn.execute(
+        "SELECT player_key, week, points, source FROM player_week_points WHERE league_key = ? ORDER BY player_key, week",
+        (league_key,),
+    )
+    return [tuple(row) for row in rows]
+
+
+def refresh_player_week_points(conn, league_keys=None, on_change=None):
+    if league_keys is None:
+        league_keys = [row[0] for row in conn.execute("SELECT league_key FROM player_week_points_stale ORDER BY league_key")]
+    for league_key in league_keys:
+        before = _stored_points(conn, league_key) if on_change else None
+        conn.execute("DELETE FROM player_week_points WHERE league_key = ?", (league_key,))
+        insert_stat_points(conn, league_key)
+        max_points = conn.execute("SELECT MAX(points) FROM player_week_points WHERE league_key = ?", (league_key,)).fetchone()[0]
+        if not max_points and has_total_points(conn, league_key):
+            conn.execute("DELETE FROM player_week_points WHERE league_key = ?", (league_key,))
+            insert_total_points(conn, league_key)
+        if on_change and _stored_points(conn, league_key) != before:
+            on_change(conn, league_key)
+        conn.execute("DELETE FROM player_week_points_stale WHERE league_key = ?", (league_key,))
+        conn.commit()
+    return len(league_keys)
+
+
+def load_player_week_points(conn, league_key):
+    rows = conn.execute(
+        "SELECT player_key, week, points FROM player_week_points WHERE league_key = ?",
+        (league_key,),
+    ).fetchall()
+    return {(row[0], row[1]): row[2] for row in rows}
+
+
+def load_player_week_ranks(conn, league_key):
+    rows = conn.execute(
+        """
+        SELECT player_key, week, RANK() OVER (PARTITION BY week ORDER BY points DESC)
+        FROM player_week_points
+        WHERE league_key = ?
+        """,
+        (league_key,),
+    ).fetchall()
+    return {(row[0], row[1]): row[2] for row in rows}
+
+
+def load_player_season_totals(conn, league_key):
+    rows = conn.execute(
+        """
+        SELECT player_key, SUM(points), ROW_NUMBER() OVER (ORDER BY SUM(points) DESC, player_key)
+        FROM player_week_points
+        WHERE league_key = ?
+        GROUP BY player_key
+        """,
+        (league_key,),
+    ).fetchall()
+    return {row[0]: row[1] for row in rows}, {row[0]: row[2] for row in rows}
@@ -0,0 +1,194 @@
+import atexit
+import json
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+import requests
+
+from yahoo_client import api_get_response
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+STATE_PATH = BASE_DIR / "data" / "processed" / "rate_limit.json"
+
+DEFAULT_RATE = 1 / 0.6
+MIN_RATE = 0.05
+MAX_RATE = 10.0
+BURST = 2
+INCREASE_STEP = 0.1
+INCREASE_EVERY = 20
+DECREASE_FACTOR = 0.5
+DECREASE_COOLDOWN_SECONDS = 10
+THROTTLE_STATUSES = {429, 999}
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504, 999}
+BACKOFF_INITIAL_SECONDS = 5
+MAX_BACKOFF_SECONDS = 300
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                self._refill(time.monotonic())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_seconds = (1 - self.tokens) / self.rate
+            time.sleep(wait_seconds)
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    def __init__(self, rate=DEFAULT_RATE, capacity=BURST, state_path=STATE_PATH, max_rate=MAX_RATE):
+        self.max_rate = max_rate
+        super().__init__(self._clamp(rate), capacity=capacity)
+        self.state_path = state_path
+        self.successes = 0
+        self.throttles = 0
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+
+    @classmethod
+    def load(cls, state_path=STATE_PATH):
+        rate = DEFAULT_RATE
+        if state_path.exists():
+            try:
+                state = json.loads(state_path.read_text(encoding="utf-8"))
+                rate = float(state.get("rate") or DEFAULT_RATE)
+            except (json.JSONDecodeError, TypeError, ValueError):
+                rate = DEFAULT_RATE
+        return cls(rate=rate, state_path=state_path)
+
+    def save(self):
+        with self.lock:
+            payload = {
+                "rate": round(self.rate, 4),
+                "throttles": self.throttles,
+                "saved_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        self.state_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+    def _clamp(self, rate):
+        return max(MIN_RATE, min(self.max_rate, rate))
+
+    def _set_rate(self, rate):
+        self._refill(time.monotonic())
+        self.rate = self._clamp(rate)
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                wait_seconds = self.paused_until - time.monotonic()
+            if wait_seconds <= 0:
+                break
+            time.sleep(wait_seconds)
+        super().acquire()
+
+    def on_success(self):
+        with self.lock:
+            self.successes += 1
+            if self.successes >= INCREASE_EVERY:
+                self.successes = 0
+                self._set_rate(self.rate + INCREASE_STEP)
+
+    def on_throttle(self, pause_seconds):
+        now = time.monotonic()
+        with self.lock:
+            self.successes = 0
+            self.throttles += 1
+            self.paused_until = max(self.paused_until, now + pause_seconds)
+            if now - self.last_decrease >= DECREASE_COOLDOWN_SECONDS:
+                self.last_decrease = now
+                self._set_rate(self.rate * DECREASE_FACTOR)
+        self.save()
+
+
+_LIMITER = None
+
+
+def get_limiter():
+    global _LIMITER
+    if _LIMITER is None:
+        _LIMITER = AdaptiveRateLimiter.load()
+        atexit.register(_LIMITER.save)
+    return _LIMITER
+
+
+def backoff_seconds(attempts):
+    delay = min(MAX_BACKOFF_SECONDS, BACKOFF_INITIAL_SECONDS * (2 ** (attempts - 1)))
+    jitter = random.uniform(0.85, 1.15)
+    return min(MAX_BACKOFF_SECONDS, delay * jitter)
+
+
+def parse_retry_after(value):
+    if not value:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return min(MAX_BACKOFF_SECONDS, int(value))
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return min(MAX_BACKOFF_SECONDS, max(0.0, retry_at.timestamp() - time.time()))
+
+
+def get_with_retry(limiter, endpoint, params=None):
+    attempts = 0
+    while True:
+        limiter.acquire()
+        try:
+            response = api_get_response(endpoint, params=params)
+        except requests.exceptions.RequestException as exc:
+            attempts += 1
+            wait_seconds = backoff_seconds(attempts)
+            print(
+                f"Network error for {endpoint}: {exc}. "
+                f"Retrying in {wait_seconds:.1f}s (attempt {attempts})."
+            )
+            time.sleep(wait_seconds)
+            continue
+
+        status_code = response.status_code
+        if status_code in THROTTLE_STATUSES:
+            attempts += 1
+            wait_seconds = parse_retry_after(response.headers.get("Retry-After"))
+            if wait_seconds is None:
+                wait_seconds = backoff_seconds(attempts)
+            limiter.on_throttle(wait_seconds)
+            print(
+                f"Request throttled ({status_code}) for {endpoint}. "
+                f"Rate now {limiter.rate:.2f}/s, retrying in {wait_seconds:.1f}s (attempt {attempts})."
+            )
+            continue
+
+        if status_code in RETRYABLE_STATUSES:
+            attempts += 1
+            wait_seconds = backoff_seconds(attempts)
+            print(
+                f"Server error ({status_code}) for {endpoint}. "
+                f"Retrying in {wait_seconds:.1f}s (attempt {attempts})."
+            )
+            time.sleep(wait_seconds)
+            continue
+
+        limiter.on_success()
+        return response
@@ -1,54 +1,62 @@
+import gzip
 import hashlib
-import time
+import os
+import threading
 from pathlib import Path
 
-ILLEGAL_CHARS = '<>:"/\\|?*'
-
-
-def _sanitize(value):
-    cleaned = "".join("_" if ch in ILLEGAL_CHARS else ch for ch in value)
-    cleaned = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in cleaned)
-    return cleaned.strip("._")
-
-
-def _params_to_string(params):
-    if not params:
-        return ""
-    if isinstance(params, str):
-        return params
-    if isinstance(params, dict):
-        parts = [f"{k}={v}" for k, v in sorted(params.items())]
-        return "&".join(parts)
-    return str(params)
-
-
-def save_raw_xml(base_dir, season, league_key, endpoint, params, xml_bytes, counter):
-    timestamp = time.strftime("%Y%m%d_%H%M%S")
-    endpoint_slug = _sanitize(endpoint.strip("/").replace("/", "_"))
-    params_str = _params_to_string(params)
-    params_slug = _sanitize(params_str)
-
-    name_parts = [f"{counter:06d}", endpoint_slug]
-    if params_slug:
-        if len(params_slug) > 80:
-            params_hash = hashlib.md5(params_str.encode("utf-8")).hexdigest()
-            name_parts.append(params_hash)
-        else:
-            name_parts.append(params_slug)
-    name_parts.append(timestamp)
-
-    file_name = "__".join(part for part in name_parts if part) + ".xml"
-    raw_dir = Path(base_dir) / "data" / "raw" / str(season) / str(league_key or "unknown")
-    raw_dir.mkdir(parents=True, exist_ok=True)
-
-    file_path = raw_dir / file_name
-    if len(file_name) > 150 or len(str(file_path)) > 240:
-        name_hash = hashlib.md5(file_name.encode("utf-8")).hexdigest()
-        file_name = f"{counter:06d}__{endpoint_slug}__{name_hash}__{timestamp}.xml"
-        file_path = raw_dir / file_name
-    if len(str(file_path)) > 240:
-        base_hash = hashlib.md5(f"{endpoint}|{params_str}".encode("utf-8")).hexdigest()
-        file_name = f"{counter:06d}__{base_hash}__{timestamp}.xml"
-        file_path = raw_dir / file_name
-    file_path.write_bytes(xml_bytes)
-    return str(file_path)
+BASE_DIR = Path(__file__).resolve().parents[1]
+BLOB_SUFFIXES = {"xml": ".xml.gz", "json": ".json.gz"}
+COMPRESS_LEVEL = 6
+
+
+def blob_dir(base_dir=BASE_DIR):
+    return Path(base_dir) / "data" / "raw" / "blobs"
+
+
+def hash_body(body):
+    return hashlib.sha256(body).hexdigest()
+
+
+def blob_path(base_dir, body_hash, response_format="xml"):
+    return blob_dir(base_dir) / body_hash[:2] / f"{body_hash}{BLOB_SUFFIXES[response_format]}"
+
+
+def save_blob(base_dir, body, response_format="xml"):
+    body_hash = hash_body(body)
+    path = blob_path(base_dir, body_hash, response_format)
+    if path.exists():
+        return body_hash
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(gzip.compress(body, compresslevel=COMPRESS_LEVEL, mtime=0))
+    os.replace(tmp_path, path)
+    return body_hash
+
+
+def load_blob(base_dir, body_hash, response_format="xml"):
+    path = blob_path(base_dir, body_hash, response_format)
+    if not path.exists():
+        return None
+    return gzip.decompress(path.read_bytes())
+
+
+def iter_blobs(base_dir=BASE_DIR):
+    root = blob_dir(base_dir)
+    if not root.exists():
+        return
+    for path in root.glob("*/*.gz"):
+        yield path.name.split(".", 1)[0], path
+
+
+def load_raw_body(body_hash, file_path, body, base_dir=BASE_DIR, response_format="xml"):
+    if body_hash:
+        data = load_blob(base_dir, body_hash, response_format or "xml")
+        if data is not None:
+            return data
+    if file_path:
+        path = Path(file_path)
+        if path.exists():
+            return path.read_bytes()
+    if body:
+        return body.encode("utf-8", errors="replace")
+    return None
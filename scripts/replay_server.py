@@ -0,0 +1,198 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from db import DB_PATH, connect_db, init_db
+from rate_limit import TokenBucket
+from raw_store import BASE_DIR, load_raw_body
+
+API_PREFIX = "/fantasy/v2"
+CONTENT_TYPES = {
+    "xml": "application/xml; charset=utf-8",
+    "json": "application/json; charset=utf-8",
+}
+NOT_FOUND_BODY = (
+    b'<?xml version="1.0" encoding="UTF-8"?>\n'
+    b'<error xmlns="http://www.yahooapis.com/v1/base.rng">'
+    b"<description>No archived response for this request.</description></error>"
+)
+
+
+def _params_key(params):
+    if not params:
+        return None
+    if isinstance(params, str):
+        try:
+            params = json.loads(params)
+        except json.JSONDecodeError:
+            return params
+    return json.dumps({str(k): str(v) for k, v in params.items()}, sort_keys=True)
+
+
+def build_index(conn):
+    index = {}
+    rows = conn.execute(
+        "SELECT id, endpoint, params, http_status, response_format FROM raw_responses ORDER BY id"
+    ).fetchall()
+    for row in rows:
+        index[(row[1], _params_key(row[2]))] = (row[0], row[3], row[4])
+    return index
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        db_path=DB_PATH,
+        latency_ms=0,
+        jitter_ms=0,
+        throttle_rate=0.0,
+        throttle_status=429,
+        retry_after=None,
+        max_rps=None,
+        raw_base_dir=BASE_DIR,
+    ):
+        super().__init__(address, ReplayHandler)
+        self.raw_base_dir = raw_base_dir
+        self.conn = connect_db(db_path, check_same_thread=False)
+        init_db(self.conn)
+        self.conn_lock = threading.Lock()
+        self.index = build_index(self.conn)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.throttle_rate = throttle_rate
+        self.throttle_status = throttle_status
+        self.retry_after = retry_after
+        self.bucket = TokenBucket(max_rps, capacity=max(1, int(max_rps))) if max_rps else None
+        self.stats_lock = threading.Lock()
+        self.served = 0
+        self.throttled = 0
+        self.missing = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def load_body(self, row_id):
+        with self.conn_lock:
+            row = self.conn.execute(
+                "SELECT body_hash, file_path, body, response_format FROM raw_responses WHERE id = ?",
+                (row_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return load_raw_body(*row[:3], base_dir=self.raw_base_dir, response_format=row[3])
+
+    def should_throttle(self):
+        if self.throttle_rate and random.random() < self.throttle_rate:
+            return True
+        if self.bucket is None:
+            return False
+        with self.bucket.lock:
+            self.bucket._refill(time.monotonic())
+            if self.bucket.tokens >= 1:
+                self.bucket.tokens -= 1
+                return False
+        return True
+
+    def count(self, field):
+        with self.stats_lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        delay_ms = server.latency_ms + random.uniform(0, server.jitter_ms)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+        if server.should_throttle():
+            server.count("throttled")
+            headers = {}
+            if server.retry_after is not None:
+                headers["Retry-After"] = str(server.retry_after)
+            self._send(server.throttle_status, b"", headers)
+            return
+
+        url = urlsplit(self.path)
+        endpoint = unquote(url.path)
+        if endpoint.startswith(API_PREFIX):
+            endpoint = endpoint[len(API_PREFIX):]
+        params = dict(parse_qsl(url.query)) or None
+        entry = server.index.get((endpoint, _params_key(params)))
+        body = server.load_body(entry[0]) if entry else None
+        if body is None:
+            server.count("missing")
+            self._send(404, NOT_FOUND_BODY)
+            return
+
+        server.count("served")
+        self._send(entry[1] or 200, body, content_type=CONTENT_TYPES.get(entry[2]))
+
+    def _send(self, status, body, headers=None, content_type=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type or CONTENT_TYPES["xml"])
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(host="127.0.0.1", port=0, **options):
+    server = ReplayServer((host, port), **options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve archived Yahoo responses as a local Fantasy API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--db", default=str(DB_PATH), help="SQLite database holding raw_responses.")
+    parser.add_argument("--base-dir", default=str(BASE_DIR), help="Project root holding data/raw/blobs.")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Fixed delay added to every response.")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Random extra delay up to this many ms.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests to throttle.")
+    parser.add_argument("--throttle-status", type=int, default=429, choices=(429, 999))
+    parser.add_argument("--retry-after", type=int, help="Retry-After seconds sent with throttled responses.")
+    parser.add_argument("--max-rps", type=float, help="Throttle requests above this sustained rate.")
+    args = parser.parse_args()
+
+    server = ReplayServer(
+        (args.host, args.port),
+        db_path=args.db,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        throttle_rate=args.throttle_rate,
+        throttle_status=args.throttle_status,
+        retry_after=args.retry_after,
+        max_rps=args.max_rps,
+        raw_base_dir=args.base_dir,
+    )
+    print(f"Replaying {len(server.index)} archived responses at {server.base_url}")
+    print(f"Point the sync at it with YAHOO_API_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
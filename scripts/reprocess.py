@@ -0,0 +1,392 @@
+import argparse
+import os
+import sqlite3
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from db import connect_db, init_db, upsert_many, write_batch
+from parse_yahoo_xml import (
+    DRAFT_RESULT_COLUMNS,
+    MATCHUP_COLUMNS,
+    MATCHUP_TEAM_COLUMNS,
+    PLAYER_COLUMNS,
+    PLAYER_STATS_COLUMNS,
+    PLAYER_WEEK_STATS_COLUMNS,
+    ROSTER_COLUMNS,
+    STANDINGS_COLUMNS,
+    TEAM_COLUMNS,
+    TEAM_STATS_COLUMNS,
+    TRANSACTION_COLUMNS,
+    TRANSACTION_PLAYER_COLUMNS,
+)
+from parse_cache import load_parsed, parser_name, save_parsed
+from raw_store import BASE_DIR, load_raw_body
+from response_formats import get_parsers
+
+FETCH_CHUNK_SIZE = 200
+TASK_CHUNK_SIZE = 8
+MAX_PENDING_PER_WORKER = 4
+DEFAULT_WORKERS = os.cpu_count() or 1
+BODY_CONNECTIONS = {}
+LEAGUE_COLUMNS = ("league_key", "league_id", "name", "season", "game_key")
+SETTINGS_COLUMNS = (
+    "league_key",
+    "start_week",
+    "end_week",
+    "playoff_start_week",
+    "num_teams",
+    "scoring_type",
+    "roster_positions",
+    "stat_categories",
+    "stat_modifiers",
+)
+
+
+def derive_league(response, body):
+    parsers = get_parsers(response["response_format"])
+    meta = parsers.parse_league_meta(parsers.parse_document(body))
+    if not meta.get("league_key"):
+        return {}
+    league_key = meta["league_key"]
+    return {
+        "leagues": [(
+            league_key,
+            meta.get("league_id"),
+            meta.get("name"),
+            meta.get("season") or response["season"],
+            meta.get("game_key") or league_key.split(".l.")[0],
+        )],
+    }
+
+
+def derive_settings(response, body):
+    parsers = get_parsers(response["response_format"])
+    settings = parsers.parse_settings(parsers.parse_document(body))
+    if not settings:
+        return {}
+    settings["league_key"] = response["league_key"]
+    return {"league_settings": [tuple(settings.get(col) for col in SETTINGS_COLUMNS)]}
+
+
+def derive_teams(response, body):
+    parsers = get_parsers(response["response_format"])
+    return {"teams": parsers.stream_teams(body, response["league_key"])}
+
+
+def derive_standings(response, body):
+    parsers = get_parsers(response["response_format"])
+    return {"standings": parsers.stream_standings(body, response["league_key"])}
+
+
+def derive_draft_results(response, body):
+    parsers = get_parsers(response["response_format"])
+    return {"draft_results": parsers.stream_draft_results(body, response["league_key"])}
+
+
+def derive_scoreboard(response, body):
+    parsers = get_parsers(response["response_format"])
+    matchups, matchup_teams = parsers.stream_matchups(body, response["league_key"], response["week"])
+    return {"matchups": matchups, "matchup_teams": matchup_teams}
+
+
+def derive_roster(response, body):
+    parsers = get_parsers(response["response_format"])
+    rosters, players = parsers.stream_roster(body, response["league_key"], response["week"])
+    return {"rosters": rosters, "players": players}
+
+
+def derive_roster_stats(response, body):
+    parsers = get_parsers(response["response_format"])
+    league_key = response["league_key"]
+    rosters, players, player_week_stats, player_points = parsers.stream_roster_stats(
+        body, league_key, league_key.split(".l.")[0], response["week"]
+    )
+    return {
+        "rosters": rosters,
+        "players": players,
+        "player_week_stats": player_week_stats,
+        "player_stats": player_points,
+    }
+
+
+def derive_team_stats(response, body):
+    parsers = get_parsers(response["response_format"])
+    return {"team_stats": parsers.stream_team_stats(body, response["league_key"], response["week"])}
+
+
+def derive_player_stats(response, body):
+    parsers = get_parsers(response["response_format"])
+    player_stats, players = parsers.stream_player_stats(body, response["league_key"], response["week"])
+    game_key = response["league_key"].split(".l.")[0]
+    player_week_stats = [(game_key, *row[1:]) for row in player_stats if row[3] != "player_points"]
+    player_points = [row for row in player_stats if row[3] == "player_points"]
+    return {"player_stats": player_points, "player_week_stats": player_week_stats, "players": players}
+
+
+def derive_player_week_stats(response, body):
+    parsers = get_parsers(response["response_format"])
+    game_key = response["league_key"].split(".l.")[0]
+    player_week_stats, players = parsers.stream_player_week_stats(body, game_key, response["week"])
+    return {"player_week_stats": player_week_stats, "players": players}
+
+
+def derive_transactions(response, body):
+    parsers = get_parsers(response["response_format"])
+    transactions, transaction_players, players = parsers.stream_transactions(body, response["league_key"])
+    return {"transactions": transactions, "transaction_players": transaction_players, "players": players}
+
+
+HANDLERS = {
+    "league": derive_league,
+    "settings": derive_settings,
+    "teams": derive_teams,
+    "standings": derive_standings,
+    "draftresults": derive_draft_results,
+    "scoreboard": derive_scoreboard,
+    "roster": derive_roster,
+    "roster_stats": derive_roster_stats,
+    "team_stats": derive_team_stats,
+    "player_stats": derive_player_stats,
+    "player_week_stats": derive_player_week_stats,
+    "transactions": derive_transactions,
+}
+HANDLER_PARSERS = {
+    "league": "parse_league_meta",
+    "settings": "parse_settings",
+    "teams": "stream_teams",
+    "standings": "stream_standings",
+    "draftresults": "stream_draft_results",
+    "scoreboard": "stream_matchups",
+    "roster": "stream_roster",
+    "roster_stats": "stream_roster_stats",
+    "team_stats": "stream_team_stats",
+    "player_stats": "stream_player_stats",
+    "player_week_stats": "stream_player_week_stats",
+    "transactions": "stream_transactions",
+}
+WEEKLY_KINDS = {"scoreboard", "roster", "roster_stats", "team_stats", "player_stats", "player_week_stats"}
+TABLE_COLUMNS = {
+    "leagues": LEAGUE_COLUMNS,
+    "league_settings": SETTINGS_COLUMNS,
+    "teams": TEAM_COLUMNS,
+    "standings": STANDINGS_COLUMNS,
+    "draft_results": DRAFT_RESULT_COLUMNS,
+    "matchups": MATCHUP_COLUMNS,
+    "matchup_teams": MATCHUP_TEAM_COLUMNS,
+    "rosters": ROSTER_COLUMNS,
+    "players": PLAYER_COLUMNS,
+    "team_stats": TEAM_STATS_COLUMNS,
+    "player_stats": PLAYER_STATS_COLUMNS,
+    "player_week_stats": PLAYER_WEEK_STATS_COLUMNS,
+    "transactions": TRANSACTION_COLUMNS,
+    "transaction_players": TRANSACTION_PLAYER_COLUMNS,
+}
+
+
+def iter_raw_responses(conn, kinds, season=None, league_key=None, chunk_size=FETCH_CHUNK_SIZE):
+    placeholders = ",".join("?" for _ in kinds)
+    query = f"""
+        SELECT id, season, league_key, endpoint_kind, week, response_format, body_hash, file_path,
+               body IS NOT NULL AS has_body
+        FROM raw_responses
+        WHERE id > ?
+          AND http_status = 200
+          AND league_key IS NOT NULL
+          AND endpoint_kind IN ({placeholders})
+    """
+    filters = list(kinds)
+    if season:
+        query += " AND season = ?"
+        filters.append(str(season))
+    if league_key:
+        query += " AND league_key = ?"
+        filters.append(league_key)
+    query += " ORDER BY id LIMIT ?"
+
+    last_id = 0
+    while True:
+        rows = conn.execute(query, (last_id, *filters, chunk_size)).fetchall()
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1]["id"]
+
+
+def database_path(conn):
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+
+def stored_body(db_path, response_id):
+    if not db_path:
+        return None
+    conn = BODY_CONNECTIONS.get(db_path)
+    if conn is None:
+        conn = BODY_CONNECTIONS[db_path] = sqlite3.connect(f"{Path(db_path).as_uri()}?mode=ro", uri=True)
+    row = conn.execute("SELECT body FROM raw_responses WHERE id = ?", (response_id,)).fetchone()
+    return row[0] if row else None
+
+
+def derive_response(task, base_dir=BASE_DIR, db_path=None):
+    kind, meta, body_hash, file_path, body_id = task
+    if kind in WEEKLY_KINDS and meta["week"] is None:
+        return None
+    response_format = meta["response_format"]
+    data = load_raw_body(body_hash, file_path, None, base_dir=base_dir, response_format=response_format)
+    if data is None and body_id is not None:
+        data = load_raw_body(None, None, stored_body(db_path, body_id))
+    if not data:
+        return None
+    try:
+        return HANDLERS[kind](meta, data)
+    except get_parsers(response_format).PARSE_ERRORS:
+        return None
+
+
+def derive_chunk(tasks, base_dir=BASE_DIR, db_path=None):
+    return [derive_response(task, base_dir, db_path) for task in tasks]
+
+
+def iter_tasks(responses):
+    for response in responses:
+        meta = {
+            "season": response["season"],
+            "league_key": response["league_key"],
+            "week": response["week"],
+            "response_format": response["response_format"],
+        }
+        body_id = response["id"] if response["has_body"] else None
+        yield (response["endpoint_kind"], meta, response["body_hash"], response["file_path"], body_id)
+
+
+def lookup_cached(conn, task):
+    kind, meta, body_hash = task[:3]
+    if not body_hash:
+        return None
+    parser = parser_name(meta["response_format"], HANDLER_PARSERS[kind])
+    return load_parsed(conn, body_hash, parser, meta["league_key"], meta["week"])
+
+
+def store_cached(conn, task, derived):
+    kind, meta, body_hash = task[:3]
+    if body_hash:
+        parser = parser_name(meta["response_format"], HANDLER_PARSERS[kind])
+        save_parsed(conn, body_hash, parser, meta["league_key"], meta["week"], derived)
+
+
+def merge_results(chunk, cached, derived):
+    derived = iter(derived)
+    for task, hit in zip(chunk, cached):
+        if hit is not None:
+            yield task, hit, True
+        else:
+            yield task, next(derived), False
+
+
+def iter_derived(tasks, workers=1, base_dir=BASE_DIR, lookup=None, db_path=None):
+    if workers <= 1:
+        for task in tasks:
+            hit = lookup(task) if lookup else None
+            if hit is not None:
+                yield task, hit, True
+            else:
+                yield task, derive_response(task, base_dir, db_path), False
+        return
+
+    tasks = iter(tasks)
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            chunk = list(islice(tasks, TASK_CHUNK_SIZE))
+            if chunk:
+                cached = [lookup(task) if lookup else None for task in chunk]
+                misses = [task for task, hit in zip(chunk, cached) if hit is None]
+                future = executor.submit(derive_chunk, misses, base_dir, db_path) if misses else None
+                pending.append((chunk, cached, future))
+            if pending and (not chunk or len(pending) >= workers * MAX_PENDING_PER_WORKER):
+                done_chunk, cached, future = pending.popleft()
+                yield from merge_results(done_chunk, cached, future.result() if future else ())
+            if not chunk and not pending:
+                return
+
+
+def reprocess(conn, kinds=None, season=None, league_key=None, workers=1, base_dir=BASE_DIR, use_cache=True):
+    kinds = tuple(kinds or HANDLERS)
+    responses = Counter()
+    rows_written = Counter()
+    skipped = 0
+    cache_hits = 0
+    lookup = partial(lookup_cached, conn) if use_cache else None
+    raw_rows = iter_raw_responses(conn, kinds, season=season, league_key=league_key)
+    with write_batch(conn):
+        tasks = iter_tasks(raw_rows)
+        derived_tasks = iter_derived(tasks, workers=workers, base_dir=base_dir, lookup=lookup, db_path=database_path(conn))
+        for task, derived, from_cache in derived_tasks:
+            if derived is None:
+                skipped += 1
+                continue
+            if from_cache:
+                cache_hits += 1
+            elif use_cache:
+                store_cached(conn, task, derived)
+            for table, rows in derived.items():
+                upsert_many(conn, table, TABLE_COLUMNS[table], rows)
+                rows_written[table] += len(rows)
+            responses[task[0]] += 1
+    return responses, rows_written, skipped, cache_hits
+
+
+def main(kinds=None, description="Re-derive normalized tables from archived raw responses."):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--season", help="Process only the specified season.")
+    parser.add_argument("--league", "--only", dest="league_key", help="Process only the specified league_key.")
+    if kinds is None:
+        parser.add_argument(
+            "--kind",
+            dest="kinds",
+            action="append",
+            choices=sorted(HANDLERS),
+            help="Endpoint kind to reprocess (repeatable, defaults to all).",
+        )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Parser processes (1 parses in-process).",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Re-parse every response, ignoring parse_cache.")
+    args = parser.parse_args()
+
+    conn = connect_db()
+    init_db(conn)
+
+    started = time.perf_counter()
+    responses, rows_written, skipped, cache_hits = reprocess(
+        conn,
+        kinds=kinds or getattr(args, "kinds", None),
+        season=args.season,
+        league_key=args.league_key,
+        workers=max(1, args.workers),
+        use_cache=not args.no_cache,
+    )
+    elapsed = time.perf_counter() - started
+    conn.close()
+
+    if not responses and not skipped:
+        print("No matching responses found in raw_responses.")
+        return
+    for kind, count in sorted(responses.items()):
+        print(f"{kind}: {count} responses")
+    for table, count in sorted(rows_written.items()):
+        print(f"  {table}: {count} rows")
+    if skipped:
+        print(f"Skipped {skipped} responses without a usable body.")
+    if cache_hits:
+        print(f"Parse cache hits: {cache_hits}")
+    print(f"Reprocessed {sum(responses.values())} responses in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
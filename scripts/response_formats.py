@@ -0,0 +1,10 @@
+import parse_yahoo_json
+import parse_yahoo_xml
+from yahoo_client import DEFAULT_FORMAT
+
+PARSERS = {"xml": parse_yahoo_xml, "json": parse_yahoo_json}
+RESPONSE_FORMATS = tuple(PARSERS)
+
+
+def get_parsers(response_format=None):
+    return PARSERS[response_format or DEFAULT_FORMAT]
@@ -1,56 +1,83 @@
 import argparse
 import json
-import random
 import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
 from pathlib import Path
 
-import requests
-
-from db import connect_db, init_db, insert_raw_response, upsert_many
+from db import checkpoint, connect_db, init_db, insert_raw_response, upsert_many, write_batch
+from player_points import weeks_without_points
 from parse_yahoo_xml import (
-    parse_games,
-    parse_leagues,
-    parse_league_meta,
-    parse_settings,
-    parse_teams,
-    parse_standings,
-    parse_matchups,
-    parse_roster,
-    parse_team_stats,
-    parse_player_stats,
-    parse_transactions,
-    parse_draft_results,
+    DRAFT_RESULT_COLUMNS,
+    MATCHUP_COLUMNS,
+    MATCHUP_TEAM_COLUMNS,
+    PLAYER_COLUMNS,
+    PLAYER_STATS_COLUMNS,
+    PLAYER_WEEK_STATS_COLUMNS,
+    ROSTER_COLUMNS,
+    STANDINGS_COLUMNS,
+    TEAM_COLUMNS,
+    TEAM_STATS_COLUMNS,
+    TRANSACTION_COLUMNS,
+    TRANSACTION_PLAYER_COLUMNS,
+)
+from rate_limit import AdaptiveRateLimiter, get_limiter, get_with_retry
+from raw_store import save_blob
+from response_formats import RESPONSE_FORMATS, get_parsers
+from sync_plan import (
+    FULL,
+    completed_units,
+    load_settings,
+    load_team_keys,
+    PLAYER_BATCH_SIZE,
+    REPAIR,
+    TRANSACTION_PAGE_SIZE,
+    batched,
+    plan_league,
+    print_plan,
+    roster_player_keys,
+    sync_mode,
 )
-from raw_store import save_raw_xml
-from yahoo_client import api_get_response, load_config, parse_xml
+from yahoo_client import DEFAULT_FORMAT, load_config, with_format
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 
-REQUEST_SLEEP_SECONDS = 0.6
-TRANSACTION_PAGE_SIZE = 25
-PLAYER_BATCH_SIZE = 25
-STORE_RAW_BODY_IN_DB = True
-DEFAULT_START_WEEK = 1
-DEFAULT_END_WEEK = 17
+MAX_WORKERS = 4
+USE_COLLECTION_REQUESTS = True
+STORE_RAW_BODY_IN_DB = False
 FETCH_PLAYER_STATS = False
 PROGRESS_PATH = BASE_DIR / "data" / "processed" / "sync_progress.json"
 CACHED_LEAGUES_PATH = BASE_DIR / "data" / "processed" / "leagues.json"
-RETRYABLE_STATUSES = {429, 500, 502, 503, 504, 999}
-BACKOFF_INITIAL_SECONDS = 5
-MAX_BACKOFF_SECONDS = 300
+TEAM_WEEK_STATUSES = {200, 400, 404}
+FINAL_MATCHUP_STATUS = "postevent"
+SYNC_UNIT_COLUMNS = ("run_id", "league_key", "phase", "week", "unit", "completed_at")
 
 
 class SyncContext:
-    def __init__(self):
-        self.counter = 1
+    def __init__(
+        self,
+        workers=MAX_WORKERS,
+        use_collections=USE_COLLECTION_REQUESTS,
+        incremental=False,
+        limiter=None,
+        response_format=DEFAULT_FORMAT,
+        roster_stats=False,
+        repair=False,
+    ):
         self.request_count = 0
         self.last_log_time = time.time()
         self.log_every_seconds = 15
-
-    def next_counter(self):
-        value = self.counter
-        self.counter += 1
-        return value
+        self.workers = max(1, workers)
+        self.use_collections = use_collections
+        self.mode = sync_mode(incremental, repair)
+        self.roster_stats = roster_stats
+        self.raw_base_dir = BASE_DIR
+        self.limiter = limiter or get_limiter()
+        self.response_format = response_format
+        self.parsers = get_parsers(response_format)
+        self.player_weeks = defaultdict(set)
+        self.run_id = None
 
     def log(self, message, force=False):
         now = time.time()
@@ -70,80 +97,221 @@ class SyncContext:
         )
 
 
-def _sleep():
-    time.sleep(REQUEST_SLEEP_SECONDS)
+class FetchResult:
+    def __init__(
+        self,
+        endpoint,
+        params,
+        season,
+        league_key,
+        status_code,
+        body,
+        body_hash,
+        fetched_at,
+        response_format=DEFAULT_FORMAT,
+    ):
+        self.endpoint = endpoint
+        self.params = params
+        self.season = season
+        self.league_key = league_key
+        self.status_code = status_code
+        self.body = body
+        self.body_hash = body_hash
+        self.fetched_at = fetched_at
+        self.response_format = response_format
+
+
+class FetchJob:
+    def __init__(self, kind, week):
+        self.kind = kind
+        self.week = week
+        self.fetches = []
+        self.rosters = []
+        self.players = []
+        self.team_stats = []
+        self.player_stats = []
+        self.player_week_stats = []
+        self.fallback = []
+        self.units = []
+
+
+def request_xml(ctx, endpoint, params=None, season=None, league_key=None):
+    params = with_format(params, ctx.response_format)
+    response = get_with_retry(ctx.limiter, endpoint, params=params)
+    body = response.content
+    body_hash = save_blob(ctx.raw_base_dir, body, ctx.response_format)
+    return FetchResult(
+        endpoint,
+        params,
+        season,
+        league_key,
+        response.status_code,
+        body,
+        body_hash,
+        time.strftime("%Y-%m-%d %H:%M:%S"),
+        ctx.response_format,
+    )
 
 
-def fetch_xml(conn, ctx, endpoint, params=None, season=None, league_key=None, allow_statuses=None):
-    attempts = 0
-    while True:
-        try:
-            response = api_get_response(endpoint, params=params)
-            status_code = response.status_code
-        except requests.exceptions.RequestException as exc:
-            attempts += 1
-            delay = min(MAX_BACKOFF_SECONDS, BACKOFF_INITIAL_SECONDS * (2 ** (attempts - 1)))
-            jitter = random.uniform(0.85, 1.15)
-            wait_seconds = min(MAX_BACKOFF_SECONDS, delay * jitter)
-            print(
-                f"Network error for {endpoint}: {exc}. "
-                f"Retrying in {wait_seconds:.1f}s (attempt {attempts})."
-            )
-            time.sleep(wait_seconds)
-            continue
+def record_fetch(conn, result):
+    record = (
+        result.fetched_at,
+        str(result.season) if result.season is not None else None,
+        result.league_key,
+        result.endpoint,
+        json.dumps(result.params, ensure_ascii=True) if result.params else None,
+        result.status_code,
+        None,
+        result.body.decode("utf-8", errors="replace") if STORE_RAW_BODY_IN_DB else None,
+        result.body_hash,
+    )
+    insert_raw_response(conn, record, result.response_format)
+
+
+def check_status(ctx, result, allow_statuses=None):
+    if allow_statuses is None:
+        allow_statuses = {200}
+    if result.status_code not in allow_statuses:
+        raise RuntimeError(f"Request failed: {result.endpoint} ({result.status_code})")
+    if result.status_code != 200:
+        return None
+    ctx.note_request(
+        result.endpoint,
+        season=result.season,
+        league_key=result.league_key,
+        status_code=result.status_code,
+    )
+    return result.body
 
-        if status_code in RETRYABLE_STATUSES:
-            attempts += 1
-            delay = min(MAX_BACKOFF_SECONDS, BACKOFF_INITIAL_SECONDS * (2 ** (attempts - 1)))
-            jitter = random.uniform(0.85, 1.15)
-            wait_seconds = min(MAX_BACKOFF_SECONDS, delay * jitter)
-            print(
-                f"Request throttled ({status_code}) for {endpoint}. "
-                f"Retrying in {wait_seconds:.1f}s (attempt {attempts})."
-            )
-            time.sleep(wait_seconds)
-            continue
 
-        body = response.content
-        file_path = save_raw_xml(
-            BASE_DIR,
-            season or "unknown",
-            league_key or "unknown",
-            endpoint,
-            params,
-            body,
-            ctx.next_counter(),
-        )
+def fetch_xml(conn, ctx, endpoint, params=None, season=None, league_key=None, allow_statuses=None):
+    result = request_xml(ctx, endpoint, params=params, season=season, league_key=league_key)
+    record_fetch(conn, result)
+    return check_status(ctx, result, allow_statuses)
+
+
+def roster_endpoint(ctx, resource, week):
+    endpoint = f"{resource}/roster;week={week}"
+    if ctx.roster_stats:
+        endpoint += f"/players/stats;type=week;week={week}"
+    return endpoint
+
+
+def parse_roster(ctx, body, league_key, game_key, week):
+    if ctx.roster_stats:
+        return ctx.parsers.stream_roster_stats(body, league_key, game_key, week)
+    rosters, players = ctx.parsers.stream_roster(body, league_key, week)
+    return rosters, players, [], []
+
+
+def fetch_team_week(ctx, league_key, season, game_key, team_key, week, roster=True, stats=True):
+    job = FetchJob("team_week", week)
+    if roster:
+        endpoint = roster_endpoint(ctx, f"/team/{team_key}", week)
+        result = request_xml(ctx, endpoint, season=season, league_key=league_key)
+        job.fetches.append((result, TEAM_WEEK_STATUSES))
+        job.units.append(("roster", week, team_key))
+        if result.status_code != 200:
+            return job
+        parsed = parse_roster(ctx, result.body, league_key, game_key, week)
+        job.rosters, job.players, job.player_week_stats, job.player_stats = parsed
+
+    if stats:
+        result = request_xml(ctx, f"/team/{team_key}/stats;type=week;week={week}", season=season, league_key=league_key)
+        job.fetches.append((result, TEAM_WEEK_STATUSES))
+        job.units.append(("team_stats", week, team_key))
+        if result.status_code == 200:
+            job.team_stats = ctx.parsers.stream_team_stats(result.body, league_key, week)
+    return job
+
+
+def _parse_collection(ctx, result, parser, *args):
+    if result.status_code != 200:
+        return None
+    try:
+        return parser(result.body, *args)
+    except ctx.parsers.PARSE_ERRORS:
+        return None
+
+
+def listed_teams(ctx, result, league_key):
+    teams = _parse_collection(ctx, result, ctx.parsers.stream_teams, league_key) or []
+    return {row[0] for row in teams}
+
+
+def fetch_league_week(ctx, league_key, season, game_key, team_keys, week, roster=True, stats=True):
+    job = FetchJob("league_week", week)
+    roster_teams = set()
+    stats_teams = set()
+    if roster:
+        endpoint = roster_endpoint(ctx, f"/league/{league_key}/teams", week)
+        result = request_xml(ctx, endpoint, season=season, league_key=league_key)
+        job.fetches.append((result, TEAM_WEEK_STATUSES))
+        parsed = _parse_collection(ctx, result, partial(parse_roster, ctx), league_key, game_key, week)
+        if parsed is not None:
+            job.rosters, job.players, job.player_week_stats, job.player_stats = parsed
+        roster_teams = listed_teams(ctx, result, league_key) | {row[1] for row in job.rosters}
+
+    if stats:
+        endpoint = f"/league/{league_key}/teams/stats;type=week;week={week}"
+        result = request_xml(ctx, endpoint, season=season, league_key=league_key)
+        job.fetches.append((result, TEAM_WEEK_STATUSES))
+        job.team_stats = _parse_collection(ctx, result, ctx.parsers.stream_team_stats, league_key, week) or []
+        stats_teams = listed_teams(ctx, result, league_key) | {row[1] for row in job.team_stats}
+
+    for team_key in team_keys:
+        missing_roster = roster and team_key not in roster_teams
+        missing_stats = stats and team_key not in stats_teams
+        if missing_roster or missing_stats:
+            job.fallback.append((team_key, missing_roster, missing_stats))
+    job.units.extend(("roster", week, team_key) for team_key in sorted(roster_teams))
+    job.units.extend(("team_stats", week, team_key) for team_key in sorted(stats_teams))
+    return job
+
+
+def fetch_player_stats_batch(ctx, league_key, season, game_key, week, player_keys):
+    job = FetchJob("player_stats", week)
+    batch_keys = ",".join(player_keys)
+    result = request_xml(
+        ctx,
+        f"/players;player_keys={batch_keys}/stats;type=week;week={week}",
+        season=season,
+        league_key=league_key,
+    )
+    job.fetches.append((result, TEAM_WEEK_STATUSES))
+    if result.status_code == 200:
+        job.player_week_stats, job.players = ctx.parsers.stream_player_week_stats(result.body, game_key, week)
+    return job
 
-        record = (
-            time.strftime("%Y-%m-%d %H:%M:%S"),
-            str(season) if season is not None else None,
-            league_key,
-            endpoint,
-            json.dumps(params, ensure_ascii=True) if params else None,
-            status_code,
-            file_path,
-            body.decode("utf-8", errors="replace") if STORE_RAW_BODY_IN_DB else None,
-        )
-        insert_raw_response(conn, record)
 
-        if allow_statuses is None:
-            allow_statuses = {200}
-        if status_code not in allow_statuses:
-            raise RuntimeError(f"Request failed: {endpoint} ({status_code})")
-        if status_code != 200:
-            return None
+def fetch_player_points_batch(ctx, league_key, season, week, player_keys):
+    job = FetchJob("player_points", week)
+    batch_keys = ",".join(player_keys)
+    result = request_xml(
+        ctx,
+        f"/league/{league_key}/players;player_keys={batch_keys}/stats;type=week;week={week}",
+        season=season,
+        league_key=league_key,
+    )
+    job.fetches.append((result, TEAM_WEEK_STATUSES))
+    if result.status_code == 200:
+        rows, job.players = ctx.parsers.stream_player_stats(result.body, league_key, week)
+        job.player_stats = [row for row in rows if row[3] == "player_points"]
+    return job
 
-        ctx.note_request(endpoint, season=season, league_key=league_key, status_code=status_code)
-        _sleep()
-        return body
 
+def store_job(conn, ctx, league_key, job):
+    for result, allow_statuses in job.fetches:
+        record_fetch(conn, result)
+        check_status(ctx, result, allow_statuses)
 
-def dicts_to_rows(items, columns):
-    rows = []
-    for item in items:
-        rows.append(tuple(item.get(col) for col in columns))
-    return rows
+    upsert_many(conn, "rosters", ROSTER_COLUMNS, job.rosters)
+    upsert_many(conn, "team_stats", TEAM_STATS_COLUMNS, job.team_stats)
+    upsert_many(conn, "player_stats", PLAYER_STATS_COLUMNS, job.player_stats)
+    upsert_many(conn, "player_week_stats", PLAYER_WEEK_STATS_COLUMNS, job.player_week_stats)
+    upsert_many(conn, "players", PLAYER_COLUMNS, job.players)
+    for phase, week, unit in job.units:
+        mark_unit(conn, ctx, league_key, phase, week, unit)
 
 
 def load_progress():
@@ -195,6 +363,86 @@ def league_has_data(conn, league_key):
     return matchups > 0 and teams > 0 and standings > 0
 
 
+def has_known_transaction(conn, transaction_keys):
+    if not transaction_keys:
+        return False
+    placeholders = ",".join("?" for _ in transaction_keys)
+    row = conn.execute(
+        f"SELECT 1 FROM transactions WHERE transaction_key IN ({placeholders}) LIMIT 1",
+        transaction_keys,
+    ).fetchone()
+    return row is not None
+
+
+def stored_player_weeks(conn, game_key, week):
+    rows = conn.execute(
+        """
+        SELECT DISTINCT p.player_key
+        FROM player_week_stat_values v
+        JOIN player_refs p ON p.player_ref = v.player_ref
+        WHERE v.game_key = ? AND v.week = ?
+        """,
+        (game_key, week),
+    ).fetchall()
+    return {row[0] for row in rows}
+
+
+def claim_player_weeks(conn, ctx, game_key, week, player_keys, final):
+    claimed = ctx.player_weeks[(game_key, week)]
+    skip = claimed | stored_player_weeks(conn, game_key, week) if final else claimed
+    player_keys = sorted(set(player_keys) - skip)
+    claimed.update(player_keys)
+    return player_keys
+
+
+def start_run(conn, mode):
+    now = time.strftime("%Y-%m-%d %H:%M:%S")
+    conn.execute("UPDATE sync_runs SET abandoned_at = ? WHERE finished_at IS NULL AND abandoned_at IS NULL", (now,))
+    conn.execute("DELETE FROM sync_units WHERE run_id IN (SELECT run_id FROM sync_runs WHERE abandoned_at IS NOT NULL)")
+    cursor = conn.execute("INSERT INTO sync_runs (mode, started_at) VALUES (?, ?)", (mode, now))
+    conn.commit()
+    return cursor.lastrowid
+
+
+def open_run(conn):
+    row = conn.execute(
+        "SELECT run_id, mode, finished_at, abandoned_at FROM sync_runs ORDER BY run_id DESC LIMIT 1"
+    ).fetchone()
+    if row is None or row[2] is not None or row[3] is not None:
+        return None, None
+    return row[0], row[1]
+
+
+def finish_run(conn, run_id):
+    conn.execute("UPDATE sync_runs SET finished_at = ? WHERE run_id = ?", (time.strftime("%Y-%m-%d %H:%M:%S"), run_id))
+    conn.execute("DELETE FROM sync_units WHERE run_id = ?", (run_id,))
+    conn.commit()
+
+
+def mark_unit(conn, ctx, league_key, phase, week=0, unit=""):
+    if ctx.run_id is None:
+        return
+    upsert_many(
+        conn,
+        "sync_units",
+        SYNC_UNIT_COLUMNS,
+        [(ctx.run_id, league_key, phase, week, unit, time.strftime("%Y-%m-%d %H:%M:%S"))],
+    )
+
+
+def mark_complete(conn, league_key, week, endpoint_kind):
+    upsert_many(
+        conn,
+        "sync_state",
+        ("league_key", "week", "endpoint_kind", "status", "updated_at"),
+        [(league_key, week, endpoint_kind, "complete", time.strftime("%Y-%m-%d %H:%M:%S"))],
+    )
+
+
+def week_is_final(matchups):
+    return bool(matchups) and all(row[3] == FINAL_MATCHUP_STATUS for row in matchups)
+
+
 def discover_leagues(conn, ctx, config):
     game_code = str(config.get("game_key", "nfl"))
     season_start = int(config.get("season_start", 0))
@@ -203,8 +451,8 @@ def discover_leagues(conn, ctx, config):
     league_id_hint = str(config.get("league_id_hint", "")).strip()
 
     games_xml = fetch_xml(conn, ctx, "/users;use_login=1/games", season="global")
-    games_root = parse_xml(games_xml)
-    games = parse_games(games_root)
+    games_root = ctx.parsers.parse_document(games_xml)
+    games = ctx.parsers.parse_games(games_root)
 
     games = [
         g for g in games
@@ -222,8 +470,8 @@ def discover_leagues(conn, ctx, config):
             f"/users;use_login=1/games;game_keys={game_key}/leagues",
             season=game.get("season"),
         )
-        leagues_root = parse_xml(leagues_xml)
-        parsed = parse_leagues(leagues_root)
+        leagues_root = ctx.parsers.parse_document(leagues_xml)
+        parsed = ctx.parsers.parse_leagues(leagues_root)
         for league in parsed:
             league["game_key"] = game_key
             league["season"] = game.get("season")
@@ -237,27 +485,92 @@ def discover_leagues(conn, ctx, config):
     return leagues
 
 
-def _week_range(settings):
-    start_week = settings.get("start_week") or DEFAULT_START_WEEK
-    end_week = settings.get("end_week") or DEFAULT_END_WEEK
-    if end_week < start_week:
-        end_week = start_week
-    return range(start_week, end_week + 1)
+def sync_team_weeks(conn, ctx, plan):
+    league_key, season, game_key = plan.league_key, plan.season, plan.game_key
+    pending = defaultdict(int)
+    week_player_keys = defaultdict(set)
+    roster_weeks_done = set()
+    stats_weeks = {week for week, _player_keys in plan.player_batches}
+    executor = ThreadPoolExecutor(max_workers=ctx.workers)
+    futures = set()
 
+    def submit(week, fn, *args):
+        pending[week] += 1
+        futures.add(executor.submit(fn, *args))
 
-def _batch(items, size):
-    for idx in range(0, len(items), size):
-        yield items[idx : idx + size]
+    try:
+        for week, roster, stats in plan.collection_weeks:
+            submit(week, fetch_league_week, ctx, league_key, season, game_key, plan.team_keys, week, roster, stats)
+        for week, team_key, roster, stats in plan.team_weeks:
+            submit(week, fetch_team_week, ctx, league_key, season, game_key, team_key, week, roster, stats)
+        for week, player_keys in plan.player_batches:
+            submit(week, fetch_player_stats_batch, ctx, league_key, season, game_key, week, player_keys)
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            futures -= done
+            for future in sorted(done, key=lambda item: item.exception() is not None):
+                job = future.result()
+                store_job(conn, ctx, league_key, job)
+
+                week = job.week
+                week_player_keys[week].update(row[3] for row in job.rosters)
+                for team_key, roster, stats in job.fallback:
+                    submit(week, fetch_team_week, ctx, league_key, season, game_key, team_key, week, roster, stats)
+                pending[week] -= 1
+                if pending[week]:
+                    continue
+
+                if week not in roster_weeks_done:
+                    roster_weeks_done.add(week)
+                    ctx.log(f"{league_key}: week {week} rosters and team stats", force=True)
+                    if FETCH_PLAYER_STATS and not ctx.roster_stats and week_player_keys[week]:
+                        stats_weeks.add(week)
+                        final = week in plan.final_weeks or plan.mode == REPAIR or bool(plan.done)
+                        player_keys = claim_player_weeks(conn, ctx, game_key, week, week_player_keys.pop(week), final)
+                        for batch in batched(player_keys, PLAYER_BATCH_SIZE):
+                            submit(week, fetch_player_stats_batch, ctx, league_key, season, game_key, week, batch)
+                        if player_keys:
+                            continue
+
+                if week in plan.final_weeks:
+                    mark_complete(conn, league_key, week, "rosters")
+                checkpoint(conn)
+        sync_player_points(conn, ctx, plan, stats_weeks)
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+    finally:
+        executor.shutdown(wait=True)
+
+
+def sync_player_points(conn, ctx, plan, weeks):
+    if not weeks:
+        return
+    league_key = plan.league_key
+    checkpoint(conn)
+    for week in weeks_without_points(conn, league_key, weeks):
+        ctx.log(f"{league_key}: week {week} player points from league stats", force=True)
+        for batch in batched(roster_player_keys(conn, league_key, week), PLAYER_BATCH_SIZE):
+            job = fetch_player_points_batch(ctx, league_key, plan.season, week, batch)
+            store_job(conn, ctx, league_key, job)
+        checkpoint(conn)
 
 
 def sync_league(conn, ctx, league):
+    with write_batch(conn):
+        _sync_league(conn, ctx, league)
+
+
+def sync_league_metadata(conn, ctx, league):
     league_key = league["league_key"]
     season = league.get("season")
 
     ctx.log(f"{league_key}: pulling league metadata", force=True)
     league_xml = fetch_xml(conn, ctx, f"/league/{league_key}", season=season, league_key=league_key)
-    league_root = parse_xml(league_xml)
-    meta = parse_league_meta(league_root)
+    league_root = ctx.parsers.parse_document(league_xml)
+    meta = ctx.parsers.parse_league_meta(league_root)
     if meta:
         meta["season"] = meta.get("season") or season
         meta["game_key"] = meta.get("game_key") or league.get("game_key")
@@ -270,8 +583,8 @@ def sync_league(conn, ctx, league):
 
     ctx.log(f"{league_key}: pulling settings", force=True)
     settings_xml = fetch_xml(conn, ctx, f"/league/{league_key}/settings", season=season, league_key=league_key)
-    settings_root = parse_xml(settings_xml)
-    settings = parse_settings(settings_root)
+    settings_root = ctx.parsers.parse_document(settings_xml)
+    settings = ctx.parsers.parse_settings(settings_root)
     if settings:
         upsert_many(
             conn,
@@ -302,58 +615,60 @@ def sync_league(conn, ctx, league):
 
     ctx.log(f"{league_key}: pulling teams", force=True)
     teams_xml = fetch_xml(conn, ctx, f"/league/{league_key}/teams", season=season, league_key=league_key)
-    teams_root = parse_xml(teams_xml)
-    teams = parse_teams(teams_root)
-    for team in teams:
-        team["league_key"] = league_key
-    upsert_many(
-        conn,
-        "teams",
-        ("team_key", "league_key", "team_id", "name", "url", "manager_names"),
-        dicts_to_rows(teams, ("team_key", "league_key", "team_id", "name", "url", "manager_names")),
-    )
+    teams = ctx.parsers.stream_teams(teams_xml, league_key)
+    upsert_many(conn, "teams", TEAM_COLUMNS, teams)
 
     ctx.log(f"{league_key}: pulling standings", force=True)
     standings_xml = fetch_xml(conn, ctx, f"/league/{league_key}/standings", season=season, league_key=league_key)
-    standings_root = parse_xml(standings_xml)
-    standings = parse_standings(standings_root)
-    for row in standings:
-        row["league_key"] = league_key
-    upsert_many(
-        conn,
-        "standings",
-        ("league_key", "team_key", "rank", "wins", "losses", "ties", "points_for", "points_against"),
-        dicts_to_rows(
-            standings,
-            ("league_key", "team_key", "rank", "wins", "losses", "ties", "points_for", "points_against"),
-        ),
-    )
+    upsert_many(conn, "standings", STANDINGS_COLUMNS, ctx.parsers.stream_standings(standings_xml, league_key))
+    mark_unit(conn, ctx, league_key, "metadata")
+    return (meta or {}).get("game_key"), settings, [team[0] for team in teams]
+
 
-    ctx.log(f"{league_key}: pulling draft results", force=True)
-    draft_xml = fetch_xml(
+def _sync_league(conn, ctx, league):
+    league_key = league["league_key"]
+    season = league.get("season")
+    done = completed_units(conn, ctx.run_id, league_key)
+    if ("metadata", 0, "") in done:
+        ctx.log(f"{league_key}: resuming run {ctx.run_id}", force=True)
+        game_key, settings, team_keys = league.get("game_key"), load_settings(conn, league_key), load_team_keys(conn, league_key)
+    else:
+        game_key, settings, team_keys = sync_league_metadata(conn, ctx, league)
+
+    plan = plan_league(
         conn,
-        ctx,
-        f"/league/{league_key}/draftresults",
+        league_key,
         season=season,
-        league_key=league_key,
-        allow_statuses={200, 404},
+        game_key=game_key,
+        settings=settings,
+        team_keys=team_keys,
+        mode=ctx.mode,
+        use_collections=ctx.use_collections,
+        player_stats=FETCH_PLAYER_STATS,
+        roster_stats=ctx.roster_stats,
+        claimed=ctx.player_weeks,
+        done=done,
     )
-    if draft_xml is not None:
-        draft_root = parse_xml(draft_xml)
-        draft_results = parse_draft_results(draft_root)
-        for row in draft_results:
-            row["league_key"] = league_key
-        upsert_many(
+    ctx.log(f"{league_key}: planned {sum(plan.requests().values())} requests ({plan.mode})", force=True)
+
+    if plan.draft:
+        ctx.log(f"{league_key}: pulling draft results", force=True)
+        draft_xml = fetch_xml(
             conn,
-            "draft_results",
-            ("league_key", "team_key", "player_key", "round", "pick", "cost", "is_keeper", "is_autopick"),
-            dicts_to_rows(
-                draft_results,
-                ("league_key", "team_key", "player_key", "round", "pick", "cost", "is_keeper", "is_autopick"),
-            ),
+            ctx,
+            f"/league/{league_key}/draftresults",
+            season=season,
+            league_key=league_key,
+            allow_statuses={200, 404},
         )
+        if draft_xml is not None:
+            draft_results = ctx.parsers.stream_draft_results(draft_xml, league_key)
+            upsert_many(conn, "draft_results", DRAFT_RESULT_COLUMNS, draft_results)
+        mark_unit(conn, ctx, league_key, "draft")
+
+    checkpoint(conn)
 
-    for week in _week_range(settings):
+    for week in plan.scoreboard_weeks:
         ctx.log(f"{league_key}: week {week} matchups", force=True)
         scoreboard_xml = fetch_xml(
             conn,
@@ -362,127 +677,25 @@ def sync_league(conn, ctx, league):
             season=season,
             league_key=league_key,
         )
-        scoreboard_root = parse_xml(scoreboard_xml)
-        matchups, matchup_teams = parse_matchups(scoreboard_root, week)
-        for row in matchups:
-            row["league_key"] = league_key
-        for row in matchup_teams:
-            row["league_key"] = league_key
+        matchups, matchup_teams = ctx.parsers.stream_matchups(scoreboard_xml, league_key, week)
+        upsert_many(conn, "matchups", MATCHUP_COLUMNS, matchups)
+        upsert_many(conn, "matchup_teams", MATCHUP_TEAM_COLUMNS, matchup_teams)
+        if week_is_final(matchups):
+            plan.final_weeks.add(week)
+            mark_complete(conn, league_key, week, "scoreboard")
+        mark_unit(conn, ctx, league_key, "scoreboard", week)
+        checkpoint(conn)
 
-        upsert_many(
-            conn,
-            "matchups",
-            ("league_key", "week", "matchup_id", "status", "is_playoffs", "is_consolation", "winner_team_key"),
-            dicts_to_rows(
-                matchups,
-                ("league_key", "week", "matchup_id", "status", "is_playoffs", "is_consolation", "winner_team_key"),
-            ),
-        )
-        upsert_many(
-            conn,
-            "matchup_teams",
-            ("league_key", "week", "matchup_id", "team_key", "points", "projected_points", "win_status"),
-            dicts_to_rows(
-                matchup_teams,
-                ("league_key", "week", "matchup_id", "team_key", "points", "projected_points", "win_status"),
-            ),
-        )
-
-    team_keys = [team["team_key"] for team in teams if team.get("team_key")]
-    for week in _week_range(settings):
-        ctx.log(f"{league_key}: week {week} rosters and team stats", force=True)
-        week_player_keys = set()
-        for team_key in team_keys:
-            roster_xml = fetch_xml(
-                conn,
-                ctx,
-                f"/team/{team_key}/roster;week={week}",
-                season=season,
-                league_key=league_key,
-                allow_statuses={200, 400, 404},
-            )
-            if roster_xml is None:
-                continue
-            roster_root = parse_xml(roster_xml)
-            roster_rows, roster_players = parse_roster(roster_root, week)
-            for row in roster_rows:
-                row["league_key"] = league_key
-                week_player_keys.add(row["player_key"])
-            upsert_many(
-                conn,
-                "rosters",
-                ("league_key", "team_key", "week", "player_key", "position", "status", "injury_status", "injury_note"),
-                dicts_to_rows(
-                    roster_rows,
-                    ("league_key", "team_key", "week", "player_key", "position", "status", "injury_status", "injury_note"),
-                ),
-            )
-            upsert_many(
-                conn,
-                "players",
-                ("player_key", "player_id", "name_full", "position", "editorial_team_abbr"),
-                dicts_to_rows(
-                    roster_players,
-                    ("player_key", "player_id", "name_full", "position", "editorial_team_abbr"),
-                ),
-            )
+    sync_team_weeks(conn, ctx, plan)
 
-            stats_xml = fetch_xml(
-                conn,
-                ctx,
-                f"/team/{team_key}/stats;type=week;week={week}",
-                season=season,
-                league_key=league_key,
-                allow_statuses={200, 400, 404},
-            )
-            if stats_xml is None:
-                continue
-            stats_root = parse_xml(stats_xml)
-            team_stats = parse_team_stats(stats_root, week)
-            for row in team_stats:
-                row["league_key"] = league_key
-            upsert_many(
-                conn,
-                "team_stats",
-                ("league_key", "team_key", "week", "stat_id", "value"),
-                dicts_to_rows(team_stats, ("league_key", "team_key", "week", "stat_id", "value")),
-            )
+    if plan.transaction_start is not None:
+        sync_transactions(conn, ctx, plan)
+    mark_unit(conn, ctx, league_key, "league")
 
-        if FETCH_PLAYER_STATS and week_player_keys:
-            player_keys = sorted(week_player_keys)
-            for batch in _batch(player_keys, PLAYER_BATCH_SIZE):
-                batch_keys = ",".join(batch)
-                players_xml = fetch_xml(
-                    conn,
-                    ctx,
-                    f"/league/{league_key}/players;player_keys={batch_keys}/stats;type=week;week={week}",
-                    season=season,
-                    league_key=league_key,
-                    allow_statuses={200, 400, 404},
-                )
-                if players_xml is None:
-                    continue
-                players_root = parse_xml(players_xml)
-                player_stats, players = parse_player_stats(players_root, week)
-                for row in player_stats:
-                    row["league_key"] = league_key
-                upsert_many(
-                    conn,
-                    "player_stats",
-                    ("league_key", "player_key", "week", "stat_id", "value"),
-                    dicts_to_rows(player_stats, ("league_key", "player_key", "week", "stat_id", "value")),
-                )
-                upsert_many(
-                    conn,
-                    "players",
-                    ("player_key", "player_id", "name_full", "position", "editorial_team_abbr"),
-                    dicts_to_rows(
-                        players,
-                        ("player_key", "player_id", "name_full", "position", "editorial_team_abbr"),
-                    ),
-                )
 
-    start = 0
+def sync_transactions(conn, ctx, plan):
+    league_key, season = plan.league_key, plan.season
+    start = plan.transaction_start
     while True:
         ctx.log(f"{league_key}: transactions page {start}", force=True)
         transactions_xml = fetch_xml(
@@ -492,55 +705,40 @@ def sync_league(conn, ctx, league):
             season=season,
             league_key=league_key,
         )
-        transactions_root = parse_xml(transactions_xml)
-        transactions, transaction_players, players = parse_transactions(transactions_root)
+        transactions, transaction_players, players = ctx.parsers.stream_transactions(transactions_xml, league_key)
 
         if not transactions:
             break
-
-        for txn in transactions:
-            txn["league_key"] = league_key
-        upsert_many(
-            conn,
-            "transactions",
-            ("transaction_key", "league_key", "type", "status", "timestamp"),
-            dicts_to_rows(transactions, ("transaction_key", "league_key", "type", "status", "timestamp")),
-        )
-        upsert_many(
-            conn,
-            "transaction_players",
-            (
-                "transaction_key",
-                "player_key",
-                "transaction_type",
-                "source_type",
-                "source_team_key",
-                "destination_type",
-                "destination_team_key",
-            ),
-            dicts_to_rows(
-                transaction_players,
-                (
-                    "transaction_key",
-                    "player_key",
-                    "transaction_type",
-                    "source_type",
-                    "source_team_key",
-                    "destination_type",
-                    "destination_team_key",
-                ),
-            ),
-        )
-        upsert_many(
-            conn,
-            "players",
-            ("player_key", "player_id", "name_full", "position", "editorial_team_abbr"),
-            dicts_to_rows(players, ("player_key", "player_id", "name_full", "position", "editorial_team_abbr")),
+        reached_known = plan.mode != FULL and has_known_transaction(
+            conn, [txn[0] for txn in transactions]
         )
 
-        if len(transactions) < TRANSACTION_PAGE_SIZE:
+        upsert_many(conn, "transactions", TRANSACTION_COLUMNS, transactions)
+        upsert_many(conn, "transaction_players", TRANSACTION_PLAYER_COLUMNS, transaction_players)
+        upsert_many(conn, "players", PLAYER_COLUMNS, players)
+        mark_unit(conn, ctx, league_key, "transactions", 0, str(start))
+
+        checkpoint(conn)
+        if reached_known or len(transactions) < TRANSACTION_PAGE_SIZE:
             break
         start += TRANSACTION_PAGE_SIZE
+    mark_unit(conn, ctx, league_key, "transactions")
+
+
+def stored_leagues(conn):
+    rows = conn.execute("SELECT league_key, season, game_key FROM leagues ORDER BY season").fetchall()
+    return [{"league_key": row[0], "season": row[1], "game_key": row[2]} for row in rows]
+
+
+def sync_context(args):
+    return SyncContext(
+        workers=args.workers,
+        use_collections=not args.per_team,
+        incremental=args.incremental,
+        response_format=args.response_format,
+        roster_stats=args.roster_stats,
+        repair=args.repair,
+    )
 
 
 def main():
@@ -548,23 +746,57 @@ def main():
     parser.add_argument("--start-after", dest="start_after", help="Skip leagues up to and including this league_key.")
     parser.add_argument("--start-at", dest="start_at", help="Start syncing from this league_key.")
     parser.add_argument("--only", dest="only", help="Sync only the specified league_key.")
-    parser.add_argument("--resume", action="store_true", help="Resume from last completed league in sync_progress.json.")
+    parser.add_argument("--resume", action="store_true", help="Resume the last unfinished run at the week, team or page where it stopped.")
     parser.add_argument("--skip-existing", action="store_true", help="Skip leagues with existing matchup/team/standings data.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only fetch weeks that are not final yet and transactions newer than the stored ones.",
+    )
+    parser.add_argument(
+        "--repair",
+        action="store_true",
+        help="Only fetch what is missing from the database: unstored weeks, team-weeks and player stats.",
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Print the requests a sync would make and its estimated duration, without fetching anything.",
+    )
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Concurrent roster/stats requests.")
+    parser.add_argument(
+        "--per-team",
+        action="store_true",
+        help="Fetch rosters and team stats per team instead of league-wide collections.",
+    )
+    parser.add_argument(
+        "--roster-stats",
+        action="store_true",
+        help="Request weekly player stats together with rosters instead of in separate player batches.",
+    )
+    parser.add_argument(
+        "--format",
+        dest="response_format",
+        choices=RESPONSE_FORMATS,
+        default=DEFAULT_FORMAT,
+        help="Response format to request from the API (json is smaller and faster to decode).",
+    )
     args = parser.parse_args()
 
-    config = load_config()
     conn = connect_db()
     init_db(conn)
 
-    ctx = SyncContext()
+    ctx = None if args.plan else sync_context(args)
     leagues = []
-    if args.only:
+    if args.plan:
+        leagues = load_cached_leagues() or stored_leagues(conn)
+    elif args.only:
         cached = load_cached_leagues()
         if cached:
             leagues = [l for l in cached if l.get("league_key") == args.only]
 
-    if not leagues:
-        leagues = discover_leagues(conn, ctx, config)
+    if not leagues and not args.plan:
+        leagues = discover_leagues(conn, ctx, load_config())
     if not leagues:
         print("No leagues found for the specified filters.")
         return
@@ -574,7 +806,13 @@ def main():
         key=lambda item: int(item.get("season") or 0),
     )
 
-    if args.resume:
+    run_id, run_mode = open_run(conn) if args.resume else (None, None)
+    mode = run_mode or sync_mode(args.incremental, args.repair)
+    if run_id is not None:
+        print(f"Resuming run {run_id} ({mode})")
+        if ctx is not None:
+            ctx.mode = mode
+    elif args.resume:
         progress = load_progress()
         if progress.get("last_league_key"):
             args.start_after = progress["last_league_key"]
@@ -601,9 +839,36 @@ def main():
             filtered.append(league)
         leagues = filtered
 
+    if args.plan:
+        plans = []
+        claimed = defaultdict(set)
+        for league in leagues:
+            if args.skip_existing and league_has_data(conn, league.get("league_key")):
+                continue
+            plans.append(
+                plan_league(
+                    conn,
+                    league["league_key"],
+                    season=league.get("season"),
+                    game_key=league.get("game_key"),
+                    mode=mode,
+                    use_collections=not args.per_team,
+                    player_stats=FETCH_PLAYER_STATS,
+                    roster_stats=args.roster_stats,
+                    claimed=claimed,
+                    done=completed_units(conn, run_id, league["league_key"]),
+                )
+            )
+        print_plan(plans, AdaptiveRateLimiter.load().rate)
+        return
+
+    ctx.run_id = run_id or start_run(conn, ctx.mode)
     for league in leagues:
         league_key = league.get("league_key")
         season = league.get("season")
+        if ("league", 0, "") in completed_units(conn, ctx.run_id, league_key):
+            print(f"Skipping league {league_key} (season {season}) - already synced in run {ctx.run_id}")
+            continue
         if args.skip_existing and league_has_data(conn, league_key):
             print(f"Skipping league {league_key} (season {season}) - data already present")
             continue
@@ -612,6 +877,7 @@ def main():
         sync_league(conn, ctx, league)
         save_progress(league)
 
+    finish_run(conn, ctx.run_id)
     print("Sync complete.")
 
 
@@ -0,0 +1,361 @@
+import json
+from collections import Counter, defaultdict
+
+TRANSACTION_PAGE_SIZE = 25
+PLAYER_BATCH_SIZE = 25
+DEFAULT_START_WEEK = 1
+DEFAULT_END_WEEK = 17
+METADATA_KINDS = ("league", "settings", "teams", "standings")
+
+FULL = "full"
+INCREMENTAL = "incremental"
+REPAIR = "repair"
+
+
+class LeaguePlan:
+    def __init__(self, league_key, season, game_key, mode):
+        self.league_key = league_key
+        self.season = season
+        self.game_key = game_key
+        self.mode = mode
+        self.team_keys = []
+        self.metadata = True
+        self.draft = True
+        self.scoreboard_weeks = []
+        self.final_weeks = set()
+        self.collection_weeks = []
+        self.team_weeks = []
+        self.player_batches = []
+        self.estimated_player_batches = 0
+        self.transaction_start = 0
+        self.transaction_pages = 1
+        self.done = set()
+        self.estimated = set()
+
+    def requests(self):
+        counts = Counter({kind: int(self.metadata) for kind in METADATA_KINDS})
+        counts["draftresults"] = int(self.draft)
+        counts["scoreboard"] = len(self.scoreboard_weeks)
+        counts["roster"] = sum(job[1] for job in self.collection_weeks) + sum(job[2] for job in self.team_weeks)
+        counts["team_stats"] = sum(job[2] for job in self.collection_weeks) + sum(job[3] for job in self.team_weeks)
+        counts["player_stats"] = len(self.player_batches) + self.estimated_player_batches
+        counts["transactions"] = self.transaction_pages
+        return +counts
+
+    def weeks(self, kind):
+        if kind == "scoreboard":
+            return sorted(self.scoreboard_weeks)
+        if kind in ("roster", "team_stats"):
+            index = 1 if kind == "roster" else 2
+            weeks = {job[0] for job in self.collection_weeks if job[index]}
+            return sorted(weeks | {job[0] for job in self.team_weeks if job[index + 1]})
+        if kind == "player_stats":
+            return sorted({week for week, _keys in self.player_batches})
+        return []
+
+
+def sync_mode(incremental=False, repair=False):
+    if repair:
+        return REPAIR
+    return INCREMENTAL if incremental else FULL
+
+
+def week_range(settings):
+    start_week = settings.get("start_week") or DEFAULT_START_WEEK
+    end_week = settings.get("end_week") or DEFAULT_END_WEEK
+    if end_week < start_week:
+        end_week = start_week
+    return range(start_week, end_week + 1)
+
+
+def batched(items, size):
+    for idx in range(0, len(items), size):
+        yield items[idx : idx + size]
+
+
+def completed_weeks(conn, league_key, endpoint_kind):
+    rows = conn.execute(
+        "SELECT week FROM sync_state WHERE league_key = ? AND endpoint_kind = ? AND status = 'complete'",
+        (league_key, endpoint_kind),
+    ).fetchall()
+    return {row[0] for row in rows}
+
+
+def completed_units(conn, run_id, league_key):
+    if run_id is None:
+        return set()
+    rows = conn.execute(
+        "SELECT phase, week, unit FROM sync_units WHERE run_id = ? AND league_key = ?",
+        (run_id, league_key),
+    ).fetchall()
+    return {(row[0], row[1], row[2]) for row in rows}
+
+
+def league_has_draft(conn, league_key):
+    row = conn.execute(
+        "SELECT 1 FROM draft_results WHERE league_key = ? LIMIT 1",
+        (league_key,),
+    ).fetchone()
+    return row is not None
+
+
+def load_settings(conn, league_key):
+    row = conn.execute(
+        "SELECT start_week, end_week, num_teams, roster_positions FROM league_settings WHERE league_key = ?",
+        (league_key,),
+    ).fetchone()
+    if not row:
+        return {}
+    return {"start_week": row[0], "end_week": row[1], "num_teams": row[2], "roster_positions": row[3]}
+
+
+def load_team_keys(conn, league_key):
+    rows = conn.execute("SELECT team_key FROM teams WHERE league_key = ? ORDER BY team_key", (league_key,)).fetchall()
+    return [row[0] for row in rows]
+
+
+def stored_weeks(conn, league_key):
+    rows = conn.execute("SELECT DISTINCT week FROM matchups WHERE league_key = ?", (league_key,)).fetchall()
+    return {row[0] for row in rows}
+
+
+def stored_team_weeks(conn, table, league_key):
+    rows = conn.execute(f"SELECT DISTINCT week, team_key FROM {table} WHERE league_key = ?", (league_key,)).fetchall()
+    return {(row[0], row[1]) for row in rows}
+
+
+def roster_player_keys(conn, league_key, week):
+    rows = conn.execute(
+        "SELECT DISTINCT player_key FROM rosters WHERE league_key = ? AND week = ? ORDER BY player_key",
+        (league_key, week),
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def roster_players_by_week(conn, league_key):
+    rows = conn.execute(
+        "SELECT week, COUNT(DISTINCT player_key) FROM rosters WHERE league_key = ? GROUP BY week",
+        (league_key,),
+    ).fetchall()
+    return {row[0]: row[1] for row in rows}
+
+
+def missing_player_stats(conn, league_key, game_key):
+    rows = conn.execute(
+        """
+        SELECT r.week, r.team_key, r.player_key
+        FROM rosters r
+        LEFT JOIN player_refs p ON p.player_key = r.player_key
+        WHERE r.league_key = ?
+          AND NOT EXISTS (
+              SELECT 1 FROM player_week_stat_values s
+              WHERE s.game_key = ? AND s.player_ref = p.player_ref AND s.week = r.week
+          )
+        """,
+        (league_key, game_key),
+    ).fetchall()
+    missing = defaultdict(dict)
+    for week, team_key, player_key in rows:
+        missing[week].setdefault(player_key, team_key)
+    return missing
+
+
+def transaction_count(conn, league_key):
+    return conn.execute("SELECT COUNT(*) FROM transactions WHERE league_key = ?", (league_key,)).fetchone()[0]
+
+
+def roster_slots(settings):
+    try:
+        positions = json.loads(settings.get("roster_positions") or "[]")
+    except json.JSONDecodeError:
+        return 0
+    return sum(item.get("count") or 0 for item in positions)
+
+
+def plan_league(
+    conn,
+    league_key,
+    season=None,
+    game_key=None,
+    settings=None,
+    team_keys=None,
+    mode=FULL,
+    use_collections=True,
+    player_stats=False,
+    roster_stats=False,
+    claimed=None,
+    done=None,
+):
+    game_key = game_key or league_key.split(".l.")[0]
+    settings = load_settings(conn, league_key) if settings is None else settings
+    plan = LeaguePlan(league_key, season, game_key, mode)
+    plan.team_keys = load_team_keys(conn, league_key) if team_keys is None else list(team_keys)
+    weeks = list(week_range(settings))
+    plan.final_weeks = completed_weeks(conn, league_key, "scoreboard")
+    claimed = claimed if claimed is not None else defaultdict(set)
+    plan.done = done or set()
+
+    if mode == FULL:
+        plan.scoreboard_weeks = weeks
+        team_gaps = {week: [(team_key, True, True) for team_key in plan.team_keys] for week in weeks}
+    else:
+        plan.draft = not league_has_draft(conn, league_key)
+        if mode == INCREMENTAL:
+            plan.scoreboard_weeks = [week for week in weeks if week not in plan.final_weeks]
+            done_weeks = completed_weeks(conn, league_key, "rosters")
+            team_gaps = {
+                week: [(team_key, True, True) for team_key in plan.team_keys] for week in weeks if week not in done_weeks
+            }
+        else:
+            have_matchups = stored_weeks(conn, league_key)
+            plan.scoreboard_weeks = [week for week in weeks if week not in have_matchups]
+            team_gaps = _repair_team_gaps(conn, plan, weeks, roster_stats)
+
+    plan.metadata = ("metadata", 0, "") not in plan.done
+    plan.draft = plan.draft and ("draft", 0, "") not in plan.done
+    plan.scoreboard_weeks = [week for week in plan.scoreboard_weeks if ("scoreboard", week, "") not in plan.done]
+    if plan.done:
+        team_gaps = _drop_done_units(plan, team_gaps)
+
+    for week in weeks:
+        gaps = team_gaps.get(week)
+        if team_keys is None and not plan.team_keys and gaps is not None:
+            plan.collection_weeks.append((week, True, True))
+            plan.estimated.update(("roster", "team_stats"))
+        elif gaps:
+            _plan_team_week(plan, week, gaps, use_collections)
+
+    if player_stats and not roster_stats:
+        _plan_player_batches(conn, plan, settings, claimed)
+
+    stored_transactions = transaction_count(conn, league_key)
+    if mode == FULL:
+        plan.transaction_pages = stored_transactions // TRANSACTION_PAGE_SIZE + 1
+    if not stored_transactions:
+        plan.estimated.add("transactions")
+    _resume_transactions(plan)
+    return plan
+
+
+def _resume_transactions(plan):
+    if ("transactions", 0, "") in plan.done:
+        plan.transaction_start = None
+        plan.transaction_pages = 0
+        return
+    pages = [int(unit) for phase, _week, unit in plan.done if phase == "transactions"]
+    if pages:
+        plan.transaction_start = max(pages) + TRANSACTION_PAGE_SIZE
+        plan.transaction_pages = max(1, plan.transaction_pages - len(pages))
+
+
+def _drop_done_units(plan, team_gaps):
+    remaining = {}
+    for week, gaps in team_gaps.items():
+        kept = []
+        for team_key, roster, stats in gaps:
+            roster = roster and ("roster", week, team_key) not in plan.done
+            stats = stats and ("team_stats", week, team_key) not in plan.done
+            if roster or stats:
+                kept.append((team_key, roster, stats))
+        remaining[week] = kept
+    return remaining
+
+
+def _plan_team_week(plan, week, gaps, use_collections):
+    def use_collection(index):
+        teams = sum(1 for gap in gaps if gap[index])
+        return use_collections and teams > 0 and (teams > 1 or teams == len(plan.team_keys))
+
+    roster_collection, stats_collection = use_collection(1), use_collection(2)
+    if roster_collection or stats_collection:
+        plan.collection_weeks.append((week, roster_collection, stats_collection))
+    for team_key, roster, stats in gaps:
+        roster, stats = roster and not roster_collection, stats and not stats_collection
+        if roster or stats:
+            plan.team_weeks.append((week, team_key, roster, stats))
+
+
+def _repair_team_gaps(conn, plan, weeks, roster_stats):
+    have_rosters = stored_team_weeks(conn, "rosters", plan.league_key)
+    have_stats = stored_team_weeks(conn, "team_stats", plan.league_key)
+    stale_rosters = set()
+    if roster_stats:
+        for week, players in missing_player_stats(conn, plan.league_key, plan.game_key).items():
+            stale_rosters.update((week, team_key) for team_key in players.values())
+    team_gaps = {}
+    for week in weeks:
+        gaps = []
+        for team_key in plan.team_keys:
+            roster = (week, team_key) not in have_rosters or (week, team_key) in stale_rosters
+            stats = (week, team_key) not in have_stats
+            if roster or stats:
+                gaps.append((team_key, roster, stats))
+        team_gaps[week] = gaps
+    return team_gaps
+
+
+def _plan_player_batches(conn, plan, settings, claimed):
+    fetched_weeks = set(plan.weeks("roster"))
+    new_players = roster_players_by_week(conn, plan.league_key)
+    if plan.mode == REPAIR or plan.done:
+        for week, players in sorted(missing_player_stats(conn, plan.league_key, plan.game_key).items()):
+            seen = claimed[(plan.game_key, week)]
+            player_keys = sorted(set(players) - seen)
+            seen.update(player_keys)
+            plan.player_batches.extend((week, batch) for batch in batched(player_keys, PLAYER_BATCH_SIZE))
+        have_rosters = stored_team_weeks(conn, "rosters", plan.league_key)
+        new_players = {
+            week: roster_slots(settings) * sum((week, team_key) not in have_rosters for team_key in plan.team_keys)
+            for week in fetched_weeks
+        }
+
+    if not fetched_weeks:
+        return
+    default_players = roster_slots(settings) * (len(plan.team_keys) or settings.get("num_teams") or 0)
+    for week in fetched_weeks:
+        players = new_players.get(week, default_players)
+        plan.estimated_player_batches += -(-players // PLAYER_BATCH_SIZE)
+    plan.estimated.add("player_stats")
+
+
+def format_weeks(weeks):
+    ranges = []
+    for week in sorted(weeks):
+        if ranges and week == ranges[-1][1] + 1:
+            ranges[-1][1] = week
+        else:
+            ranges.append([week, week])
+    return ",".join(str(start) if start == end else f"{start}-{end}" for start, end in ranges)
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    if minutes:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
+
+
+def print_plan(plans, rate):
+    totals = Counter()
+    estimated = False
+    for plan in plans:
+        counts = plan.requests()
+        totals.update(counts)
+        print(f"{plan.season or '?'} {plan.league_key} ({plan.mode}): {sum(counts.values())} requests")
+        for kind, count in sorted(counts.items()):
+            marker = "~" if kind in plan.estimated else ""
+            weeks = plan.weeks(kind)
+            suffix = f"  weeks {format_weeks(weeks)}" if weeks else ""
+            print(f"  {kind}: {marker}{count}{suffix}")
+        estimated = estimated or bool(plan.estimated)
+
+    total = sum(totals.values())
+    print("")
+    for kind, count in sorted(totals.items()):
+        print(f"{kind}: {count}")
+    print(f"Total: {total} requests, about {format_duration(total / rate)} at {rate:.2f} requests/sec")
+    if estimated:
+        print("~ counts depend on data not fetched yet (player batches for refetched rosters, new transactions).")
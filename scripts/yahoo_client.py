@@ -1,10 +1,13 @@
 import json
 import os
+import threading
+import time
 from pathlib import Path
 
 import tomllib
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 from requests_oauthlib import OAuth1Session
 from xml.etree import ElementTree
 
@@ -16,6 +19,10 @@ ENV_PATH = BASE_DIR / ".env"
 TOKENS_PATH = BASE_DIR / "config" / "oauth_tokens.json"
 CONFIG_PATH = BASE_DIR / "config" / "config.toml"
 
+DEFAULT_FORMAT = "xml"
+POOL_SIZE = 8
+REFRESH_MARGIN_SECONDS = 300
+
 
 def load_env():
     load_dotenv(ENV_PATH)
@@ -60,53 +67,117 @@ def _refresh_oauth2_token(tokens):
     response.raise_for_status()
     updated = response.json()
     updated["oauth_version"] = "2.0"
+    updated["obtained_at"] = int(time.time())
+    tokens.pop("expires_at", None)
     tokens.update(updated)
     _save_tokens(tokens)
     return tokens
 
 
-def get_oauth_session():
-    load_env()
-    tokens = load_tokens()
+def _token_expires_at(tokens):
+    expires_at = tokens.get("expires_at")
+    if expires_at:
+        return float(expires_at)
+    expires_in = tokens.get("expires_in")
+    obtained_at = tokens.get("obtained_at")
+    if expires_in and obtained_at:
+        return float(obtained_at) + float(expires_in)
+    return None
+
+
+class YahooClient:
+    def __init__(self, base_url=None, tokens=None):
+        load_env()
+        base_url = base_url or os.getenv("YAHOO_API_BASE_URL", "").strip() or BASE_URL
+        self.base_url = base_url.rstrip("/")
+        self.tokens = tokens if tokens is not None else load_tokens()
+        self.lock = threading.Lock()
+        self.session = self._build_session()
+
+    def _build_session(self):
+        if _is_oauth2(self.tokens):
+            session = requests.Session()
+            session.headers.update({"Authorization": f"Bearer {self.tokens.get('access_token', '')}"})
+        else:
+            consumer_key = os.getenv("YAHOO_CONSUMER_KEY", "").strip()
+            consumer_secret = os.getenv("YAHOO_CONSUMER_SECRET", "").strip()
+            if not consumer_key or not consumer_secret:
+                raise RuntimeError("Missing YAHOO_CONSUMER_KEY/YAHOO_CONSUMER_SECRET in .env")
+            session = OAuth1Session(
+                consumer_key,
+                client_secret=consumer_secret,
+                resource_owner_key=self.tokens.get("oauth_token"),
+                resource_owner_secret=self.tokens.get("oauth_token_secret"),
+                signature_type="query",
+            )
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"Accept-Encoding": "gzip, deflate"})
+        return session
 
-    consumer_key = os.getenv("YAHOO_CONSUMER_KEY", "").strip()
-    consumer_secret = os.getenv("YAHOO_CONSUMER_SECRET", "").strip()
-    if not consumer_key or not consumer_secret:
-        raise RuntimeError("Missing YAHOO_CONSUMER_KEY/YAHOO_CONSUMER_SECRET in .env")
+    def _can_refresh(self):
+        return _is_oauth2(self.tokens) and bool(self.tokens.get("refresh_token"))
 
-    if _is_oauth2(tokens):
-        session = requests.Session()
-        session.headers.update({"Authorization": f"Bearer {tokens.get('access_token', '')}"})
-        return session
+    def _expires_soon(self):
+        expires_at = _token_expires_at(self.tokens)
+        if expires_at is None:
+            return False
+        return time.time() >= expires_at - REFRESH_MARGIN_SECONDS
 
-    return OAuth1Session(
-        consumer_key,
-        client_secret=consumer_secret,
-        resource_owner_key=tokens.get("oauth_token"),
-        resource_owner_secret=tokens.get("oauth_token_secret"),
-        signature_type="query",
-    )
+    def refresh(self, stale_token=None):
+        with self.lock:
+            if stale_token is not None and self.tokens.get("access_token") != stale_token:
+                return
+            _refresh_oauth2_token(self.tokens)
+            self.session.headers.update({"Authorization": f"Bearer {self.tokens.get('access_token', '')}"})
 
+    def get(self, path, params=None):
+        if not path.startswith("/"):
+            path = "/" + path
+        url = f"{self.base_url}{path}"
 
-def api_get_response(path, params=None):
-    session = get_oauth_session()
-    if not path.startswith("/"):
-        path = "/" + path
-    url = f"{BASE_URL}{path}"
-    response = session.get(url, params=params)
+        if self._can_refresh() and self._expires_soon():
+            self.refresh(stale_token=self.tokens.get("access_token"))
+
+        access_token = self.tokens.get("access_token")
+        response = self.session.get(url, params=params)
+        if response.status_code == 401 and self._can_refresh():
+            self.refresh(stale_token=access_token)
+            response = self.session.get(url, params=params)
+        return response
+
+
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
 
-    if response.status_code == 401:
-        tokens = load_tokens()
-        if _is_oauth2(tokens) and tokens.get("refresh_token"):
-            _refresh_oauth2_token(tokens)
-            session = get_oauth_session()
-            response = session.get(url, params=params)
 
-    return response
+def get_client():
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = YahooClient()
+        return _CLIENT
+
+
+def set_client(client):
+    global _CLIENT
+    with _CLIENT_LOCK:
+        _CLIENT = client
+
+
+def with_format(params, response_format=None):
+    if not response_format or response_format == DEFAULT_FORMAT:
+        return params
+    return {**(params or {}), "format": response_format}
+
+
+def api_get_response(path, params=None):
+    return get_client().get(path, params=params)
 
 
-def api_get(path, params=None):
-    response = api_get_response(path, params=params)
+def api_get(path, params=None, response_format=None):
+    response = api_get_response(path, params=with_format(params, response_format))
     response.raise_for_status()
     return response.content
 
@@ -0,0 +1,388 @@
+import json
+import random
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+FANTASY_NS = "http://fantasysports.yahooapis.com/fantasy/v2/base.rng"
+YAHOO_NS = "http://www.yahooapis.com/v1/base.rng"
+GAME_KEY = "423"
+LEAGUE_KEY = f"{GAME_KEY}.l.12345"
+WEEK = 7
+
+NFL_TEAMS = ("Ari", "Atl", "Bal", "Buf", "Car", "Chi", "Cin", "Cle", "Dal", "Den", "Det", "GB", "Hou", "Ind", "KC", "NE")
+POSITIONS = ("QB", "WR", "WR", "RB", "RB", "TE", "W/R/T", "K", "DEF", "BN", "BN", "BN", "BN", "BN", "BN", "IR")
+INJURIES = (("Q", "Questionable", "Hamstring"), ("O", "Out", "Knee"), ("IR", "Injured Reserve", "Achilles"))
+
+# Yahoo's JSON rendering: which elements become entity lists, numbered collections or wrapper lists.
+JSON_ENTITIES = {"game", "league", "team", "player", "transaction", "user"}
+JSON_LIST_PROPS = {"team", "player"}
+JSON_SUBRESOURCES = {
+    "games",
+    "leagues",
+    "teams",
+    "players",
+    "settings",
+    "standings",
+    "scoreboard",
+    "draft_results",
+    "transactions",
+    "matchups",
+    "roster",
+    "team_stats",
+    "team_points",
+    "team_projected_points",
+    "team_standings",
+    "player_stats",
+    "player_points",
+    "selected_position",
+    "transaction_data",
+}
+JSON_COLLECTIONS = {"games", "leagues", "teams", "players", "matchups", "transactions", "draft_results"}
+JSON_WRAPPER_LISTS = {"stats", "managers", "roster_positions", "eligible_positions", "team_logos"}
+JSON_NUMBERS = {"count", "pick", "round", "rank", "wins", "losses", "ties", "num_teams"}
+
+
+def wrap(inner, uri="/fantasy/v2/league"):
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<fantasy_content xml:lang="en-US" yahoo:uri="{uri}" time="41.2ms" copyright="Data provided by Yahoo! and STATS, LLC" '
+        f'refresh_rate="60" xmlns:yahoo="{YAHOO_NS}" xmlns="{FANTASY_NS}">{inner}</fantasy_content>'
+    ).encode("utf-8")
+
+
+def team_key(index):
+    return f"{LEAGUE_KEY}.t.{index}"
+
+
+def _league_header(rng):
+    return (
+        f"<league_key>{LEAGUE_KEY}</league_key><league_id>12345</league_id><name>Synthetic League</name>"
+        f"<url>https://football.fantasysports.yahoo.com/f1/12345</url><draft_status>postdraft</draft_status>"
+        f"<num_teams>12</num_teams><edit_key>{WEEK}</edit_key><weekly_deadline/><league_update_timestamp>"
+        f"{1700000000 + rng.randrange(100000)}</league_update_timestamp><scoring_type>head</scoring_type>"
+        f"<league_type>private</league_type><current_week>{WEEK}</current_week><start_week>1</start_week>"
+        f"<end_week>17</end_week><is_finished>0</is_finished><season>2024</season><game_code>nfl</game_code>"
+    )
+
+
+def _stats(rng, count, base_id=0):
+    return "".join(
+        f"<stat><stat_id>{base_id + stat_id}</stat_id><value>{rng.choice((0, rng.randrange(1, 400)))}</value></stat>"
+        for stat_id in range(count)
+    )
+
+
+def _player(rng, player_id, extra=""):
+    first = rng.choice(("Josh", "Tyreek", "Justin", "Christian", "Travis", "Ja'Marr", "Derrick", "Davante"))
+    last = rng.choice(("Allen", "Hill", "Jefferson", "McCaffrey", "Kelce", "Chase", "Henry", "Adams"))
+    nfl_team = rng.choice(NFL_TEAMS)
+    position = rng.choice(("QB", "WR", "RB", "TE", "K"))
+    injury = ""
+    if rng.random() < 0.15:
+        status, status_full, note = rng.choice(INJURIES)
+        injury = f"<status>{status}</status><status_full>{status_full}</status_full><injury_note>{note}</injury_note>"
+    return (
+        f"<player><player_key>{GAME_KEY}.p.{player_id}</player_key><player_id>{player_id}</player_id>"
+        f"<name><full>{escape(first)} {last}</full><first>{escape(first)}</first><last>{last}</last>"
+        f"<ascii_first>{escape(first)}</ascii_first><ascii_last>{last}</ascii_last></name>"
+        f"<url>https://sports.yahoo.com/nfl/players/{player_id}</url>{injury}"
+        f"<editorial_player_key>nfl.p.{player_id}</editorial_player_key>"
+        f"<editorial_team_key>nfl.t.{NFL_TEAMS.index(nfl_team) + 1}</editorial_team_key>"
+        f"<editorial_team_full_name>{nfl_team} Team</editorial_team_full_name>"
+        f"<editorial_team_abbr>{nfl_team}</editorial_team_abbr>"
+        f"<editorial_team_url>https://sports.yahoo.com/nfl/teams/{nfl_team.lower()}/</editorial_team_url>"
+        f"<bye_weeks><week>{rng.randrange(5, 15)}</week></bye_weeks>"
+        f"<uniform_number>{rng.randrange(1, 99)}</uniform_number><display_position>{position}</display_position>"
+        f"<headshot><url>https://s.yimg.com/iu/api/res/1.2/{player_id}.png</url><size>small</size></headshot>"
+        f"<image_url>https://s.yimg.com/iu/api/res/1.2/{player_id}.png</image_url>"
+        f"<is_undroppable>0</is_undroppable><position_type>O</position_type><primary_position>{position}</primary_position>"
+        f"<eligible_positions><position>{position}</position><position>W/R/T</position></eligible_positions>"
+        f"<has_player_notes>1</has_player_notes><player_notes_last_timestamp>1700000000</player_notes_last_timestamp>"
+        f"{extra}</player>"
+    )
+
+
+def _player_stats(rng, num_stats):
+    return (
+        f"<player_stats><coverage_type>week</coverage_type><week>{WEEK}</week>"
+        f"<stats>{_stats(rng, num_stats)}</stats></player_stats>"
+        f"<player_points><coverage_type>week</coverage_type><week>{WEEK}</week>"
+        f"<total>{rng.uniform(0, 40):.2f}</total></player_points>"
+    )
+
+
+def _team_header(index, rng):
+    return (
+        f"<team_key>{team_key(index)}</team_key><team_id>{index}</team_id><name>Team {index}</name>"
+        f"<is_owned_by_current_login>0</is_owned_by_current_login>"
+        f"<url>https://football.fantasysports.yahoo.com/f1/12345/{index}</url>"
+        f"<team_logos><team_logo><size>large</size><url>https://s.yimg.com/logo/{index}.png</url></team_logo></team_logos>"
+        f"<waiver_priority>{rng.randrange(1, 13)}</waiver_priority><number_of_moves>{rng.randrange(40)}</number_of_moves>"
+        f"<number_of_trades>{rng.randrange(4)}</number_of_trades>"
+        f"<managers><manager><manager_id>{index}</manager_id><nickname>Manager {index}</nickname>"
+        f"<guid>GUID{index:04d}</guid><image_url>https://s.yimg.com/ag/{index}.png</image_url>"
+        f"<felo_score>{rng.randrange(300, 900)}</felo_score><felo_tier>gold</felo_tier></manager></managers>"
+    )
+
+
+def _team_points(rng):
+    return (
+        f"<team_points><coverage_type>week</coverage_type><week>{WEEK}</week>"
+        f"<total>{rng.uniform(60, 160):.2f}</total></team_points>"
+        f"<team_projected_points><coverage_type>week</coverage_type><week>{WEEK}</week>"
+        f"<total>{rng.uniform(80, 130):.2f}</total></team_projected_points>"
+    )
+
+
+def games_xml(rng, num_games=20):
+    games = "".join(
+        f"<game><game_key>{300 + i}</game_key><game_id>{300 + i}</game_id><name>Football</name><code>nfl</code>"
+        f"<type>full</type><url>https://football.fantasysports.yahoo.com/{2000 + i}</url><season>{2000 + i}</season>"
+        f"<is_registration_over>1</is_registration_over><is_game_over>1</is_game_over><is_offseason>1</is_offseason></game>"
+        for i in range(num_games)
+    )
+    return wrap(f'<users count="1"><user><guid>GUID0001</guid><games count="{num_games}">{games}</games></user></users>', "/fantasy/v2/users")
+
+
+def leagues_xml(rng, num_leagues=6):
+    leagues = "".join(
+        f"<league>{_league_header(rng).replace(LEAGUE_KEY, f'{GAME_KEY}.l.{1000 + i}')}</league>" for i in range(num_leagues)
+    )
+    return wrap(
+        f'<users count="1"><user><guid>GUID0001</guid><games count="1"><game><game_key>{GAME_KEY}</game_key>'
+        f"<code>nfl</code><season>2024</season><leagues count=\"{num_leagues}\">{leagues}</leagues></game></games></user></users>",
+        "/fantasy/v2/users",
+    )
+
+
+def league_xml(rng):
+    return wrap(f"<league>{_league_header(rng)}</league>")
+
+
+def settings_xml(rng, num_stats=30):
+    positions = "".join(
+        f"<roster_position><position>{position}</position><position_type>O</position_type><count>{count}</count>"
+        f"<is_starting_position>{int(position not in ('BN', 'IR'))}</is_starting_position></roster_position>"
+        for position, count in (("QB", 1), ("WR", 2), ("RB", 2), ("TE", 1), ("W/R/T", 1), ("K", 1), ("DEF", 1), ("BN", 6), ("IR", 1))
+    )
+    categories = "".join(
+        f"<stat><stat_id>{stat_id}</stat_id><enabled>1</enabled><name>Stat {stat_id}</name>"
+        f"<display_name>S{stat_id}</display_name><sort_order>1</sort_order><position_type>O</position_type></stat>"
+        for stat_id in range(num_stats)
+    )
+    modifiers = "".join(
+        f"<stat><stat_id>{stat_id}</stat_id><value>{rng.choice((0.04, 0.1, 1, 4, 6, -2))}</value></stat>"
+        for stat_id in range(num_stats)
+    )
+    return wrap(
+        f"<league>{_league_header(rng)}<settings><draft_type>live</draft_type><scoring_type>head</scoring_type>"
+        f"<uses_playoff>1</uses_playoff><playoff_start_week>15</playoff_start_week><num_teams>12</num_teams>"
+        f"<start_week>1</start_week><end_week>17</end_week>"
+        f"<roster_positions>{positions}</roster_positions>"
+        f"<stat_categories><stats>{categories}</stats></stat_categories>"
+        f"<stat_modifiers><stats>{modifiers}</stats></stat_modifiers></settings></league>"
+    )
+
+
+def teams_xml(rng, num_teams=12):
+    teams = "".join(f"<team>{_team_header(i, rng)}</team>" for i in range(1, num_teams + 1))
+    return wrap(f'<league>{_league_header(rng)}<teams count="{num_teams}">{teams}</teams></league>')
+
+
+def standings_xml(rng, num_teams=12):
+    teams = "".join(
+        f"<team>{_team_header(i, rng)}<team_points><coverage_type>season</coverage_type><season>2024</season>"
+        f"<total>{rng.uniform(900, 1600):.2f}</total></team_points><team_standings><rank>{i}</rank>"
+        f"<playoff_seed>{i}</playoff_seed><outcome_totals><wins>{num_teams - i}</wins><losses>{i}</losses>"
+        f"<ties>0</ties><percentage>.500</percentage></outcome_totals>"
+        f"<points_for>{rng.uniform(900, 1600):.2f}</points_for><points_against>{rng.uniform(900, 1600):.2f}</points_against>"
+        f"</team_standings></team>"
+        for i in range(1, num_teams + 1)
+    )
+    return wrap(f'<league>{_league_header(rng)}<standings><teams count="{num_teams}">{teams}</teams></standings></league>')
+
+
+def draft_results_xml(rng, num_teams=12, rounds=16):
+    picks = "".join(
+        f"<draft_result><pick>{pick}</pick><round>{(pick - 1) // num_teams + 1}</round>"
+        f"<team_key>{team_key((pick - 1) % num_teams + 1)}</team_key><player_key>{GAME_KEY}.p.{30000 + pick}</player_key></draft_result>"
+        for pick in range(1, num_teams * rounds + 1)
+    )
+    return wrap(f'<league>{_league_header(rng)}<draft_results count="{num_teams * rounds}">{picks}</draft_results></league>')
+
+
+def scoreboard_xml(rng, num_teams=12, num_stats=30):
+    matchups = ""
+    for matchup_id, index in enumerate(range(1, num_teams, 2), start=1):
+        teams = "".join(
+            f"<team>{_team_header(i, rng)}<win_probability>0.5</win_probability>{_team_points(rng)}"
+            f"<team_stats><coverage_type>week</coverage_type><week>{WEEK}</week><stats>{_stats(rng, num_stats)}</stats></team_stats></team>"
+            for i in (index, index + 1)
+        )
+        matchups += (
+            f"<matchup><week>{WEEK}</week><week_start>2024-10-17</week_start><week_end>2024-10-21</week_end>"
+            f"<status>postevent</status><is_playoffs>0</is_playoffs><is_consolation>0</is_consolation>"
+            f"<is_matchup_recap_available>1</is_matchup_recap_available><matchup_id>{matchup_id}</matchup_id>"
+            f"<is_tied>0</is_tied><winner_team_key>{team_key(index)}</winner_team_key>"
+            f'<teams count="2">{teams}</teams></matchup>'
+        )
+    return wrap(
+        f"<league>{_league_header(rng)}<scoreboard><week>{WEEK}</week>"
+        f'<matchups count="{num_teams // 2}">{matchups}</matchups></scoreboard></league>'
+    )
+
+
+def roster_xml(rng, num_teams=12, roster_size=16):
+    teams = ""
+    for index in range(1, num_teams + 1):
+        players = "".join(
+            _player(
+                rng,
+                index * 100 + slot,
+                f"<selected_position><coverage_type>week</coverage_type><week>{WEEK}</week>"
+                f"<position>{POSITIONS[slot % len(POSITIONS)]}</position><is_flex>0</is_flex></selected_position>"
+                f"<is_editable>0</is_editable>",
+            )
+            for slot in range(roster_size)
+        )
+        teams += (
+            f"<team>{_team_header(index, rng)}<roster><coverage_type>week</coverage_type><week>{WEEK}</week>"
+            f'<is_editable>0</is_editable><players count="{roster_size}">{players}</players></roster></team>'
+        )
+    return wrap(f'<league>{_league_header(rng)}<teams count="{num_teams}">{teams}</teams></league>')
+
+
+def roster_stats_xml(rng, num_teams=12, roster_size=16, num_stats=30):
+    teams = ""
+    for index in range(1, num_teams + 1):
+        players = "".join(
+            _player(
+                rng,
+                index * 100 + slot,
+                f"<selected_position><coverage_type>week</coverage_type><week>{WEEK}</week>"
+                f"<position>{POSITIONS[slot % len(POSITIONS)]}</position><is_flex>0</is_flex></selected_position>"
+                f"{_player_stats(rng, num_stats)}",
+            )
+            for slot in range(roster_size)
+        )
+        teams += (
+            f"<team>{_team_header(index, rng)}<roster><coverage_type>week</coverage_type><week>{WEEK}</week>"
+            f'<is_editable>0</is_editable><players count="{roster_size}">{players}</players></roster></team>'
+        )
+    return wrap(f'<league>{_league_header(rng)}<teams count="{num_teams}">{teams}</teams></league>')
+
+
+def team_stats_xml(rng, num_teams=12, num_stats=30):
+    teams = "".join(
+        f"<team>{_team_header(i, rng)}<team_stats><coverage_type>week</coverage_type><week>{WEEK}</week>"
+        f"<stats>{_stats(rng, num_stats)}</stats></team_stats>{_team_points(rng)}</team>"
+        for i in range(1, num_teams + 1)
+    )
+    return wrap(f'<league>{_league_header(rng)}<teams count="{num_teams}">{teams}</teams></league>')
+
+
+def player_stats_xml(rng, num_players=25, num_stats=30):
+    players = "".join(_player(rng, 30000 + i, _player_stats(rng, num_stats)) for i in range(num_players))
+    return wrap(f'<league>{_league_header(rng)}<players count="{num_players}">{players}</players></league>')
+
+
+def transactions_xml(rng, count=25, num_teams=12):
+    transactions = ""
+    for n in range(count):
+        kind = rng.choice(("add", "drop", "add/drop", "trade"))
+        moves = []
+        if kind in ("add", "add/drop"):
+            moves.append(("add", "freeagents", "", "team", team_key(rng.randrange(1, num_teams + 1))))
+        if kind in ("drop", "add/drop"):
+            moves.append(("drop", "team", team_key(rng.randrange(1, num_teams + 1)), "waivers", ""))
+        if kind == "trade":
+            source, destination = rng.sample(range(1, num_teams + 1), 2)
+            moves.append(("trade", "team", team_key(source), "team", team_key(destination)))
+            moves.append(("trade", "team", team_key(destination), "team", team_key(source)))
+        players = "".join(
+            _player(
+                rng,
+                40000 + n * 4 + i,
+                f"<transaction_data><type>{move}</type><source_type>{source_type}</source_type>"
+                + (f"<source_team_key>{source_key}</source_team_key>" if source_key else "")
+                + f"<destination_type>{destination_type}</destination_type>"
+                + (f"<destination_team_key>{destination_key}</destination_team_key>" if destination_key else "")
+                + "</transaction_data>",
+            )
+            for i, (move, source_type, source_key, destination_type, destination_key) in enumerate(moves)
+        )
+        transactions += (
+            f"<transaction><transaction_key>{LEAGUE_KEY}.tr.{1000 - n}</transaction_key>"
+            f"<transaction_id>{1000 - n}</transaction_id><type>{kind}</type><status>successful</status>"
+            f"<timestamp>{1730000000 - n * 3600}</timestamp>"
+            f'<players count="{len(moves)}">{players}</players></transaction>'
+        )
+    return wrap(f'<league>{_league_header(rng)}<transactions count="{count}">{transactions}</transactions></league>')
+
+
+def build_payloads(teams=12, roster_size=16, stats=30, players=25, transactions=25, seed=0):
+    rng = random.Random(seed)
+    return {
+        "games": games_xml(rng),
+        "leagues": leagues_xml(rng),
+        "league": league_xml(rng),
+        "settings": settings_xml(rng, stats),
+        "teams": teams_xml(rng, teams),
+        "standings": standings_xml(rng, teams),
+        "draftresults": draft_results_xml(rng, teams),
+        "scoreboard": scoreboard_xml(rng, teams, stats),
+        "roster": roster_xml(rng, teams, roster_size),
+        "team_stats": team_stats_xml(rng, teams, stats),
+        "player_stats": player_stats_xml(rng, players, stats),
+        "transactions": transactions_xml(rng, transactions, teams),
+        "roster_stats": roster_stats_xml(rng, teams, roster_size, stats),
+    }
+
+
+def to_yahoo_json(xml_bytes):
+    root = ElementTree.fromstring(xml_bytes)
+    content = {"xml:lang": "en-US", "yahoo:uri": root.get(f"{{{YAHOO_NS}}}uri", "")}
+    for child in root:
+        content[_tag(child)] = _json_value(child)
+    content.update({"time": root.get("time", ""), "copyright": root.get("copyright", ""), "refresh_rate": "60"})
+    return json.dumps({"fantasy_content": content}, separators=(",", ":")).encode("utf-8")
+
+
+def _tag(elem):
+    return elem.tag.split("}", 1)[-1]
+
+
+def _json_value(elem):
+    name = _tag(elem)
+    children = list(elem)
+    if not children:
+        text = (elem.text or "").strip()
+        if name in JSON_NUMBERS and text.isdigit():
+            return int(text)
+        return text
+    if name in JSON_ENTITIES:
+        props = [child for child in children if _tag(child) not in JSON_SUBRESOURCES]
+        subresources = [{_tag(child): _json_value(child)} for child in children if _tag(child) in JSON_SUBRESOURCES]
+        if name in JSON_LIST_PROPS:
+            return [[{_tag(child): _json_value(child)} for child in props], *subresources]
+        return [{_tag(child): _json_value(child) for child in props}, *subresources]
+    if name in JSON_COLLECTIONS:
+        collection = {str(i): {_tag(child): _json_value(child)} for i, child in enumerate(children)}
+        collection["count"] = len(children)
+        return collection
+    if name in JSON_WRAPPER_LISTS or name in ("selected_position", "standings"):
+        return [{_tag(child): _json_value(child)} for child in children]
+    if name == "settings":
+        return [{_tag(child): _json_value(child) for child in children}]
+    if name in ("roster", "matchup", "scoreboard"):
+        value = {}
+        for child in children:
+            if _tag(child) in JSON_COLLECTIONS:
+                value["0"] = {_tag(child): _json_value(child)}
+            else:
+                value[_tag(child)] = _json_value(child)
+        return value
+    if name == "transaction_data":
+        value = {_tag(child): _json_value(child) for child in children}
+        return [value] if value.get("type") == "add" else value
+    return {_tag(child): _json_value(child) for child in children}